@@ -2,7 +2,8 @@
 """
 from anytree import Node
 from agent import Agent
-from enums import UpdateMessageKey, UpdateType
+from call_instrumentation import tag_call_site
+from enums import GenerationProfile, UpdateMessageKey, UpdateType
 from environment import save_environment_tree_to_json
 from errors import AlgorithmError, InvalidParameterError
 from logging_messages import log_debug_message
@@ -18,6 +19,7 @@ from wrappers import (
 
 @validate_agent_type
 @validate_agent_planned_action
+@tag_call_site
 def request_agent_action_status_for_using_object(agent):
     """Requests from the AI model what should be the agent's status given that he's using an object.
 
@@ -29,13 +31,16 @@ def request_agent_action_status_for_using_object(agent):
     """
     prompt = f"Write a summary of the action {agent.get_planned_action()} in a single sentence:"
 
-    response = agent.get_request_response_function()(prompt)
+    response = agent.get_request_response_function()(
+        prompt, generation_profile=GenerationProfile.SHORT_SENTENCE
+    )
 
     log_debug_message(f"Agent {agent.name} --> Action Status: {response}")
 
     return response
 
 
+@tag_call_site
 def request_used_object_action_status(agent):
     """Requests from the AI model what action status the used object should have.
 
@@ -64,7 +69,9 @@ def request_used_object_action_status(agent):
     prompt += "For example: the state of a coffee machine would change from 'off' to 'brewing coffee'. "
     prompt += f"Write the {agent.get_using_object().name.name}'s new status in a single sentence:"
 
-    response = agent.get_request_response_function()(prompt)
+    response = agent.get_request_response_function()(
+        prompt, generation_profile=GenerationProfile.SHORT_SENTENCE
+    )
 
     log_debug_message(
         f"Object being used: {agent.get_using_object().name.name} --> Action status: {response}"
@@ -240,6 +247,7 @@ def produce_action_statuses_for_agent_and_sandbox_object(
     produce_action_statuses_for_agent_based_on_destination_node_function,
     request_what_action_to_take_now_function,
     request_for_what_length_of_time_the_action_should_take_place_function,
+    request_action_and_its_duration_function=None,
 ):
     """Produces action statuses for a agent and for the sandbox object involved if it's used.
 
@@ -248,6 +256,8 @@ def produce_action_statuses_for_agent_and_sandbox_object(
         current_timestamp (datetime): the current timestamp
         create_action_function (function): the function responsible for creating an action
         determine_sandbox_object_destination_from_root_function (function): the function that determines what sandbox object gets used
+        request_action_and_its_duration_function (function, optional): the function that requests the action and its duration
+         through a single request. Defaults to None.
     """
     action = create_action_function(
         agent,
@@ -256,6 +266,7 @@ def produce_action_statuses_for_agent_and_sandbox_object(
         update_memories_database,
         request_what_action_to_take_now_function,
         request_for_what_length_of_time_the_action_should_take_place_function,
+        request_action_and_its_duration_function,
     )
 
     agent.notify(
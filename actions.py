@@ -1,8 +1,15 @@
 from agent_utils import wipe_previous_action_attribute_values_from_agent
+from call_instrumentation import tag_call_site
 from datetime_utils import format_date
-from defines import NUMBER_OF_RESULTS_FOR_QUERY
+from defines import ACTION_MODE, NUMBER_OF_RESULTS_FOR_QUERY
+from enums import ActionMode, GenerationProfile
 from logging_messages import log_debug_message
 from memories_querying import get_most_recent_memories
+from prompt_packing import pack_memories_into_prompt
+from regular_expression_utils import (
+    extract_action_and_duration_from_text,
+    extract_duration_in_minutes_from_text,
+)
 from string_utils import end_string_with_period
 from wrappers import (
     validate_agent_has_character_summary,
@@ -12,6 +19,7 @@ from wrappers import (
 
 @validate_agent_type
 @validate_agent_has_character_summary
+@tag_call_site
 def request_what_action_to_take_now(agent, current_timestamp, most_recent_memories):
     """Requests to the AI model what action the agent should take now.
 
@@ -23,20 +31,33 @@ def request_what_action_to_take_now(agent, current_timestamp, most_recent_memori
     Returns:
         str: the plan received from the AI model
     """
-    prompt = agent.get_character_summary() + "\n"
-    prompt += "Most recent memories:\n"
-
-    for most_recent_memory in most_recent_memories:
-        prompt += f"- {most_recent_memory['description']}\n"
-
-    prompt += f"Now it is {format_date(current_timestamp)}. Decide what single action {agent.name} should take right now. "
-    prompt += f"Format: {agent.name} is going to <action>"
+    header = agent.get_character_summary() + "\n"
+    header += "Most recent memories:\n"
+
+    footer = f"Now it is {format_date(current_timestamp)}. Decide what single action {agent.name} should take right now. "
+    footer += f"Format: {agent.name} is going to <action>"
+
+    request_response_function = agent.get_request_response_function()
+
+    prompt = pack_memories_into_prompt(
+        request_response_function,
+        GenerationProfile.SHORT_SENTENCE,
+        header,
+        [
+            most_recent_memory["description"]
+            for most_recent_memory in most_recent_memories
+        ],
+        footer,
+    )
 
-    return agent.get_request_response_function()(prompt)
+    return request_response_function(
+        prompt, generation_profile=GenerationProfile.SHORT_SENTENCE
+    )
 
 
 @validate_agent_type
 @validate_agent_has_character_summary
+@tag_call_site
 def request_for_what_length_of_time_the_action_should_take_place(
     agent, action, current_timestamp, most_recent_memories
 ):
@@ -53,15 +74,74 @@ def request_for_what_length_of_time_the_action_should_take_place(
         str: for how long should the action take place
     """
     # Now determine for what length of time should the agent perform this action.
-    prompt = agent.get_character_summary() + "\n"
-    prompt += "Most recent memories:\n"
+    header = agent.get_character_summary() + "\n"
+    header += "Most recent memories:\n"
+
+    footer = f"Now it is {format_date(current_timestamp)}. {agent.name} is planning to take the following action: {end_string_with_period(action)}\n"
+    footer += "For how many minutes should this action take place?"
+
+    request_response_function = agent.get_request_response_function()
+
+    prompt = pack_memories_into_prompt(
+        request_response_function,
+        GenerationProfile.SHORT_SENTENCE,
+        header,
+        [
+            most_recent_memory["description"]
+            for most_recent_memory in most_recent_memories
+        ],
+        footer,
+    )
+
+    return request_response_function(
+        prompt, generation_profile=GenerationProfile.SHORT_SENTENCE
+    )
+
+
+@validate_agent_type
+@validate_agent_has_character_summary
+@tag_call_site
+def request_action_and_its_duration(agent, current_timestamp, most_recent_memories):
+    """Requests from the AI model what action the agent should take now, along with its duration,
+    through a single request.
+
+    Args:
+        agent (Agent): the agent for whom the request will be made.
+        current_timestamp (datetime): the current timestamp
+        most_recent_memories (dict): the most recent memories of the agent
+
+    Returns:
+        tuple: the action, and its duration in minutes; either is None if the response didn't contain it
+    """
+    header = agent.get_character_summary() + "\n"
+    header += "Most recent memories:\n"
+
+    footer = f"Now it is {format_date(current_timestamp)}. Decide what single action {agent.name} should take right now, "
+    footer += "and for how many minutes it should take place. "
+    footer += f"Format: {agent.name} is going to <action> for <number> minutes"
+
+    request_response_function = agent.get_request_response_function()
+
+    prompt = pack_memories_into_prompt(
+        request_response_function,
+        GenerationProfile.SHORT_SENTENCE,
+        header,
+        [
+            most_recent_memory["description"]
+            for most_recent_memory in most_recent_memories
+        ],
+        footer,
+    )
+
+    response = request_response_function(
+        prompt, generation_profile=GenerationProfile.SHORT_SENTENCE
+    )
 
-    for most_recent_memory in most_recent_memories:
-        prompt += f"- {most_recent_memory['description']}\n"
-    prompt += f"Now it is {format_date(current_timestamp)}. {agent.name} is planning to take the following action: {end_string_with_period(action)}\n"
-    prompt += "For how many minutes should this action take place?"
+    log_debug_message(
+        f"Function {request_action_and_its_duration.__name__}:\n{response}"
+    )
 
-    return agent.get_request_response_function()(prompt)
+    return extract_action_and_duration_from_text(response)
 
 
 @validate_agent_type
@@ -73,8 +153,10 @@ def create_action(
     update_memories_database_function,
     request_what_action_to_take_now_function,
     request_for_what_length_of_time_the_action_should_take_place_function,
+    request_action_and_its_duration_function=None,
+    action_mode=ACTION_MODE,
 ):
-    """Creates an action for the agent.
+    """Creates an action for the agent. The duration of the action, in minutes, gets stored in the agent.
 
     Args:
         agent (Agent): the agent for whom the action will be created.
@@ -84,32 +166,55 @@ def create_action(
         request_what_action_to_take_now_function (function): the function that requests from the AI model what action the agent should take now
         request_for_what_length_of_time_the_action_should_take_place_function (function): the function that requests from the AI model for what
          length the action should happen
+        request_action_and_its_duration_function (function, optional): the function that requests from the AI model the action
+         and its duration through a single request. Defaults to None.
+        action_mode (ActionMode, optional): how the action and its duration get requested. Defaults to ACTION_MODE.
     """
     # Given that calling this function determines that the previous action is void, then all the related
     # attribute values from an agent get wiped
     wipe_previous_action_attribute_values_from_agent(agent)
 
-    index, memories_raw_data = load_agent_memories_function(agent)
+    memory_stream = load_agent_memories_function(agent)
 
     most_recent_memories = get_most_recent_memories(
-        current_timestamp, NUMBER_OF_RESULTS_FOR_QUERY, memories_raw_data
+        current_timestamp, NUMBER_OF_RESULTS_FOR_QUERY, memory_stream.get_memories()
     )
 
-    action = request_what_action_to_take_now_function(
-        agent, current_timestamp, most_recent_memories
-    )
+    action = None
+    duration_in_minutes = None
 
-    length_of_time = (
-        request_for_what_length_of_time_the_action_should_take_place_function(
-            agent, action, current_timestamp, most_recent_memories
+    if (
+        action_mode == ActionMode.COMBINED
+        and request_action_and_its_duration_function is not None
+    ):
+        action, duration_in_minutes = request_action_and_its_duration_function(
+            agent, current_timestamp, most_recent_memories
         )
-    )
+
+    # Whatever the combined response lacked gets requested separately.
+    if action is None:
+        action = request_what_action_to_take_now_function(
+            agent, current_timestamp, most_recent_memories
+        )
+
+    if duration_in_minutes is None:
+        length_of_time = (
+            request_for_what_length_of_time_the_action_should_take_place_function(
+                agent, action, current_timestamp, most_recent_memories
+            )
+        )
+
+        duration_in_minutes = extract_duration_in_minutes_from_text(length_of_time)
+    else:
+        length_of_time = f"for {duration_in_minutes} minutes"
+
+    agent.set_planned_action_duration(duration_in_minutes)
 
     action = f"{format_date(current_timestamp)}. {action} {length_of_time}"
 
     log_debug_message(f"Function {create_action.__name__}:\n{action}")
 
     # Save the memory in the file.
-    update_memories_database_function(agent, current_timestamp, [action], index)
+    update_memories_database_function(agent, current_timestamp, [action], memory_stream)
 
     return action
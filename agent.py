@@ -33,6 +33,7 @@ class Agent:
         self._current_location_node = current_location_node
 
         self._planned_action = None
+        self._planned_action_duration = None
         self._action_status = None
         self._observation = None
         self._destination_node = None
@@ -43,6 +44,9 @@ class Agent:
 
         self._request_response_function = request_response_from_ai_model
 
+        # Loaded the first time the agent's memories are needed, and kept for the whole run.
+        self._memory_stream = None
+
         self._observers = []
 
     def set_environment_tree(self, environment_tree):
@@ -124,6 +128,22 @@ class Agent:
         """
         return self._planned_action
 
+    def set_planned_action_duration(self, planned_action_duration):
+        """Sets for how long the agent's planned action should take place
+
+        Args:
+            planned_action_duration (int): the duration in minutes, or None if unknown
+        """
+        self._planned_action_duration = planned_action_duration
+
+    def get_planned_action_duration(self):
+        """Returns for how long the agent's planned action should take place
+
+        Returns:
+            int: the duration in minutes, or None if unknown
+        """
+        return self._planned_action_duration
+
     def set_action_status(self, action_status, silent=False):
         """Sets the agent's action status
 
@@ -312,6 +332,30 @@ class Agent:
         """
         return self._request_response_function
 
+    def set_memory_stream(self, memory_stream):
+        """Sets the memory stream that the agent will keep resident
+
+        Args:
+            memory_stream (MemoryStream): the agent's memory stream
+        """
+        self._memory_stream = memory_stream
+
+    def get_memory_stream(self):
+        """Returns the agent's resident memory stream
+
+        Returns:
+            MemoryStream: the agent's memory stream, or None if it hasn't been loaded yet
+        """
+        return self._memory_stream
+
+    def has_memory_stream(self):
+        """Returns whether or not the agent's memory stream has been loaded
+
+        Returns:
+            bool: whether the agent keeps a resident memory stream
+        """
+        return self._memory_stream is not None
+
     def subscribe(self, observer):
         """Allows an object to subscribe to this Agent
 
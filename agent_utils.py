@@ -257,6 +257,7 @@ def wipe_previous_action_attribute_values_from_agent(agent: Agent):
     """
     if agent.get_planned_action() is not None:
         agent.set_planned_action(None)
+    agent.set_planned_action_duration(None)
     if agent.get_action_status() is not None:
         agent.set_action_status(None)
     if agent.get_destination_node() is not None:
@@ -3,49 +3,210 @@
 """
 # Run oobabooga server with: python server.py --model-menu --listen --no-stream --extensions api
 
+import concurrent.futures
+import datetime
+import email.utils
 import json
+import math
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from backend_pool import BackendPool
+from call_instrumentation import (
+    CallRecorder,
+    get_call_site,
+    record_cache_hit,
+    record_retry,
+    start_call_statistics,
+    stop_call_statistics,
+)
+from circuit_breaker import CircuitBreaker
 from defines import (
+    AI_MODEL_BACKOFF_BASE_SECONDS,
+    AI_MODEL_BACKOFF_MAX_SECONDS,
+    AI_MODEL_CONNECT_TIMEOUT,
+    AI_MODEL_CONNECTION_POOL_SIZE,
+    AI_MODEL_MAX_RETRIES,
+    AI_MODEL_REQUEST_TIMEOUT,
+    API_KEY_FILENAME,
+    GENERATION_PROFILES,
+    GPT_API_ENDPOINT,
+    GPT_CONTEXT_TOKENS,
+    GPT_MAX_CONCURRENT_REQUESTS,
+    GPT_MODEL,
+    GPT_RATING_TOP_LOGPROBS,
+    GPT_REQUESTS_PER_MINUTE,
+    GPT_TOKENS_PER_MINUTE,
     INSTRUCT_GPT_PROMPT_ANSWER_OPENING,
     INSTRUCT_GPT_PROMPT_HEADER,
     INSTRUCT_VICUNA_1_1_PROMPT_ANSWER_OPENING,
     INSTRUCT_VICUNA_1_1_PROMPT_HEADER,
+    OOBABOOGA_API_ENDPOINTS,
+    OOBABOOGA_CONTEXT_TOKENS,
+    OOBABOOGA_MAX_CONCURRENT_REQUESTS,
+    OOBABOOGA_MAX_NEW_TOKENS,
+    OOBABOOGA_REQUESTS_PER_MINUTE,
+    OOBABOOGA_TOKENS_PER_MINUTE,
+    RESPONSE_CACHE_MODE,
+    RETRYABLE_STATUS_CODES,
     USE_GPT,
 )
 
-from errors import UnableToConnectWithAiModelError
+from enums import GenerationProfile, RequestPriority, ResponseCacheMode
+from errors import ResponseNotCachedError, UnableToConnectWithAiModelError
 from logging_messages import log_debug_message
+from prompt_packing import calculate_prompt_token_budget
 from regular_expression_utils import remove_end_tag_from_ai_response
+from request_scheduler import get_request_scheduler
+from response_cache import create_response_cache_key, get_response_cache
+from single_flight import SingleFlight
+from token_accounting import TokenAccounting, estimate_number_of_tokens
+
+GPT_BACKEND = "gpt"
+OOBABOOGA_BACKEND = "oobabooga"
 
 
-def try_to_get_a_response_from_gpt(prompt):
-    """Tries to get a response from GPT
+def create_pooled_session(pool_size=AI_MODEL_CONNECTION_POOL_SIZE):
+    """Creates an HTTP session that keeps its connections alive, so that consecutive
+    requests to the same backend skip the TCP (and TLS) handshakes.
 
     Args:
-        prompt (str): the prompt that will be sent to GPT
+        pool_size (int, optional): how many connections the session keeps open per host. Defaults to AI_MODEL_CONNECTION_POOL_SIZE.
 
     Returns:
-        str: either a valid response or None
+        requests.Session: the pooled session
     """
-    # Read API key from file
-    with open("api_key.txt", "r", encoding="utf8") as file:
-        api_key = file.read().strip()
+    session = requests.Session()
 
-    api_endpoint = "https://api.openai.com/v1/chat/completions"
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def load_api_key(api_key_filename):
+    """Reads the OpenAI API key from its file
+
+    Args:
+        api_key_filename (str): the path of the file that contains the API key
+
+    Returns:
+        str: the API key
+    """
+    with open(api_key_filename, "r", encoding="utf8") as file:
+        return file.read().strip()
+
+
+def parse_retry_after(retry_after):
+    """Parses the value of a 'Retry-After' header, which holds either seconds or an HTTP date
+
+    Args:
+        retry_after (str): the value of the header, or None if it wasn't sent
+
+    Returns:
+        float: the seconds to wait, or None if the header is missing or malformed
+    """
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max(
+        0.0,
+        (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds(),
+    )
+
+
+def calculate_backoff_delay(
+    attempt,
+    base_seconds=AI_MODEL_BACKOFF_BASE_SECONDS,
+    max_seconds=AI_MODEL_BACKOFF_MAX_SECONDS,
+    random_function=random.random,
+):
+    """Calculates how long to wait before retrying a request, using exponential backoff with full
+    jitter so that concurrent requests that failed together don't retry together.
+
+    Args:
+        attempt (int): how many attempts have failed already, minus one
+        base_seconds (float, optional): the delay ceiling of the first retry. Defaults to AI_MODEL_BACKOFF_BASE_SECONDS.
+        max_seconds (float, optional): the highest possible delay. Defaults to AI_MODEL_BACKOFF_MAX_SECONDS.
+        random_function (function, optional): returns a random float in [0, 1). Defaults to random.random.
+
+    Returns:
+        float: the seconds to wait
+    """
+    return random_function() * min(max_seconds, base_seconds * 2**attempt)
+
+
+def wait_for_first_answer(futures):
+    """Waits for the first of several duplicated requests that gets a proper answer
+
+    Args:
+        futures (list[concurrent.futures.Future]): the requests, each resolving to a response
 
-    model = "gpt-3.5-turbo"
-    temperature = 1
-    max_tokens = None
+    Returns:
+        requests.Response: the first response whose status isn't retryable, or else the last one received
+    """
+    pending = set(futures)
+    response = None
+    exception = None
+
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+
+        for future in done:
+            exception = future.exception()
+
+            if exception is not None:
+                continue
+
+            response = future.result()
+
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+
+    if response is None:
+        raise exception
+
+    return response
+
+
+def create_gpt_request(prompt, generation_profile=GenerationProfile.FREE_TEXT):
+    """Creates the body of a request to GPT
+
+    Args:
+        prompt (str): the prompt that will be sent to GPT
+        generation_profile (GenerationProfile, optional): the kind of response requested. Defaults to GenerationProfile.FREE_TEXT.
+
+    Returns:
+        dict: the body of the request
+    """
+    generation_settings = GENERATION_PROFILES[generation_profile]
+
+    temperature = generation_settings["temperature"]
+    max_tokens = generation_settings["max_new_tokens"]
+
+    if temperature is None:
+        temperature = 1
 
     prompt = INSTRUCT_GPT_PROMPT_HEADER + prompt + INSTRUCT_GPT_PROMPT_ANSWER_OPENING
 
     request = {
-        "model": model,
+        "model": GPT_MODEL,
         "messages": [
             {
                 "role": "user",
@@ -58,68 +219,95 @@ def try_to_get_a_response_from_gpt(prompt):
     if max_tokens is not None:
         request["max_tokens"] = max_tokens
 
-    try:
-        response = requests.post(
-            api_endpoint, headers=headers, data=json.dumps(request), timeout=25
-        )
-    except requests.exceptions.ReadTimeout as exception:
-        log_debug_message(
-            f"Request to '{model}' failed due to ReadTimeout: {exception}"
-        )
-        return None
+    # GPT accepts at most four stop sequences.
+    if generation_settings["stopping_strings"]:
+        request["stop"] = generation_settings["stopping_strings"][:4]
 
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    if response.status_code == 400:
-        log_debug_message(
-            f"Request to '{model}' failed due to BadRequestError: {response.text}"
-        )
-    if response.status_code == 401:
-        log_debug_message(
-            f"Request to '{model}' failed due to UnauthorizedError: {response.text}"
-        )
-    if response.status_code == 403:
-        log_debug_message(
-            f"Request to '{model}' failed due to ForbiddenError: {response.text}"
-        )
-    if response.status_code == 404:
-        log_debug_message(
-            f"Request to '{model}' failed due to NotFoundError: {response.text}"
-        )
-    if response.status_code == 429:
-        log_debug_message(
-            f"Request to '{model}' failed due to NotFoundError: {response.text}"
-        )
-    if response.status_code == 502:
-        log_debug_message(
-            f"Request to '{model}' failed due to ModelOverloadedError: {response.text}"
-        )
+    return request
+
+
+def create_gpt_rating_request(prompt):
+    """Creates the body of a request to GPT for a rating from 1 to 10, which only takes a single token.
+    The response carries the log probabilities of the most likely tokens, so that the rating
+    can be weighed among all of them.
+
+    Args:
+        prompt (str): the prompt that asks for the rating
+
+    Returns:
+        dict: the body of the request
+    """
+    request = create_gpt_request(prompt, GenerationProfile.RATING)
 
-    return None
+    request["temperature"] = 0
+    request["max_tokens"] = 1
+    request["logprobs"] = True
+    request["top_logprobs"] = GPT_RATING_TOP_LOGPROBS
+    request.pop("stop", None)
 
+    return request
 
-def try_to_get_a_response_from_oobabooga(prompt):
-    """Tries to get a response from the oobabooga server.
+
+def calculate_expected_rating(logprobs):
+    """Calculates the expected rating from the log probabilities of the first token of a response.
+    Only the tokens that are a number from 1 to 10 count; their probabilities get renormalized.
 
     Args:
-        prompt (str): the prompt that will be sent to the oobabooga server.
+        logprobs (dict): the 'logprobs' of a GPT choice, or None if the backend didn't send them
+
+    Returns:
+        float: the expected rating, or None if no token was a valid rating
+    """
+    if not logprobs or not logprobs.get("content"):
+        return None
 
-    Raises:
-        UnableToConnectWithAiModelError: if the function is unable to retrieve a valid response from the server.
+    weighted_ratings = 0.0
+    total_probability = 0.0
+
+    for top_logprob in logprobs["content"][0].get("top_logprobs", []):
+        token = top_logprob["token"].strip()
+
+        if not token.isdigit() or not 1 <= int(token) <= 10:
+            continue
+
+        probability = math.exp(top_logprob["logprob"])
+
+        weighted_ratings += int(token) * probability
+        total_probability += probability
+
+    if total_probability == 0.0:
+        return None
+
+    return weighted_ratings / total_probability
+
+
+def create_oobabooga_request(prompt, generation_profile=GenerationProfile.FREE_TEXT):
+    """Creates the body of a request to the oobabooga server
+
+    Args:
+        prompt (str): the prompt that will be sent to the oobabooga server
+        generation_profile (GenerationProfile, optional): the kind of response requested. Defaults to GenerationProfile.FREE_TEXT.
 
     Returns:
-        str: either a valid response from the oobabooga server, or None
+        dict: the body of the request
     """
-    host = "localhost:5000"
-    uri = f"http://{host}/api/v1/generate"
+    generation_settings = GENERATION_PROFILES[generation_profile]
+
+    max_new_tokens = generation_settings["max_new_tokens"]
+    temperature = generation_settings["temperature"]
+
+    if max_new_tokens is None:
+        max_new_tokens = OOBABOOGA_MAX_NEW_TOKENS
+    if temperature is None:
+        temperature = 0.7
 
     prompt = f"{INSTRUCT_VICUNA_1_1_PROMPT_HEADER}{prompt}{INSTRUCT_VICUNA_1_1_PROMPT_ANSWER_OPENING}"
 
-    request_for_oobabooga = {
+    return {
         "prompt": prompt,
-        "max_new_tokens": 2000,
+        "max_new_tokens": max_new_tokens,
         "do_sample": True,
-        "temperature": 0.7,
+        "temperature": temperature,
         "top_p": 0.5,
         "typical_p": 1,
         "repetition_penalty": 1.2,
@@ -132,57 +320,870 @@ def try_to_get_a_response_from_oobabooga(prompt):
         "early_stopping": False,
         "seed": -1,
         "add_bos_token": True,
-        "truncation_length": 2048,
+        "truncation_length": OOBABOOGA_CONTEXT_TOKENS,
         "ban_eos_token": False,
         "skip_special_tokens": True,
-        "stopping_strings": [],
+        "stopping_strings": list(generation_settings["stopping_strings"]),
     }
 
-    try:
-        response = requests.post(uri, json=request_for_oobabooga, timeout=25)
-    except requests.exceptions.ConnectionError as exception:
-        error_message = "I was unable to connect with the AI model to request a "
-        error_message += (
-            f"response. Are you sure it's running properly? Error: {exception}"
+
+class AiModelClient:
+    """A client for the AI model backends, meant to be created once per simulation run and shared
+    by all of its agents. It keeps a pooled keep-alive session per backend, and it loads the
+    credentials and the endpoints once.
+
+    Calling the client with a prompt returns the AI model's response, so an instance, or one bound
+    to an owner through 'bind', can be passed to Agent.set_request_response_function. The client
+    is thread-safe.
+    """
+
+    def __init__(
+        self,
+        use_gpt=USE_GPT,
+        gpt_api_endpoint=GPT_API_ENDPOINT,
+        oobabooga_api_endpoints=OOBABOOGA_API_ENDPOINTS,
+        api_key_filename=API_KEY_FILENAME,
+        request_timeout=AI_MODEL_REQUEST_TIMEOUT,
+        connect_timeout=AI_MODEL_CONNECT_TIMEOUT,
+        max_retries=AI_MODEL_MAX_RETRIES,
+        backoff_base_seconds=AI_MODEL_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=AI_MODEL_BACKOFF_MAX_SECONDS,
+        sleep_function=time.sleep,
+        random_function=random.random,
+        create_circuit_breaker_function=CircuitBreaker,
+        get_request_scheduler_function=get_request_scheduler,
+        create_session_function=create_pooled_session,
+        gpt_max_concurrent_requests=GPT_MAX_CONCURRENT_REQUESTS,
+        oobabooga_max_concurrent_requests=OOBABOOGA_MAX_CONCURRENT_REQUESTS,
+        response_cache_mode=RESPONSE_CACHE_MODE,
+        response_cache=None,
+        call_recorder=None,
+    ):
+        self._use_gpt = use_gpt
+        self._gpt_api_endpoint = gpt_api_endpoint
+        self._request_timeout = request_timeout
+        self._connect_timeout = connect_timeout
+
+        self._max_retries = max_retries
+        self._backoff_base_seconds = backoff_base_seconds
+        self._backoff_max_seconds = backoff_max_seconds
+        self._sleep_function = sleep_function
+        self._random_function = random_function
+
+        # Every oobabooga server has a circuit breaker of its own in the pool, so that one failing
+        # server doesn't block the others.
+        self._circuit_breakers = {GPT_BACKEND: create_circuit_breaker_function()}
+
+        self._request_schedulers = {
+            GPT_BACKEND: get_request_scheduler_function(
+                GPT_BACKEND, GPT_REQUESTS_PER_MINUTE, GPT_TOKENS_PER_MINUTE
+            ),
+            OOBABOOGA_BACKEND: get_request_scheduler_function(
+                OOBABOOGA_BACKEND,
+                OOBABOOGA_REQUESTS_PER_MINUTE,
+                OOBABOOGA_TOKENS_PER_MINUTE,
+            ),
+        }
+
+        self._oobabooga_pool = BackendPool(
+            oobabooga_api_endpoints,
+            request_timeout,
+            create_circuit_breaker_function,
+        )
+
+        # Hedging needs the first request running in the background while waiting for it.
+        self._hedging_executor = None
+
+        if self._oobabooga_pool.get_number_of_endpoints() > 1:
+            self._hedging_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=2 * oobabooga_max_concurrent_requests,
+                thread_name_prefix="hedged-request",
+            )
+
+        self._gpt_max_concurrent_requests = gpt_max_concurrent_requests
+        self._oobabooga_max_concurrent_requests = oobabooga_max_concurrent_requests
+
+        self._gpt_semaphore = threading.BoundedSemaphore(gpt_max_concurrent_requests)
+        self._oobabooga_semaphore = threading.BoundedSemaphore(
+            oobabooga_max_concurrent_requests
+        )
+
+        self._response_cache_mode = response_cache_mode
+        self._response_cache = response_cache
+
+        if (
+            self._response_cache_mode != ResponseCacheMode.PASSTHROUGH
+            and self._response_cache is None
+        ):
+            self._response_cache = get_response_cache()
+
+        self._token_accounting = TokenAccounting()
+        self._single_flight = SingleFlight()
+        self._call_recorder = (
+            call_recorder if call_recorder is not None else CallRecorder()
         )
-        raise UnableToConnectWithAiModelError(error_message) from exception
 
-    if response.status_code == 200:
+        self._oobabooga_session = create_session_function()
+        self._gpt_session = None
+
+        if self._use_gpt:
+            self._gpt_session = create_session_function()
+            self._gpt_session.headers.update(
+                {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {load_api_key(api_key_filename)}",
+                }
+            )
+
+    def __call__(
+        self,
+        prompt,
+        generation_profile=GenerationProfile.FREE_TEXT,
+        owner=None,
+        priority=RequestPriority.NORMAL,
+    ):
+        return self.request_response(prompt, generation_profile, owner, priority)
+
+    def bind(self, owner, priority=RequestPriority.NORMAL):
+        """Creates a request response function whose requests get scheduled on behalf of 'owner'
+
+        Args:
+            owner (str): who the requests will be sent for, usually an agent's name
+            priority (RequestPriority, optional): how urgent the requests are. Defaults to RequestPriority.NORMAL.
+
+        Returns:
+            BoundAiModelClient: a function that can be passed to Agent.set_request_response_function
+        """
+        return BoundAiModelClient(self, owner, priority)
+
+    def get_max_concurrent_requests(self):
+        """Returns how many requests are worth sending at the same time
+
+        Returns:
+            int: the maximum number of concurrent requests of the backend that answers first
+        """
+        if self._use_gpt:
+            return self._gpt_max_concurrent_requests
+
+        return self._oobabooga_max_concurrent_requests
+
+    def get_prompt_token_budget(self, generation_profile):
+        """Returns how many tokens a prompt can take without getting truncated by any backend that may answer it
+
+        Args:
+            generation_profile (GenerationProfile): the kind of response that will be requested
+
+        Returns:
+            int: the tokens available for the prompt
+        """
+        max_new_tokens = GENERATION_PROFILES[generation_profile]["max_new_tokens"]
+
+        # The oobabooga servers answer whatever GPT couldn't, so their budget always applies.
+        prompt_token_budget = calculate_prompt_token_budget(
+            OOBABOOGA_CONTEXT_TOKENS,
+            max_new_tokens,
+            INSTRUCT_VICUNA_1_1_PROMPT_HEADER
+            + INSTRUCT_VICUNA_1_1_PROMPT_ANSWER_OPENING,
+        )
+
+        if self._use_gpt:
+            prompt_token_budget = min(
+                prompt_token_budget,
+                calculate_prompt_token_budget(
+                    GPT_CONTEXT_TOKENS,
+                    max_new_tokens,
+                    INSTRUCT_GPT_PROMPT_HEADER + INSTRUCT_GPT_PROMPT_ANSWER_OPENING,
+                ),
+            )
+
+        return prompt_token_budget
+
+    def get_failure_rates(self):
+        """Returns the share of the most recent requests that failed, for each backend
+
+        Returns:
+            dict: the failure rate of each backend, from 0.0 to 1.0
+        """
+        failure_rates = {
+            backend: circuit_breaker.get_failure_rate()
+            for backend, circuit_breaker in self._circuit_breakers.items()
+        }
+
+        failure_rates[OOBABOOGA_BACKEND] = self._oobabooga_pool.get_failure_rate()
+
+        return failure_rates
+
+    def get_scheduler_metrics(self):
+        """Returns the queueing metrics of the scheduler of each backend
+
+        Returns:
+            dict: the queue depths and wait times of each backend
+        """
+        return {
+            backend: request_scheduler.get_metrics()
+            for backend, request_scheduler in self._request_schedulers.items()
+        }
+
+    def get_oobabooga_pool_metrics(self):
+        """Returns the load and the latencies of every oobabooga server
+
+        Returns:
+            dict: for each server URL, its outstanding and hedged requests, and its latency percentiles
+        """
+        return self._oobabooga_pool.get_metrics()
+
+    def get_deduplicated_requests(self):
+        """Returns how many requests were answered by an identical request that was already on its way
+
+        Returns:
+            int: the number of deduplicated requests
+        """
+        return self._single_flight.get_deduplicated_calls()
+
+    def get_call_recorder(self):
+        """Returns the recorder of the requests sent through this client
+
+        Returns:
+            CallRecorder: the call recorder
+        """
+        return self._call_recorder
+
+    def get_token_accounting(self):
+        """Returns the accounting of the tokens generated through this client
+
+        Returns:
+            TokenAccounting: the token accounting, per generation profile
+        """
+        return self._token_accounting
+
+    def request_response(
+        self,
+        prompt,
+        generation_profile=GenerationProfile.FREE_TEXT,
+        owner=None,
+        priority=RequestPriority.NORMAL,
+    ):
+        """Requests a response from the AI model. If GPT is enabled, it gets asked first,
+        and the oobabooga server only answers if GPT couldn't.
+
+        Args:
+            prompt (str): the request that will be sent to the AI model.
+            generation_profile (GenerationProfile, optional): the kind of response requested. Defaults to GenerationProfile.FREE_TEXT.
+            owner (str, optional): who the request is sent for. Defaults to None.
+            priority (RequestPriority, optional): how urgent the request is. Defaults to RequestPriority.NORMAL.
+
+        Returns:
+            str: the AI model's response
+        """
+        return self._record_call(
+            prompt,
+            generation_profile,
+            owner,
+            lambda: self._request_response_from_backends(
+                prompt, generation_profile, owner, priority
+            ),
+        )
+
+    def request_rating(self, prompt, owner=None, priority=RequestPriority.NORMAL):
+        """Requests a rating from 1 to 10 through a single token, from a backend that returns
+        the log probabilities of its tokens. The rating is the expected value among the ratings
+        the backend considered.
+
+        Args:
+            prompt (str): the prompt that asks for the rating
+            owner (str, optional): who the request is sent for. Defaults to None.
+            priority (RequestPriority, optional): how urgent the request is. Defaults to RequestPriority.NORMAL.
+
+        Returns:
+            float: the expected rating, or None if no backend could provide it
+        """
+        # The oobabooga generate API doesn't return log probabilities.
+        if not self._use_gpt:
+            return None
+
+        return self._record_call(
+            prompt,
+            GenerationProfile.RATING,
+            owner,
+            lambda: self.try_to_get_a_rating_from_gpt(prompt, owner, priority),
+        )
+
+    def _record_call(self, prompt, generation_profile, owner, request_function):
+        call_statistics, token = start_call_statistics()
+        start = time.monotonic()
+        response = None
+
+        try:
+            response = request_function()
+        finally:
+            stop_call_statistics(token)
+
+            self._call_recorder.record(
+                {
+                    "call_site": get_call_site(),
+                    "generation_profile": generation_profile.name,
+                    "owner": owner,
+                    "wall_seconds": time.monotonic() - start,
+                    "prompt_characters": len(prompt),
+                    "prompt_tokens": estimate_number_of_tokens(prompt),
+                    "completion_characters": len(
+                        str(response) if response is not None else ""
+                    ),
+                    "cache_hit": call_statistics["cache_hit"],
+                    "retries": call_statistics["retries"],
+                    "failed": response is None,
+                }
+            )
+
+        return response
+
+    def _request_response_from_backends(
+        self, prompt, generation_profile, owner, priority
+    ):
+        if self._use_gpt:
+            response = self.try_to_get_a_response_from_gpt(
+                prompt, generation_profile, owner, priority
+            )
+
+            if response is not None:
+                return response
+
+        return self.try_to_get_a_response_from_oobabooga(
+            prompt, generation_profile, owner, priority
+        )
+
+    def _get_cached_response(self, backend, request):
+        if self._response_cache_mode == ResponseCacheMode.PASSTHROUGH:
+            return None
+
+        cached_response = self._response_cache.get(
+            create_response_cache_key(backend, request)
+        )
+
+        if cached_response is not None:
+            record_cache_hit()
+
+        return cached_response
+
+    def _cache_response(self, backend, request, response):
+        if (
+            self._response_cache_mode == ResponseCacheMode.RECORD
+            and response is not None
+        ):
+            self._response_cache.put(
+                create_response_cache_key(backend, request), response
+            )
+
+    def try_to_get_a_response_from_gpt(
+        self,
+        prompt,
+        generation_profile=GenerationProfile.FREE_TEXT,
+        owner=None,
+        priority=RequestPriority.NORMAL,
+    ):
+        """Tries to get a response from GPT
+
+        Args:
+            prompt (str): the prompt that will be sent to GPT
+            generation_profile (GenerationProfile, optional): the kind of response requested. Defaults to GenerationProfile.FREE_TEXT.
+            owner (str, optional): who the request is sent for. Defaults to None.
+            priority (RequestPriority, optional): how urgent the request is. Defaults to RequestPriority.NORMAL.
+
+        Returns:
+            str: either a valid response or None
+        """
+        request = create_gpt_request(prompt, generation_profile)
+
+        cached_response = self._get_cached_response(GPT_BACKEND, request)
+
+        if cached_response is not None:
+            return cached_response
+
+        if self._response_cache_mode == ResponseCacheMode.REPLAY:
+            log_debug_message(
+                f"Request to '{request['model']}' wasn't replayed because its response isn't cached."
+            )
+            return None
+
+        def send_request():
+            response = self._send_request_to_gpt(request, owner, priority)
+
+            self._token_accounting.record(
+                generation_profile, request.get("max_tokens"), response
+            )
+
+            self._cache_response(GPT_BACKEND, request, response)
+
+            return response
+
+        # Identical requests that are already on their way share that response.
+        return self._single_flight.do(
+            create_response_cache_key(GPT_BACKEND, request), send_request
+        )
+
+    def try_to_get_a_rating_from_gpt(
+        self, prompt, owner=None, priority=RequestPriority.NORMAL
+    ):
+        """Tries to get a rating from 1 to 10 from GPT, through the log probabilities of a single token
+
+        Args:
+            prompt (str): the prompt that asks for the rating
+            owner (str, optional): who the request is sent for. Defaults to None.
+            priority (RequestPriority, optional): how urgent the request is. Defaults to RequestPriority.NORMAL.
+
+        Returns:
+            float: either the expected rating or None
+        """
+        request = create_gpt_rating_request(prompt)
+
+        cached_response = self._get_cached_response(GPT_BACKEND, request)
+
+        if cached_response is not None:
+            return float(cached_response)
+
+        if self._response_cache_mode == ResponseCacheMode.REPLAY:
+            log_debug_message(
+                f"Rating request to '{request['model']}' wasn't replayed because its response isn't cached."
+            )
+            return None
+
+        def send_request():
+            response_body = self._post_request_to_gpt(request, owner, priority)
+
+            rating = None
+
+            if response_body is not None:
+                rating = calculate_expected_rating(
+                    response_body["choices"][0].get("logprobs")
+                )
+
+            self._token_accounting.record(
+                GenerationProfile.RATING,
+                request["max_tokens"],
+                str(rating) if rating is not None else None,
+            )
+
+            if rating is not None:
+                self._cache_response(GPT_BACKEND, request, str(rating))
+
+            return rating
+
+        return self._single_flight.do(
+            create_response_cache_key(GPT_BACKEND, request), send_request
+        )
+
+    def _post_with_retries(self, backend, post_function, schedule):
+        """Posts a request to a backend, retrying it while the failures are transient. Connection
+        errors and retryable statuses get retried with jittered exponential backoff, but a request
+        that timed out while reading doesn't, as the backend may still be answering it.
+
+        Args:
+            backend (str): the name of the backend
+            post_function (function): posts the request once, and returns the response
+            schedule (dict): the 'tokens', 'owner' and 'priority' the request gets scheduled with
+
+        Returns:
+            requests.Response: the last response of the backend, or None if it never answered
+        """
+        # Pooled backends leave the circuit breaking to their servers.
+        circuit_breaker = self._circuit_breakers.get(backend)
+
+        get_retry_delay = (
+            circuit_breaker.get_retry_delay
+            if circuit_breaker is not None
+            else self._oobabooga_pool.get_retry_delay
+        )
+
+        response = None
+
+        for attempt in range(self._max_retries + 1):
+            # A backend that asked to wait through a Retry-After gets waited out, by this request
+            # and by the concurrent ones alike.
+            delay = get_retry_delay()
+
+            # Waiting longer than the backoff allows would stall the simulation.
+            if delay > self._backoff_max_seconds:
+                log_debug_message(
+                    f"Request to '{backend}' skipped because the backend asked to wait {delay:.1f} seconds."
+                )
+                return response
+
+            if attempt > 0:
+                delay = max(
+                    delay,
+                    calculate_backoff_delay(
+                        attempt - 1,
+                        self._backoff_base_seconds,
+                        self._backoff_max_seconds,
+                        self._random_function,
+                    ),
+                )
+
+            if delay > 0:
+                self._sleep_function(delay)
+
+            if circuit_breaker is not None and not circuit_breaker.allow_request():
+                log_debug_message(
+                    f"Request to '{backend}' skipped because its circuit breaker is open."
+                )
+                return response
+
+            if attempt > 0:
+                record_retry()
+
+            try:
+                # Every attempt, retries included, counts against the backend's budgets.
+                self._request_schedulers[backend].acquire(**schedule)
+
+                response = post_function()
+            except requests.exceptions.ConnectionError as exception:
+                # Connection timeouts included, the request never reached the backend,
+                # so sending it again can't generate the response twice.
+                log_debug_message(f"Request to '{backend}' failed: {exception}")
+
+                if circuit_breaker is not None:
+                    circuit_breaker.record_failure()
+
+                continue
+            except requests.exceptions.Timeout as exception:
+                # The backend may still be generating the response, and the POST isn't idempotent.
+                log_debug_message(f"Request to '{backend}' timed out: {exception}")
+
+                if circuit_breaker is not None:
+                    circuit_breaker.record_failure()
+
+                return response
+            except BaseException:
+                # Whatever else went wrong must end the attempt as well, or a half-open
+                # breaker would keep waiting on its trial request forever.
+                if circuit_breaker is not None:
+                    circuit_breaker.record_failure()
+
+                raise
+
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                # Even if the request itself was wrong, the backend answered it.
+                if circuit_breaker is not None:
+                    circuit_breaker.record_success()
+
+                return response
+
+            # Pooled backends hand the Retry-After to the server that sent it instead,
+            # so that the retry can go to another server right away.
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure(
+                    parse_retry_after(response.headers.get("Retry-After"))
+                )
+
+        return response
+
+    def _send_request_to_gpt(self, request, owner, priority):
+        response_body = self._post_request_to_gpt(request, owner, priority)
+
+        if response_body is None:
+            return None
+
+        return response_body["choices"][0]["message"]["content"]
+
+    def _post_request_to_gpt(self, request, owner, priority):
+        model = request["model"]
+
+        def post():
+            with self._gpt_semaphore:
+                return self._gpt_session.post(
+                    self._gpt_api_endpoint,
+                    timeout=(self._connect_timeout, self._request_timeout),
+                    data=json.dumps(request),
+                )
+
+        response = self._post_with_retries(
+            GPT_BACKEND,
+            post,
+            {
+                "tokens": estimate_number_of_tokens(request["messages"][0]["content"])
+                + request.get("max_tokens", 0),
+                "owner": owner,
+                "priority": priority,
+            },
+        )
+
+        if response is None:
+            log_debug_message(f"Request to '{model}' failed: no response.")
+            return None
+
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 400:
+            log_debug_message(
+                f"Request to '{model}' failed due to BadRequestError: {response.text}"
+            )
+        if response.status_code == 401:
+            log_debug_message(
+                f"Request to '{model}' failed due to UnauthorizedError: {response.text}"
+            )
+        if response.status_code == 403:
+            log_debug_message(
+                f"Request to '{model}' failed due to ForbiddenError: {response.text}"
+            )
+        if response.status_code == 404:
+            log_debug_message(
+                f"Request to '{model}' failed due to NotFoundError: {response.text}"
+            )
+        if response.status_code == 429:
+            log_debug_message(
+                f"Request to '{model}' failed due to RateLimitError: {response.text}"
+            )
+        if response.status_code == 502:
+            log_debug_message(
+                f"Request to '{model}' failed due to ModelOverloadedError: {response.text}"
+            )
+
+        return None
+
+    def try_to_get_a_response_from_oobabooga(
+        self,
+        prompt,
+        generation_profile=GenerationProfile.FREE_TEXT,
+        owner=None,
+        priority=RequestPriority.NORMAL,
+    ):
+        """Tries to get a response from the oobabooga server.
+
+        Args:
+            prompt (str): the prompt that will be sent to the oobabooga server.
+            generation_profile (GenerationProfile, optional): the kind of response requested. Defaults to GenerationProfile.FREE_TEXT.
+            owner (str, optional): who the request is sent for. Defaults to None.
+            priority (RequestPriority, optional): how urgent the request is. Defaults to RequestPriority.NORMAL.
+
+        Raises:
+            UnableToConnectWithAiModelError: if the server didn't answer properly, even after retrying.
+            ResponseNotCachedError: if the responses are being replayed, and this one isn't cached.
+
+        Returns:
+            str: the response from the oobabooga server
+        """
+        request = create_oobabooga_request(prompt, generation_profile)
+
+        cached_response = self._get_cached_response(OOBABOOGA_BACKEND, request)
+
+        if cached_response is not None:
+            return cached_response
+
+        if self._response_cache_mode == ResponseCacheMode.REPLAY:
+            raise ResponseNotCachedError(
+                f"The responses of the AI model are being replayed, but there's no cached response for the prompt: {prompt}"
+            )
+
+        def send_request():
+            response = self._send_request_to_oobabooga(request, owner, priority)
+
+            self._token_accounting.record(
+                generation_profile, request["max_new_tokens"], response
+            )
+
+            self._cache_response(OOBABOOGA_BACKEND, request, response)
+
+            return response
+
+        # Identical requests that are already on their way share that response.
+        return self._single_flight.do(
+            create_response_cache_key(OOBABOOGA_BACKEND, request), send_request
+        )
+
+    def _post_to_oobabooga_endpoint(self, endpoint, request):
+        # The longer the response may get, the longer the server takes, so each length keeps its own latencies.
+        latency_key = request["max_new_tokens"]
+
+        start = time.monotonic()
+
+        try:
+            response = self._oobabooga_session.post(
+                endpoint.url,
+                timeout=(
+                    self._connect_timeout,
+                    self._oobabooga_pool.get_read_timeout(endpoint, latency_key),
+                ),
+                json=request,
+            )
+        except BaseException:
+            # The server's breaker may be waiting on this request as its trial.
+            self._oobabooga_pool.release_endpoint(endpoint)
+            raise
+
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            self._oobabooga_pool.release_endpoint(
+                endpoint,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        else:
+            self._oobabooga_pool.release_endpoint(
+                endpoint, time.monotonic() - start, latency_key
+            )
+
+        return response
+
+    def _post_to_oobabooga_pool(self, request):
+        with self._oobabooga_semaphore:
+            endpoint = self._oobabooga_pool.acquire_endpoint()
+
+            if endpoint is None:
+                raise requests.exceptions.ConnectionError(
+                    "None of the oobabooga servers is healthy."
+                )
+
+            hedge_delay = self._oobabooga_pool.get_hedge_delay(
+                endpoint, request["max_new_tokens"]
+            )
+
+            if hedge_delay is None:
+                return self._post_to_oobabooga_endpoint(endpoint, request)
+
+            future = self._hedging_executor.submit(
+                self._post_to_oobabooga_endpoint, endpoint, request
+            )
+
+            try:
+                return future.result(timeout=hedge_delay)
+            except concurrent.futures.TimeoutError:
+                pass
+
+            hedge_endpoint = self._oobabooga_pool.acquire_endpoint(endpoint)
+
+            if hedge_endpoint is None:
+                return future.result()
+
+            self._oobabooga_pool.record_hedged_request(endpoint)
+
+            hedge_future = self._hedging_executor.submit(
+                self._post_to_oobabooga_endpoint, hedge_endpoint, request
+            )
+
+            return wait_for_first_answer([future, hedge_future])
+
+    def _send_request_to_oobabooga(self, request, owner, priority):
+        response = self._post_with_retries(
+            OOBABOOGA_BACKEND,
+            lambda: self._post_to_oobabooga_pool(request),
+            {
+                "tokens": estimate_number_of_tokens(request["prompt"])
+                + request["max_new_tokens"],
+                "owner": owner,
+                "priority": priority,
+            },
+        )
+
+        if response is None:
+            error_message = "I was unable to connect with the AI model to request a "
+            error_message += "response. Are you sure it's running properly?"
+            raise UnableToConnectWithAiModelError(error_message)
+
+        if response.status_code != 200:
+            raise UnableToConnectWithAiModelError(
+                f"The AI model failed to answer the request, with status {response.status_code}: {response.text}"
+            )
+
         result = response.json()["results"][0]["text"]
 
         return remove_end_tag_from_ai_response(result.strip())
 
-    return None
+    def close(self):
+        """Closes the pooled sessions of every backend."""
+        if self._hedging_executor is not None:
+            self._hedging_executor.shutdown(wait=False)
 
+        self._oobabooga_session.close()
 
-def request_response_from_ai_model(prompt):
-    """Requests a response from the AI model.
-    NOTE: it should be running locally already if you're not using USE_GPT = True
+        if self._gpt_session is not None:
+            self._gpt_session.close()
 
-    Args:
-        prompt (str): the request that will be sent to the AI model.
+
+class BoundAiModelClient:
+    """A request response function that sends its requests through an AiModelClient on behalf of
+    a single owner, with a fixed priority. Created through AiModelClient.bind.
+    """
+
+    def __init__(self, ai_model_client, owner, priority=RequestPriority.NORMAL):
+        self._ai_model_client = ai_model_client
+        self._owner = owner
+        self._priority = priority
+
+    def __call__(self, prompt, generation_profile=GenerationProfile.FREE_TEXT):
+        return self._ai_model_client.request_response(
+            prompt, generation_profile, self._owner, self._priority
+        )
+
+    def get_max_concurrent_requests(self):
+        """Returns how many requests are worth sending at the same time
+
+        Returns:
+            int: the maximum number of concurrent requests of the underlying client
+        """
+        return self._ai_model_client.get_max_concurrent_requests()
+
+    def get_prompt_token_budget(self, generation_profile):
+        """Returns how many tokens a prompt can take without getting truncated
+
+        Args:
+            generation_profile (GenerationProfile): the kind of response that will be requested
+
+        Returns:
+            int: the tokens available for the prompt of the underlying client
+        """
+        return self._ai_model_client.get_prompt_token_budget(generation_profile)
+
+    def request_rating(self, prompt):
+        """Requests a rating from 1 to 10 through a single token
+
+        Args:
+            prompt (str): the prompt that asks for the rating
+
+        Returns:
+            float: the expected rating, or None if no backend could provide it
+        """
+        return self._ai_model_client.request_rating(prompt, self._owner, self._priority)
+
+
+_AI_MODEL_CLIENT = None
+
+
+def get_ai_model_client():
+    """Returns the AI model client shared by the whole library, creating it the first time
 
     Returns:
-        str: the AI model's response
+        AiModelClient: the shared AI model client
     """
+    global _AI_MODEL_CLIENT  # pylint: disable=global-statement
 
-    # If the define USE_GPT is set as True, we first try to get a response from
-    # GPT through the OpenAI API key.
+    if _AI_MODEL_CLIENT is None:
+        _AI_MODEL_CLIENT = AiModelClient()
 
-    if USE_GPT:
-        response = try_to_get_a_response_from_gpt(prompt)
+    return _AI_MODEL_CLIENT
 
-        if response is not None:
-            return response
 
-    return try_to_get_a_response_from_oobabooga(prompt)
+def request_response_from_ai_model(
+    prompt, generation_profile=GenerationProfile.FREE_TEXT
+):
+    """Requests a response from the AI model, through the shared AI model client.
+    NOTE: it should be running locally already if you're not using USE_GPT = True
+
+    Args:
+        prompt (str): the request that will be sent to the AI model.
+        generation_profile (GenerationProfile, optional): the kind of response requested. Defaults to GenerationProfile.FREE_TEXT.
+
+    Returns:
+        str: the AI model's response
+    """
+    return get_ai_model_client()(prompt, generation_profile)
 
 
-def request_response_from_human(prompt: str):
+def request_response_from_human(
+    prompt: str, generation_profile=GenerationProfile.FREE_TEXT
+):  # pylint: disable=unused-argument
     """Requests a response from a human, instead of from an AI model.
 
     Args:
         prompt (str): the prompt that will be sent to the player.
+        generation_profile (GenerationProfile, optional): ignored, because humans answer however they like.
 
     Returns:
         str: the player's input
@@ -0,0 +1,110 @@
+"""This module contains an asyncio layer to send independent requests to the AI model at the same time.
+
+"""
+import asyncio
+
+from api_requests import request_response_from_human
+from defines import OOBABOOGA_MAX_CONCURRENT_REQUESTS
+from enums import GenerationProfile
+
+
+def get_max_concurrent_requests(request_response_function):
+    """Returns how many requests can be sent at the same time through the passed function
+
+    Args:
+        request_response_function (function): the function that requests a response for a prompt
+
+    Returns:
+        int: the maximum number of concurrent requests
+    """
+    # A human can only answer one prompt at a time, in the order they were asked.
+    if request_response_function is request_response_from_human:
+        return 1
+
+    if hasattr(request_response_function, "get_max_concurrent_requests"):
+        return request_response_function.get_max_concurrent_requests()
+
+    return OOBABOOGA_MAX_CONCURRENT_REQUESTS
+
+
+async def run_asynchronously(functions, max_concurrent_calls):
+    """Runs blocking functions in worker threads, with at most 'max_concurrent_calls' running at once
+
+    Args:
+        functions (list): functions that receive no arguments
+        max_concurrent_calls (int): how many functions can be running at the same time
+
+    Returns:
+        list: the results of the functions, in the same order
+    """
+    semaphore = asyncio.Semaphore(max_concurrent_calls)
+
+    async def run(function):
+        async with semaphore:
+            return await asyncio.to_thread(function)
+
+    return await asyncio.gather(*(run(function) for function in functions))
+
+
+def run_concurrently(functions, max_concurrent_calls):
+    """Runs blocking functions concurrently, and waits for all of them
+
+    Args:
+        functions (list): functions that receive no arguments
+        max_concurrent_calls (int): how many functions can be running at the same time
+
+    Returns:
+        list: the results of the functions, in the same order
+    """
+    if len(functions) <= 1 or max_concurrent_calls <= 1:
+        return [function() for function in functions]
+
+    return asyncio.run(run_asynchronously(functions, max_concurrent_calls))
+
+
+async def request_responses_asynchronously(
+    request_response_function, prompts, generation_profile=GenerationProfile.FREE_TEXT
+):
+    """Requests the responses to several independent prompts at the same time
+
+    Args:
+        request_response_function (function): the function that requests a response for a prompt
+        prompts (list[str]): the prompts that will be sent
+        generation_profile (GenerationProfile, optional): the kind of responses requested. Defaults to GenerationProfile.FREE_TEXT.
+
+    Returns:
+        list[str]: the responses, in the same order as the prompts
+    """
+    return await run_asynchronously(
+        [
+            lambda prompt=prompt: request_response_function(
+                prompt, generation_profile=generation_profile
+            )
+            for prompt in prompts
+        ],
+        get_max_concurrent_requests(request_response_function),
+    )
+
+
+def request_responses_concurrently(
+    request_response_function, prompts, generation_profile=GenerationProfile.FREE_TEXT
+):
+    """Requests the responses to several independent prompts at the same time, and waits for all of them
+
+    Args:
+        request_response_function (function): the function that requests a response for a prompt
+        prompts (list[str]): the prompts that will be sent
+        generation_profile (GenerationProfile, optional): the kind of responses requested. Defaults to GenerationProfile.FREE_TEXT.
+
+    Returns:
+        list[str]: the responses, in the same order as the prompts
+    """
+    return run_concurrently(
+        [
+            lambda prompt=prompt: request_response_function(
+                prompt, generation_profile=generation_profile
+            )
+            for prompt in prompts
+        ],
+        get_max_concurrent_requests(request_response_function),
+    )
@@ -0,0 +1,273 @@
+"""This module contains the BackendPool class, which spreads the requests among several servers of the same backend.
+
+"""
+import collections
+import threading
+
+from circuit_breaker import CircuitBreaker
+from defines import (
+    ADAPTIVE_TIMEOUT_MIN_SECONDS,
+    ADAPTIVE_TIMEOUT_MULTIPLIER,
+    HEDGING_PERCENTILE,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_WINDOW_SIZE,
+)
+
+
+def calculate_percentile(values, percentile):
+    """Calculates a percentile of the passed values, by the nearest-rank method
+
+    Args:
+        values (list[float]): the values, in any order
+        percentile (float): the percentile, from 0 to 100
+
+    Returns:
+        float: the value at the percentile, or None if there are no values
+    """
+    if not values:
+        return None
+
+    sorted_values = sorted(values)
+
+    rank = round(percentile / 100 * (len(sorted_values) - 1))
+
+    return sorted_values[rank]
+
+
+class BackendEndpoint:
+    """One server of a backend, with its outstanding requests, its recent latencies and its circuit breaker.
+    The latencies are kept apart per latency key, because a short rating takes a fraction of the time
+    of a long summary, and mixing them would time out or hedge the long requests.
+    """
+
+    def __init__(self, url, circuit_breaker, latency_window_size=LATENCY_WINDOW_SIZE):
+        self.url = url
+        self.circuit_breaker = circuit_breaker
+        self.outstanding_requests = 0
+        self.latencies = {}
+        self.hedged_requests = 0
+
+        self._latency_window_size = latency_window_size
+
+    def get_latencies(self, latency_key):
+        """Returns the recent latencies of the requests with the passed latency key
+
+        Args:
+            latency_key (Hashable): the kind of request, such as its maximum number of new tokens
+
+        Returns:
+            collections.deque: the latencies in seconds, oldest first
+        """
+        if latency_key not in self.latencies:
+            self.latencies[latency_key] = collections.deque(
+                maxlen=self._latency_window_size
+            )
+
+        return self.latencies[latency_key]
+
+
+class BackendPool:
+    """Spreads the requests among the servers of a backend, sending each one to the healthy server
+    with the fewest outstanding requests.
+
+    The pool learns the latencies of every server, per latency key, which tells apart the kinds of
+    request. Once a server has enough samples of a kind, a request of that kind that takes longer than
+    its HEDGING_PERCENTILE can get hedged: a duplicate goes to another server, and whichever answers
+    first wins. The latencies also shorten the read timeout of fast servers, as long as there's
+    another server to turn to.
+
+    The AI model client sends every request to oobabooga through a pool of all of its servers,
+    each one with its own circuit breaker.
+    """
+
+    def __init__(
+        self,
+        urls,
+        max_timeout_seconds,
+        create_circuit_breaker_function=CircuitBreaker,
+        min_samples=LATENCY_MIN_SAMPLES,
+    ):
+        self._max_timeout_seconds = max_timeout_seconds
+        self._min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._endpoints = [
+            BackendEndpoint(url, create_circuit_breaker_function()) for url in urls
+        ]
+
+    def get_number_of_endpoints(self):
+        """Returns how many servers the pool spreads the requests among
+
+        Returns:
+            int: the number of servers
+        """
+        return len(self._endpoints)
+
+    def acquire_endpoint(self, excluded_endpoint=None):
+        """Picks the healthy server with the fewest outstanding requests, and counts the request as outstanding.
+        Every acquired endpoint must be released through release_endpoint.
+
+        Args:
+            excluded_endpoint (BackendEndpoint, optional): a server that mustn't be picked. Defaults to None.
+
+        Returns:
+            BackendEndpoint: the server picked, or None if none is healthy
+        """
+        with self._lock:
+            candidates = sorted(
+                (
+                    endpoint
+                    for endpoint in self._endpoints
+                    if endpoint is not excluded_endpoint
+                ),
+                key=lambda endpoint: endpoint.outstanding_requests,
+            )
+
+            for endpoint in candidates:
+                # A server that asked to wait gets left alone until then.
+                if endpoint.circuit_breaker.get_retry_delay() > 0:
+                    continue
+
+                if endpoint.circuit_breaker.allow_request():
+                    endpoint.outstanding_requests += 1
+
+                    return endpoint
+
+        return None
+
+    def release_endpoint(
+        self, endpoint, latency_seconds=None, latency_key=None, retry_after=None
+    ):
+        """Counts the request of an endpoint as finished
+
+        Args:
+            endpoint (BackendEndpoint): the server the request was sent to
+            latency_seconds (float, optional): how long the server took to answer, or None if it failed. Defaults to None.
+            latency_key (Hashable, optional): the kind of request, such as its maximum number of new tokens. Defaults to None.
+            retry_after (float, optional): the seconds a failed server asked to wait before the next request. Defaults to None.
+        """
+        with self._lock:
+            endpoint.outstanding_requests -= 1
+
+            if latency_seconds is not None:
+                endpoint.get_latencies(latency_key).append(latency_seconds)
+
+        if latency_seconds is None:
+            endpoint.circuit_breaker.record_failure(retry_after)
+        else:
+            endpoint.circuit_breaker.record_success()
+
+    def get_retry_delay(self):
+        """Returns how long to wait until a server that asked to wait takes requests again
+
+        Returns:
+            float: the seconds left to wait, or 0.0 if any server takes requests right away
+        """
+        return min(
+            endpoint.circuit_breaker.get_retry_delay() for endpoint in self._endpoints
+        )
+
+    def record_hedged_request(self, endpoint):
+        """Counts that a request to the endpoint took so long it got hedged
+
+        Args:
+            endpoint (BackendEndpoint): the slow server
+        """
+        with self._lock:
+            endpoint.hedged_requests += 1
+
+    def get_latency_percentile(self, endpoint, percentile, latency_key=None):
+        """Returns a percentile of the recent latencies of a server
+
+        Args:
+            endpoint (BackendEndpoint): the server
+            percentile (float): the percentile, from 0 to 100
+            latency_key (Hashable, optional): the kind of request. Defaults to None.
+
+        Returns:
+            float: the latency in seconds, or None if the server doesn't have enough samples yet
+        """
+        with self._lock:
+            latencies = list(endpoint.latencies.get(latency_key, ()))
+
+        if len(latencies) < self._min_samples:
+            return None
+
+        return calculate_percentile(latencies, percentile)
+
+    def get_hedge_delay(self, endpoint, latency_key=None):
+        """Returns how long to wait for a server before hedging the request to another one
+
+        Args:
+            endpoint (BackendEndpoint): the server the request was sent to
+            latency_key (Hashable, optional): the kind of request. Defaults to None.
+
+        Returns:
+            float: the seconds to wait, or None if the request shouldn't get hedged
+        """
+        if len(self._endpoints) < 2:
+            return None
+
+        return self.get_latency_percentile(endpoint, HEDGING_PERCENTILE, latency_key)
+
+    def get_read_timeout(self, endpoint, latency_key=None):
+        """Returns how long to wait for a server to answer, based on how fast it usually is
+
+        Args:
+            endpoint (BackendEndpoint): the server the request is sent to
+            latency_key (Hashable, optional): the kind of request. Defaults to None.
+
+        Returns:
+            float: the read timeout in seconds
+        """
+        # Timing out a lone server early only fails requests that nobody else could answer.
+        if len(self._endpoints) < 2:
+            return self._max_timeout_seconds
+
+        slowest_latency = self.get_latency_percentile(endpoint, 100, latency_key)
+
+        if slowest_latency is None:
+            return self._max_timeout_seconds
+
+        return min(
+            self._max_timeout_seconds,
+            max(
+                ADAPTIVE_TIMEOUT_MIN_SECONDS,
+                slowest_latency * ADAPTIVE_TIMEOUT_MULTIPLIER,
+            ),
+        )
+
+    def get_failure_rate(self):
+        """Returns the share of the most recent requests that failed, averaged over the servers
+
+        Returns:
+            float: the failure rate, from 0.0 to 1.0
+        """
+        return sum(
+            endpoint.circuit_breaker.get_failure_rate() for endpoint in self._endpoints
+        ) / len(self._endpoints)
+
+    def get_metrics(self):
+        """Returns the load and the latencies of every server
+
+        Returns:
+            dict: for each server URL, its outstanding and hedged requests, and its p50 and p95 latencies
+        """
+        metrics = {}
+
+        for endpoint in self._endpoints:
+            with self._lock:
+                latencies = [
+                    latency
+                    for window in endpoint.latencies.values()
+                    for latency in window
+                ]
+
+                metrics[endpoint.url] = {
+                    "outstanding_requests": endpoint.outstanding_requests,
+                    "hedged_requests": endpoint.hedged_requests,
+                    "p50_latency_seconds": calculate_percentile(latencies, 50),
+                    "p95_latency_seconds": calculate_percentile(latencies, 95),
+                }
+
+        return metrics
@@ -0,0 +1,183 @@
+"""This module records where the requests to the AI model come from, and what each of them cost.
+
+"""
+import collections
+import contextvars
+import functools
+import json
+import os
+import threading
+
+UNKNOWN_CALL_SITE = "unknown"
+
+# The call site of the requests sent from the current context. It's a context variable instead of
+# a thread-local one so that it follows the requests into the asyncio worker threads.
+_CALL_SITE = contextvars.ContextVar("call_site", default=UNKNOWN_CALL_SITE)
+_CALL_STATISTICS = contextvars.ContextVar("call_statistics", default=None)
+
+
+def tag_call_site(func):
+    """Tags every request to the AI model sent while running 'func' with its module and name.
+    It should be the innermost decorator, so it sees the name of the actual function.
+    """
+    call_site = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _CALL_SITE.set(call_site)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _CALL_SITE.reset(token)
+
+    return wrapper
+
+
+def get_call_site():
+    """Returns the call site of the requests sent from the current context
+
+    Returns:
+        str: the module and the name of the function that sends the requests
+    """
+    return _CALL_SITE.get()
+
+
+def start_call_statistics():
+    """Starts collecting the statistics of a request in the current context
+
+    Returns:
+        tuple: the statistics, and the token needed to stop collecting them
+    """
+    call_statistics = {"cache_hit": False, "retries": 0}
+
+    return call_statistics, _CALL_STATISTICS.set(call_statistics)
+
+
+def stop_call_statistics(token):
+    """Stops collecting the statistics of a request in the current context
+
+    Args:
+        token (contextvars.Token): the token returned by start_call_statistics
+    """
+    _CALL_STATISTICS.reset(token)
+
+
+def record_cache_hit():
+    """Records that the current request got its response from the response cache."""
+    call_statistics = _CALL_STATISTICS.get()
+
+    if call_statistics is not None:
+        call_statistics["cache_hit"] = True
+
+
+def record_retry():
+    """Records that the current request had to be retried."""
+    call_statistics = _CALL_STATISTICS.get()
+
+    if call_statistics is not None:
+        call_statistics["retries"] += 1
+
+
+class CallRecorder:
+    """Accumulates a record per request to the AI model, and writes each one as a line of a JSONL
+    file if it has one. At the end of each step, the records of the step get summarized per call site.
+    """
+
+    def __init__(self, jsonl_filename=None):
+        self._jsonl_filename = jsonl_filename
+
+        self._lock = threading.Lock()
+        self._step = 0
+        self._step_records = []
+
+    def set_jsonl_filename(self, jsonl_filename):
+        """Sets the file the records get appended to
+
+        Args:
+            jsonl_filename (str): the path of the JSONL file, or None to stop writing them
+        """
+        with self._lock:
+            self._jsonl_filename = jsonl_filename
+
+    def record(self, call_record):
+        """Records a request to the AI model
+
+        Args:
+            call_record (dict): the call site, wall time, sizes, cache hit and retries of the request
+        """
+        with self._lock:
+            call_record = {"step": self._step, **call_record}
+
+            self._step_records.append(call_record)
+
+            if self._jsonl_filename is None:
+                return
+
+            directory = os.path.dirname(self._jsonl_filename)
+
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(self._jsonl_filename, "a", encoding="utf8") as file:
+                file.write(json.dumps(call_record, default=str))
+                file.write("\n")
+
+    def summarize_step(self):
+        """Summarizes the records of the current step per call site, and starts the next step
+
+        Returns:
+            list[dict]: one entry per call site, the ones that took the longest first
+        """
+        with self._lock:
+            step_records = self._step_records
+
+            self._step_records = []
+            self._step += 1
+
+        summaries = collections.defaultdict(
+            lambda: {
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "prompt_tokens": 0,
+                "completion_characters": 0,
+                "cache_hits": 0,
+                "retries": 0,
+            }
+        )
+
+        for call_record in step_records:
+            summary = summaries[call_record["call_site"]]
+
+            summary["calls"] += 1
+            summary["wall_seconds"] += call_record["wall_seconds"]
+            summary["prompt_tokens"] += call_record["prompt_tokens"]
+            summary["completion_characters"] += call_record["completion_characters"]
+            summary["cache_hits"] += call_record["cache_hit"]
+            summary["retries"] += call_record["retries"]
+
+        return sorted(
+            (
+                {"call_site": call_site, **summary}
+                for call_site, summary in summaries.items()
+            ),
+            key=lambda summary: summary["wall_seconds"],
+            reverse=True,
+        )
+
+
+def format_step_summary(step_summary):
+    """Formats the summary of a step in a human-readable form
+
+    Args:
+        step_summary (list[dict]): the summary returned by CallRecorder.summarize_step
+
+    Returns:
+        str: one line per call site
+    """
+    return "\n".join(
+        f"{summary['call_site']}: {summary['calls']} calls, {summary['wall_seconds']:.2f} s, "
+        f"{summary['prompt_tokens']} prompt tokens, {summary['completion_characters']} completion characters, "
+        f"{summary['cache_hits']} cache hits, {summary['retries']} retries"
+        for summary in step_summary
+    )
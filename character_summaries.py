@@ -1,5 +1,9 @@
+from async_requests import request_responses_concurrently
+from call_instrumentation import tag_call_site
 from defines import NUMBER_OF_RESULTS_FOR_QUERY
+from enums import GenerationProfile
 from logging_messages import log_debug_message
+from prompt_packing import pack_memories_into_prompt
 from memories_querying import (
     retrieve_description_from_scored_results_entry,
     search_memories,
@@ -8,10 +12,10 @@ from vector_storage import process_raw_data
 from wrappers import validate_agent_type
 
 
-def generate_summary_description_segment(
+def create_summary_description_segment_prompt(
     agent, current_timestamp, query, prompt, memories_raw_data, index
 ):
-    """Genererates a segment of a character summary
+    """Creates the prompt that asks the AI model for a segment of a character summary
 
     Args:
         agent (Agent): the agent to whom the summary description corresponds
@@ -19,10 +23,10 @@ def generate_summary_description_segment(
         query (str): the query that will be made to the agent's memories
         prompt_header (str): the header for the prompt
         memories_raw_data (dict): the raw data of the agent's memories
-        index (AnnoyIndex): the index of the Annoy library
+        index (MemoryIndex): the index of the agent's memory vectors
 
     Returns:
-        str: the response from the AI model
+        str: the prompt, followed by the descriptions of as many of the retrieved memories as fit
     """
     scored_results = search_memories(
         agent,
@@ -33,17 +37,23 @@ def generate_summary_description_segment(
         index,
     )
 
-    for _, vector_id in enumerate(scored_results):
-        prompt += "- " + retrieve_description_from_scored_results_entry(
-            vector_id, memories_raw_data
-        )
+    prompt = pack_memories_into_prompt(
+        agent.get_request_response_function(),
+        GenerationProfile.SUMMARY,
+        prompt,
+        [
+            retrieve_description_from_scored_results_entry(vector_id, memories_raw_data)
+            for vector_id in scored_results
+        ],
+    )
 
     log_debug_message(f"{prompt}")
 
-    return agent.get_request_response_function()(prompt)
+    return prompt
 
 
 @validate_agent_type
+@tag_call_site
 def request_character_summary(agent, current_timestamp, memories_raw_data, index):
     """Produces the agent's character summary through the AI model
 
@@ -51,7 +61,7 @@ def request_character_summary(agent, current_timestamp, memories_raw_data, index
         agent (Agent): the agent to whom the memories belong
         current_timestamp (datetime): the current timestamp
         memories_raw_data (dict): the raw data of the agent's memories
-        index (AnnoyIndex): the index of the Annoy database
+        index (MemoryIndex): the index of the agent's memory vectors
 
     Returns:
         str: the generated summary description for the agent involved
@@ -59,7 +69,7 @@ def request_character_summary(agent, current_timestamp, memories_raw_data, index
     # First of all we perform a retrieval on the query "[name]'s core characteristics"
     prompt = f"How would one describe {agent.name}'s core characteristics given the following statements? "
     prompt += f"Start the sentence by saying either '{agent.name} is' or '{agent.name} has':\n"
-    core_characteristics = generate_summary_description_segment(
+    core_characteristics_prompt = create_summary_description_segment_prompt(
         agent,
         current_timestamp,
         f"{agent.name}'s core characteristics",
@@ -71,7 +81,7 @@ def request_character_summary(agent, current_timestamp, memories_raw_data, index
     prompt = f"How would one describe {agent.name}'s current daily occupation given the following statements? "
     prompt += f"Start the sentence by saying either '{agent.name} is' or '{agent.name} has':\n"
 
-    current_daily_occupation = generate_summary_description_segment(
+    current_daily_occupation_prompt = create_summary_description_segment_prompt(
         agent,
         current_timestamp,
         f"{agent.name}'s current daily occupation",
@@ -83,7 +93,7 @@ def request_character_summary(agent, current_timestamp, memories_raw_data, index
     prompt = f"How would one describe {agent.name}'s feeling about his recent progress in life given the "
     prompt += f"following statements? Start the sentence by saying either '{agent.name} is' or '{agent.name} has':\n"
 
-    recent_progress_in_life = generate_summary_description_segment(
+    recent_progress_in_life_prompt = create_summary_description_segment_prompt(
         agent,
         current_timestamp,
         f"{agent.name}'s feeling about his recent progress in life",
@@ -92,7 +102,7 @@ def request_character_summary(agent, current_timestamp, memories_raw_data, index
         index,
     )
 
-    innate_traits = generate_summary_description_segment(
+    innate_traits_prompt = create_summary_description_segment_prompt(
         agent,
         current_timestamp,
         f"{agent.name}'s innate traits",
@@ -101,8 +111,22 @@ def request_character_summary(agent, current_timestamp, memories_raw_data, index
         index,
     )
 
-    # careful with these. Try to close index always when you're not using it.
-    index.unload()
+    # The segments don't depend on each other, so they get requested at the same time.
+    (
+        core_characteristics,
+        current_daily_occupation,
+        recent_progress_in_life,
+        innate_traits,
+    ) = request_responses_concurrently(
+        agent.get_request_response_function(),
+        [
+            core_characteristics_prompt,
+            current_daily_occupation_prompt,
+            recent_progress_in_life_prompt,
+            innate_traits_prompt,
+        ],
+        GenerationProfile.SUMMARY,
+    )
 
     summary_description = f"Name: {agent.name} (age: {agent.age})\n"
     summary_description += f"Innate traits: {innate_traits}\n"
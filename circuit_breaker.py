@@ -0,0 +1,137 @@
+"""This module contains the CircuitBreaker class, which stops sending requests to a backend that keeps failing.
+
+"""
+import collections
+import threading
+import time
+
+from defines import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RECOVERY_SECONDS,
+    CIRCUIT_BREAKER_WINDOW_SIZE,
+)
+from enums import CircuitState
+
+
+class CircuitBreaker:
+    """Tracks the outcomes of the requests sent to a backend.
+
+    While CLOSED, every request goes through. After 'failure_threshold' consecutive failures
+    the breaker becomes OPEN, and requests get rejected right away instead of waiting on a dead
+    server. Once 'recovery_seconds' have passed, the breaker becomes HALF_OPEN and lets a single
+    trial request through: if it succeeds the breaker closes, otherwise it opens again.
+
+    A backend that asks to wait, through a Retry-After, is busy rather than dead: the breaker keeps
+    letting requests through, but reports how long they should wait before being sent.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_seconds=CIRCUIT_BREAKER_RECOVERY_SECONDS,
+        window_size=CIRCUIT_BREAKER_WINDOW_SIZE,
+        clock_function=time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._recovery_seconds = recovery_seconds
+        self._clock_function = clock_function
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_until = 0.0
+        self._retry_at = 0.0
+        self._trial_in_flight = False
+
+        # The most recent outcomes, True for the failures, to calculate the failure rate.
+        self._outcomes = collections.deque(maxlen=window_size)
+
+    def get_state(self):
+        """Returns the state of the breaker
+
+        Returns:
+            CircuitState: the current state
+        """
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        """Determines whether a request can be sent to the backend right now
+
+        Returns:
+            bool: True if the request can be sent
+        """
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                if self._clock_function() < self._opened_until:
+                    return False
+
+                self._state = CircuitState.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == CircuitState.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+
+                self._trial_in_flight = True
+
+            return True
+
+    def record_success(self):
+        """Records that the backend answered a request."""
+        with self._lock:
+            self._outcomes.append(False)
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            self._state = CircuitState.CLOSED
+
+    def record_failure(self, retry_after=None):
+        """Records that the backend failed to answer a request
+
+        Args:
+            retry_after (float, optional): the seconds the backend asked to wait before the next request. Defaults to None.
+        """
+        with self._lock:
+            self._outcomes.append(True)
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+
+            recovery_seconds = self._recovery_seconds
+
+            # The backend told how long it needs, which beats any guess.
+            if retry_after is not None:
+                recovery_seconds = retry_after
+
+                self._retry_at = max(
+                    self._retry_at, self._clock_function() + retry_after
+                )
+
+            if (
+                self._state != CircuitState.HALF_OPEN
+                and self._consecutive_failures < self._failure_threshold
+            ):
+                return
+
+            self._state = CircuitState.OPEN
+            self._opened_until = self._clock_function() + recovery_seconds
+
+    def get_retry_delay(self):
+        """Returns how long the backend asked to wait before the next request
+
+        Returns:
+            float: the seconds left to wait, or 0.0 if requests can be sent right away
+        """
+        with self._lock:
+            return max(0.0, self._retry_at - self._clock_function())
+
+    def get_failure_rate(self):
+        """Returns the share of the most recent requests that failed
+
+        Returns:
+            float: the failure rate, from 0.0 to 1.0
+        """
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+
+            return sum(self._outcomes) / len(self._outcomes)
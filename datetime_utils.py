@@ -1,5 +1,7 @@
 import datetime
 
+EPOCH = datetime.datetime(1970, 1, 1)
+
 
 def substract_one_day_from_date(timestamp):
     return timestamp - datetime.timedelta(days=1)
@@ -16,3 +18,27 @@ def format_date(timestamp):
 
     # Combine them into the desired format
     return f"{weekday} {month} {day} of {year}, {hour} {period}"
+
+
+def convert_timestamp_to_epoch_seconds(timestamp):
+    """Converts a (naive) simulation timestamp into seconds since the epoch
+
+    Args:
+        timestamp (datetime): the timestamp that will be converted
+
+    Returns:
+        float: the seconds elapsed since the epoch
+    """
+    return (timestamp - EPOCH).total_seconds()
+
+
+def convert_epoch_seconds_to_timestamp(epoch_seconds):
+    """Converts seconds since the epoch back into a (naive) simulation timestamp
+
+    Args:
+        epoch_seconds (float): the seconds elapsed since the epoch
+
+    Returns:
+        datetime: the corresponding timestamp
+    """
+    return EPOCH + datetime.timedelta(seconds=float(epoch_seconds))
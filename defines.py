@@ -5,16 +5,28 @@ Returns:
 """
 from sentence_transformers import SentenceTransformer
 
-MODEL = SentenceTransformer("paraphrase-MiniLM-L6-v2")
+from enums import ActionMode, GenerationProfile, RatingMode, ResponseCacheMode
+
+MODEL_NAME = "paraphrase-MiniLM-L6-v2"
+MODEL = SentenceTransformer(MODEL_NAME)
 
 VECTOR_DIMENSIONS = 384
+ENCODING_BATCH_SIZE = 32
+USE_EMBEDDING_CACHE = True
+EMBEDDING_CACHE_FILENAME = "cache/embedding_cache.db"
+EMBEDDING_CACHE_MAX_ENTRIES = 100000
 NUMBER_OF_TREES = 10
+DELTA_BUFFER_MERGE_THRESHOLD = 64
+BRUTE_FORCE_SEARCH_MAX_ITEMS = 5000
 METRIC_ANGULAR = "angular"
 DECAY_RATE = 0.99
 NUMBER_OF_RESULTS_FOR_QUERY = 50
 SCORE_ALPHA = 1.0
 SCORE_BETA = 1.0
 SCORE_GAMMA = 1.0
+DEFAULT_RATING = 5
+RATING_MODE = RatingMode.SINGLE_TOKEN
+ACTION_MODE = ActionMode.COMBINED
 
 INSTRUCT_WIZARDLM_PROMPT_HEADER = ""
 INSTRUCT_WIZARDLM_PROMPT_ANSWER_OPENING = "\n### Response:"
@@ -29,6 +41,89 @@ INSTRUCT_GPT_PROMPT_ANSWER_OPENING = " Answer:"
 DEBUGGING = False
 USE_GPT = False
 
+API_KEY_FILENAME = "api_key.txt"
+GPT_API_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+GPT_MODEL = "gpt-3.5-turbo"
+# The most likely tokens whose log probabilities come along with a single-token rating.
+GPT_RATING_TOP_LOGPROBS = 20
+OOBABOOGA_API_ENDPOINT = "http://localhost:5000/api/v1/generate"
+# Every oobabooga server the requests get spread among.
+OOBABOOGA_API_ENDPOINTS = [OOBABOOGA_API_ENDPOINT]
+AI_MODEL_REQUEST_TIMEOUT = 25
+AI_MODEL_CONNECT_TIMEOUT = 3.05
+AI_MODEL_MAX_RETRIES = 3
+AI_MODEL_BACKOFF_BASE_SECONDS = 0.5
+AI_MODEL_BACKOFF_MAX_SECONDS = 8
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RECOVERY_SECONDS = 30
+CIRCUIT_BREAKER_WINDOW_SIZE = 50
+LATENCY_WINDOW_SIZE = 200
+LATENCY_MIN_SAMPLES = 20
+HEDGING_PERCENTILE = 95
+ADAPTIVE_TIMEOUT_MIN_SECONDS = 5
+ADAPTIVE_TIMEOUT_MULTIPLIER = 4
+AI_MODEL_CONNECTION_POOL_SIZE = 8
+RESPONSE_CACHE_MODE = ResponseCacheMode.PASSTHROUGH
+RESPONSE_CACHE_FILENAME = "cache/response_cache.db"
+RESPONSE_CACHE_MAX_ENTRIES = 100000
+GPT_MAX_CONCURRENT_REQUESTS = 8
+OOBABOOGA_MAX_CONCURRENT_REQUESTS = 4
+# Rate limits shared by every client of each backend in the process; None means unlimited.
+GPT_REQUESTS_PER_MINUTE = 3500
+GPT_TOKENS_PER_MINUTE = 90000
+OOBABOOGA_REQUESTS_PER_MINUTE = None
+OOBABOOGA_TOKENS_PER_MINUTE = None
+OOBABOOGA_MAX_NEW_TOKENS = 2000
+CHARACTERS_PER_TOKEN = 4
+# The context windows of the backends, counting both the prompt and the response.
+OOBABOOGA_CONTEXT_TOKENS = 2048
+GPT_CONTEXT_TOKENS = 4096
+# Kept free in every prompt, because the tokens are only estimated.
+PROMPT_TOKEN_BUDGET_MARGIN = 32
+# The share of words two lines must have in common to count as duplicates in a prompt.
+PROMPT_PACKING_DUPLICATE_SIMILARITY = 0.9
+
+# A batch rating answers with one '<number>. <rating>' line per candidate.
+BATCH_RATING_TOKENS_PER_CANDIDATE = 6
+BATCH_RATING_MAX_CANDIDATES = 40
+
+# A max_new_tokens or a temperature of None leaves the backend's default in place.
+GENERATION_PROFILES = {
+    GenerationProfile.RATING: {
+        "max_new_tokens": 8,
+        "stopping_strings": ["\n"],
+        "temperature": 0.2,
+    },
+    GenerationProfile.YES_NO: {
+        "max_new_tokens": 6,
+        "stopping_strings": ["\n", ".", ","],
+        "temperature": 0.2,
+    },
+    GenerationProfile.SHORT_SENTENCE: {
+        "max_new_tokens": 64,
+        "stopping_strings": ["\n"],
+        "temperature": None,
+    },
+    GenerationProfile.SUMMARY: {
+        "max_new_tokens": 300,
+        "stopping_strings": [],
+        "temperature": None,
+    },
+    GenerationProfile.FREE_TEXT: {
+        "max_new_tokens": None,
+        "stopping_strings": [],
+        "temperature": None,
+    },
+    # No stopping strings, because the ratings come one per line.
+    GenerationProfile.BATCH_RATING: {
+        "max_new_tokens": BATCH_RATING_TOKENS_PER_CANDIDATE
+        * BATCH_RATING_MAX_CANDIDATES,
+        "stopping_strings": [],
+        "temperature": 0.2,
+    },
+}
+
 
 def get_seed_memories_filename(agent):
     """Returns the standarized filename for the seed_memories text file.
@@ -54,8 +149,20 @@ def get_database_filename(agent):
     return f"agents/{agent.name.lower()}/memory_stream.ann"
 
 
+def get_delta_database_filename(agent):
+    """Returns the full path of the file that stores the vectors not yet merged into the vector database.
+
+    Args:
+        agent (Agent): the agent to whom the memories belong.
+
+    Returns:
+        str: the full path of the delta buffer of the vector database.
+    """
+    return f"agents/{agent.name.lower()}/memory_stream_delta.npy"
+
+
 def get_json_filename(agent):
-    """Returns the full path of the json file that contains or will contain an agent's memories.
+    """Returns the full path of the legacy json file that contained an agent's memories.
 
     Args:
         agent (Agent): the agent to whom the memories belong.
@@ -64,3 +171,15 @@ def get_json_filename(agent):
         str: the full path of the json file that contains the agent's memories.
     """
     return f"agents/{agent.name.lower()}/memory_stream.json"
+
+
+def get_memory_stream_directory(agent):
+    """Returns the full path of the directory that contains the columns of an agent's memory stream.
+
+    Args:
+        agent (Agent): the agent to whom the memories belong.
+
+    Returns:
+        str: the full path of the directory of the agent's memory stream.
+    """
+    return f"agents/{agent.name.lower()}/memory_stream"
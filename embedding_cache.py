@@ -0,0 +1,153 @@
+"""This module contains the EmbeddingCache class, a persistent cache of text embeddings.
+
+"""
+import atexit
+import hashlib
+
+import numpy as np
+
+from defines import (
+    EMBEDDING_CACHE_FILENAME,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    MODEL_NAME,
+)
+from sqlite_lru_store import SqliteLruStore
+
+
+def _encode_vector(vector):
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _decode_vector(blob):
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """An on-disk cache of embeddings, keyed by a hash of the model name plus the encoded text.
+    Vectors are stored as float32 blobs, and once the cache holds more than 'max_entries'
+    vectors, the least recently used ones get evicted.
+    """
+
+    def __init__(self, filename, model_name, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self._model_name = model_name
+
+        self._store = SqliteLruStore(
+            filename,
+            "embeddings",
+            "vector",
+            "BLOB",
+            max_entries,
+            _encode_vector,
+            _decode_vector,
+        )
+
+    def _create_key(self, text):
+        return hashlib.sha256(f"{self._model_name}\0{text}".encode("utf8")).hexdigest()
+
+    def get(self, text):
+        """Returns the cached embedding of a text, if any
+
+        Args:
+            text (str): the text whose embedding will be retrieved
+
+        Returns:
+            ndarray: the cached float32 embedding, or None if it wasn't cached
+        """
+        return self.get_many([text])[0]
+
+    def get_many(self, texts):
+        """Returns the cached embeddings of several texts, all looked up at once
+
+        Args:
+            texts (list[str]): the texts whose embeddings will be retrieved
+
+        Returns:
+            list: the cached float32 embeddings, in the same order, with None for the texts that weren't cached
+        """
+        return self._store.get_many([self._create_key(text) for text in texts])
+
+    def put_many(self, texts, vectors):
+        """Stores the embeddings of several texts, evicting the least recently used entries if necessary
+
+        Args:
+            texts (list[str]): the texts that were encoded
+            vectors (list): the embeddings of the texts, in the same order
+        """
+        self._store.put_many(
+            [(self._create_key(text), vector) for text, vector in zip(texts, vectors)]
+        )
+
+    def get_or_encode(self, texts, encode_function):
+        """Returns the embeddings of the passed texts. Only the texts that aren't cached
+        get encoded, all of them through a single call to 'encode_function'.
+
+        Args:
+            texts (list[str]): the texts whose embeddings are needed
+            encode_function (function): the function that encodes a list of texts into a list of vectors
+
+        Returns:
+            list: the embeddings of the texts, in the same order
+        """
+        vectors = self.get_many(texts)
+
+        # The same text could appear more than once in a single request.
+        missing_texts = list(
+            dict.fromkeys(
+                text for text, vector in zip(texts, vectors) if vector is None
+            )
+        )
+
+        if missing_texts:
+            encoded_vectors = [
+                np.asarray(vector, dtype=np.float32)
+                for vector in encode_function(missing_texts)
+            ]
+
+            self.put_many(missing_texts, encoded_vectors)
+
+            encoded_by_text = dict(zip(missing_texts, encoded_vectors))
+
+            vectors = [
+                vector if vector is not None else encoded_by_text[text]
+                for text, vector in zip(texts, vectors)
+            ]
+
+        return vectors
+
+    def __len__(self):
+        return len(self._store)
+
+    def flush(self):
+        """Writes the accesses that the lookups have made since the last write, so the
+        eviction order survives the process."""
+        self._store.flush()
+
+    def close(self):
+        """Closes the connection to the cache file."""
+        self._store.close()
+
+
+_EMBEDDING_CACHE = None
+
+
+def get_embedding_cache():
+    """Returns the embedding cache shared by the whole library, creating it the first time
+
+    Returns:
+        EmbeddingCache: the shared embedding cache
+    """
+    global _EMBEDDING_CACHE  # pylint: disable=global-statement
+
+    if _EMBEDDING_CACHE is None:
+        _EMBEDDING_CACHE = EmbeddingCache(EMBEDDING_CACHE_FILENAME, MODEL_NAME)
+
+        # Nothing else owns the shared cache, so its pending accesses get written on exit.
+        atexit.register(_EMBEDDING_CACHE.close)
+
+    return _EMBEDDING_CACHE
+
+
+def flush_embedding_cache():
+    """Writes the accesses pending in the shared embedding cache, if the cache has been created."""
+    if _EMBEDDING_CACHE is not None:
+        _EMBEDDING_CACHE.flush()
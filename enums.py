@@ -76,3 +76,55 @@ class UpdateType(Enum):
     AGENT_CHANGED_PLANNED_ACTION = 11
     AGENT_CONTINUES_USING_OBJECT = 12
     AGENT_CHANGED_OBSERVATION = 13
+
+
+class RatingMode(Enum):
+    """How the candidate nodes get rated when choosing among them"""
+
+    INDIVIDUAL = 1
+    BATCH = 2
+    # Individually, through a single token whose log probabilities give the rating, wherever
+    # the backend allows it.
+    SINGLE_TOKEN = 3
+
+
+class GenerationProfile(Enum):
+    """The kinds of responses requested from the AI model, each with its own generation settings"""
+
+    RATING = 1
+    YES_NO = 2
+    SHORT_SENTENCE = 3
+    SUMMARY = 4
+    FREE_TEXT = 5
+    BATCH_RATING = 6
+
+
+class CircuitState(Enum):
+    """The states of the circuit breaker that guards an AI model backend"""
+
+    CLOSED = 1
+    OPEN = 2
+    HALF_OPEN = 3
+
+
+class RequestPriority(Enum):
+    """How urgently a request to the AI model should be scheduled. Lower values go first."""
+
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class ResponseCacheMode(Enum):
+    """How the AI model client uses the response cache"""
+
+    PASSTHROUGH = 1
+    RECORD = 2
+    REPLAY = 3
+
+
+class ActionMode(Enum):
+    """How an agent's next action and its duration get requested from the AI model"""
+
+    SEPARATE = 1
+    COMBINED = 2
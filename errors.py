@@ -38,6 +38,10 @@ class UnableToConnectWithAiModelError(Exception):
     pass
 
 
+class ResponseNotCachedError(Exception):
+    pass
+
+
 class AlgorithmError(Exception):
     pass
 
@@ -0,0 +1,39 @@
+import argparse
+import os
+
+from memory_stream_columns import migrate_json_memory_stream
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrates the agents' memory_stream.json files into the columnar memory stream format"
+    )
+    parser.add_argument(
+        "--remove-json",
+        action="store_true",
+        help="Removes each memory_stream.json file once it has been migrated",
+    )
+
+    args = parser.parse_args()
+
+    for agent_directory in sorted(os.listdir("agents")):
+        json_filename = f"agents/{agent_directory}/memory_stream.json"
+        memory_stream_directory = f"agents/{agent_directory}/memory_stream"
+
+        if not os.path.isfile(json_filename):
+            continue
+
+        memory_stream_columns = migrate_json_memory_stream(
+            json_filename, memory_stream_directory
+        )
+
+        print(
+            f"Migrated {len(memory_stream_columns)} memories of '{agent_directory}' into '{memory_stream_directory}'."
+        )
+
+        if args.remove_json:
+            os.remove(json_filename)
+
+
+if __name__ == "__main__":
+    main()
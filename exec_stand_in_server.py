@@ -0,0 +1,65 @@
+import argparse
+
+from stand_in_server import CHAT_COMPLETIONS_PATH, StandInServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs a stand-in for the AI model servers, to load test the simulation without a GPU"
+    )
+    parser.add_argument("--host", default="localhost", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=5000, help="Port to listen on")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.5,
+        help="Seconds that every response takes to generate",
+    )
+    parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=0.0,
+        help="Up to how many extra seconds a response may take, chosen at random",
+    )
+    parser.add_argument(
+        "--max-concurrent-requests",
+        type=int,
+        default=None,
+        help="How many responses can be generated at the same time; the rest wait for their turn",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of the requests, from 0.0 to 1.0, that fail with a 503",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed of the canned responses"
+    )
+
+    args = parser.parse_args()
+
+    server = StandInServer(
+        (args.host, args.port),
+        latency_seconds=args.latency,
+        latency_jitter_seconds=args.latency_jitter,
+        max_concurrent_requests=args.max_concurrent_requests,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    print(f"oobabooga endpoint: {server.get_url()}")
+    print(f"Chat completions endpoint: {server.get_url(CHAT_COMPLETIONS_PATH)}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        print(server.get_statistics())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import argparse
+import time
 
+from api_requests import AiModelClient
+from call_instrumentation import format_step_summary
 from simulation import Simulation
 
 
@@ -8,6 +11,16 @@ def main():
         description="Executes a step of a particular simulation"
     )
     parser.add_argument("simulation_name", help="Name of the simulation that will run")
+    parser.add_argument(
+        "--steps", type=int, default=1, help="How many steps will be executed"
+    )
+    parser.add_argument(
+        "--oobabooga-api-endpoint",
+        action="append",
+        default=None,
+        help="Sends the requests to this endpoint instead, for example the one of exec_stand_in_server.py. "
+        "Repeat it to spread the requests among several servers",
+    )
 
     args = parser.parse_args()
 
@@ -17,9 +30,27 @@ def main():
 
     test_simulation = Simulation(args.simulation_name)
 
+    if args.oobabooga_api_endpoint is not None:
+        test_simulation.set_ai_model_client(
+            AiModelClient(
+                use_gpt=False, oobabooga_api_endpoints=args.oobabooga_api_endpoint
+            )
+        )
+
+    start = time.perf_counter()
+
     test_simulation.initialize()
 
-    test_simulation.step()
+    print(f"Initialization took {time.perf_counter() - start:.2f} seconds")
+    print(format_step_summary(test_simulation.get_ai_model_call_summary()))
+
+    for step in range(args.steps):
+        start = time.perf_counter()
+
+        test_simulation.step()
+
+        print(f"Step {step + 1} took {time.perf_counter() - start:.2f} seconds")
+        print(format_step_summary(test_simulation.get_ai_model_call_summary()))
 
 
 if __name__ == "__main__":
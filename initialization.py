@@ -2,6 +2,7 @@ import datetime
 from action_statuses import produce_action_statuses_for_agent_based_on_destination_node
 from actions import (
     create_action,
+    request_action_and_its_duration,
     request_for_what_length_of_time_the_action_should_take_place,
     request_what_action_to_take_now,
 )
@@ -30,19 +31,19 @@ def set_initial_state_of_agent(
     create_database_of_memories_from_seed_memories(agent, current_timestamp)
 
     # Load the memories to create the character summary of the agent.
-    index, memories_raw_data = load_agent_memories(agent)
+    memory_stream = load_agent_memories(agent)
 
     # set the character summary of the agent as long as it is None
     if not agent.has_character_summary():
         agent.set_character_summary(
             request_character_summary_function(
-                agent, current_timestamp, memories_raw_data, index
+                agent,
+                current_timestamp,
+                memory_stream.get_memories(),
+                memory_stream.get_index(),
             )
         )
 
-    # be always careful to unload index when not using it
-    index.unload()
-
     produce_action_statuses_for_agent_and_sandbox_object_function(
         agent,
         current_timestamp,
@@ -51,4 +52,5 @@ def set_initial_state_of_agent(
         produce_action_statuses_for_agent_based_on_destination_node,
         request_what_action_to_take_now,
         request_for_what_length_of_time_the_action_should_take_place,
+        request_action_and_its_duration,
     )
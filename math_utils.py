@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 from defines import SCORE_ALPHA, SCORE_BETA, SCORE_GAMMA
 
 
@@ -12,6 +14,24 @@ def calculate_recency(current_timestamp, access_timestamp, decay_rate):
     return recency
 
 
+def calculate_recencies(current_epoch_seconds, access_epoch_seconds, decay_rate):
+    """Calculates the recency of many memories at once
+
+    Args:
+        current_epoch_seconds (float): the current timestamp, as seconds since the epoch
+        access_epoch_seconds (ndarray): the most recent access timestamp of each memory, as seconds since the epoch
+        decay_rate (float): the decay rate of the recency
+
+    Returns:
+        ndarray: the recency of each memory
+    """
+    time_differences_in_seconds = current_epoch_seconds - np.asarray(
+        access_epoch_seconds, dtype=np.float64
+    )
+
+    return np.exp(-decay_rate * time_differences_in_seconds)
+
+
 def normalize_value(value):
     return (value - 1) / 9
 
@@ -25,3 +45,31 @@ def calculate_score(
     gamma=SCORE_GAMMA,
 ):
     return alpha * relevance + beta * recency + gamma * importance
+
+
+def calculate_scores(
+    relevances,
+    recencies,
+    importances,
+    alpha=SCORE_ALPHA,
+    beta=SCORE_BETA,
+    gamma=SCORE_GAMMA,
+):
+    """Calculates the score of many memories at once
+
+    Args:
+        relevances (ndarray): the relevance of each memory
+        recencies (ndarray): the recency of each memory
+        importances (ndarray): the importance of each memory
+
+    Returns:
+        ndarray: the score of each memory
+    """
+    return calculate_score(
+        np.asarray(relevances, dtype=np.float64),
+        np.asarray(recencies, dtype=np.float64),
+        np.asarray(importances, dtype=np.float64),
+        alpha,
+        beta,
+        gamma,
+    )
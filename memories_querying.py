@@ -1,7 +1,9 @@
-import heapq
-from defines import DECAY_RATE, get_json_filename
-from math_utils import calculate_recency, calculate_score
-from vector_storage import create_json_file, load_contents_of_json_file
+from defines import DECAY_RATE
+from math_utils import calculate_scores
+from memory_index import (
+    convert_cosine_similarities_to_angular_distances,
+    select_top_k_smallest,
+)
 from wrappers import validate_agent_type
 
 
@@ -18,77 +20,110 @@ def retrieve_description_from_scored_results_entry(vector_id, memories_raw_data)
     return f"{memories_raw_data[str(vector_id[0])]['description']}\n"
 
 
+def score_memories(
+    current_timestamp, query_vector, number_of_results, memories_raw_data, index
+):
+    """Scores every memory of an agent through its relevance to the query vector,
+    its recency and its importance, and returns the highest scoring ones.
+
+    Args:
+        current_timestamp (datetime): the current timestamp, from which the recency gets calculated
+        query_vector (List[Tensor] | ndarray | Tensor): the query vector that will be used for the search
+        number_of_results (int): how many results must be retrieved
+        memories_raw_data (MemoryStreamColumns): the columns of the agent's memories
+        index (MemoryIndex): the index of the agent's memory vectors
+
+    Returns:
+        list: tuples of (vector id, score), sorted by score in descending order
+    """
+    # The relevance is computed for the whole stream, however large, so that a very important or
+    # recent memory gets considered even if it isn't among the nearest neighbors of the query.
+    # The Annoy index only serves the searches by relevance alone, through get_nns_by_vector.
+    relevances = 1 - convert_cosine_similarities_to_angular_distances(
+        index.calculate_cosine_similarities(query_vector)
+    )
+
+    # Recency decays as the simulation advances, so it gets calculated from the access timestamps now.
+    scores = calculate_scores(
+        relevances,
+        memories_raw_data.calculate_recencies(current_timestamp, DECAY_RATE),
+        memories_raw_data.importance,
+    )
+
+    top_ids = select_top_k_smallest(-scores, number_of_results)
+
+    return [(int(idx), float(scores[idx])) for idx in top_ids]
+
+
 @validate_agent_type
 def search_memories(
     agent, current_timestamp, query_vector, number_of_results, memories_raw_data, index
 ):
-    """Searches the memories of an agent for the most relevant entries related to the query vector.
+    """Searches the memories of an agent for the highest scoring entries related to the query vector.
 
     Args:
         agent (Agent): the agent to whom the memories belong
         current_timestamp (datetime): the current timestamp
         query_vector (List[Tensor] | ndarray | Tensor): the query vector that will be used for the search
         number_of_results (int): how many results must be retrieved from the vector database
-        memories_raw_data (dict): the raw data of the agent's memories
-        index (AnnoyIndex): the index of the Annoy vector database
+        memories_raw_data (MemoryStreamColumns): the columns of the agent's memories
+        index (MemoryIndex): the index of the agent's memory vectors
 
     Returns:
         list: the sorted results of the query
     """
-    # Get nearest neighbors from the Annoy index
-    nearest_neighbors = index.get_nns_by_vector(
-        query_vector, number_of_results, include_distances=True
+    sorted_results = score_memories(
+        current_timestamp, query_vector, number_of_results, memories_raw_data, index
     )
 
-    memories_raw_data = update_most_recent_access_timestamps(
+    # The retrieved memories count as accessed from now on.
+    update_most_recent_access_timestamps(
         agent,
-        nearest_neighbors,
+        ([idx for idx, _ in sorted_results], [score for _, score in sorted_results]),
         current_timestamp,
-        load_contents_of_json_file,
-        create_json_file,
+        memories_raw_data,
     )
 
-    # Calculate the custom scores
-    scores = []
-    for idx, distance in zip(nearest_neighbors[0], nearest_neighbors[1]):
-        relevance = 1 - distance
-        recency = memories_raw_data[str(idx)]["recency"]
-        importance = memories_raw_data[str(idx)]["importance"]
-        score = calculate_score(relevance, recency, importance)
-        scores.append((idx, score))
-
-    # Sort the results by the custom scores in descending order
-    sorted_results = sorted(scores, key=lambda x: x[1], reverse=True)
-
     return sorted_results
 
 
 def get_most_recent_memories(target_timestamp, number_of_memories, memories_raw_data):
     """Retrieves a number of most recent experiences present in the passed
-    dict of memories, given the target_timestamp (usually the current time)
+    memories, given the target_timestamp (usually the current time)
+
+    Args:
+        target_timestamp (datetime): the timestamp around which the memories will be retrieved
+        number_of_memories (int): how many memories should be retrieved at most
+        memories_raw_data (MemoryStreamColumns): the columns of the agent's memories
 
     Returns:
-        dict
-            A dictionary with a number of memories at the most determined by 'number_of_memories'.
+        list: the memories created closest to the target timestamp, closest first
     """
-    # Initialize a heap queue to store the difference and entry
-    closest_entries = []
+    return [
+        memories_raw_data[str(vector_id)]
+        for vector_id in memories_raw_data.get_vector_ids_closest_to_timestamp(
+            target_timestamp, number_of_memories
+        )
+    ]
 
-    # Iterate over the dictionary
-    for key, entry in memories_raw_data.items():
-        # Calculate the absolute difference between the entry's timestamp and the target datetime
-        difference = abs(entry["creation_timestamp"] - target_timestamp)
 
-        # Push the difference and entry onto the heap queue
-        heapq.heappush(closest_entries, (difference, key))
+def get_memories_in_time_window(start_timestamp, end_timestamp, memories_raw_data):
+    """Retrieves the memories created within a time window, such as the last two hours
 
-    closest_entries = [
-        (difference, memories_raw_data[key])
-        for difference, key in heapq.nsmallest(number_of_memories, closest_entries)
-    ]
+    Args:
+        start_timestamp (datetime): the beginning of the time window
+        end_timestamp (datetime): the end of the time window
+        memories_raw_data (MemoryStreamColumns): the columns of the agent's memories
 
-    # Extract the entries from the tuples and return them
-    return [entry for _, entry in closest_entries]
+    Returns:
+        list: the memories created within the time window, oldest first
+    """
+    return [
+        memories_raw_data[str(vector_id)]
+        for vector_id in memories_raw_data.get_vector_ids_in_time_window(
+            start_timestamp, end_timestamp
+        )
+    ]
 
 
 @validate_agent_type
@@ -96,39 +131,25 @@ def update_most_recent_access_timestamps(
     agent,
     query_results,
     current_timestamp,
-    load_contents_of_json_file_function,
-    create_json_file_function,
+    memories_raw_data,
 ):
     """Updates the most recent access timestamps of query results.
+    Nothing gets written to disk: the columns change in memory, and the agent's
+    memory stream writes them the next time it gets checkpointed.
 
     Args:
         agent (Agent): the agent to whom the memories belong.
-        query_results (list): the query results from the vector database. They come in tuples of (idx, distance)
+        query_results (list): the query results. They come in tuples of (ids, scores)
         current_timestamp (datetime): the current date time when the query was made
-        load_contents_of_json_file_function (function): the function responsible for loading the contents of a json file
-        create_json_file_function (function): the function responsible for saving to a file the memories
+        memories_raw_data (MemoryStreamColumns): the columns of the agent's memories, which get updated in memory
 
     Returns:
-        dict: the memories in raw data format, with updated 'most_recent_access_timestamp' and 'recency' values
+        MemoryStreamColumns: the agent's memories, with updated 'most_recent_access_timestamp' values
     """
+    # The recency of each entry follows from its 'most_recent_access_timestamp'.
+    memories_raw_data.update_access_timestamps(query_results[0], current_timestamp)
 
-    json_filename = get_json_filename(agent)
-
-    # should load the contents of the json database.
-    memories_raw_data = load_contents_of_json_file_function(json_filename)
-
-    # Update the 'most_recent_access_timestamp' as well as the 'recency' values of each entry
-    for idx, _ in zip(query_results[0], query_results[1]):
-        # locate in memories_raw_data which are those records
-
-        memories_raw_data[str(idx)]["recency"] = calculate_recency(
-            current_timestamp, current_timestamp, DECAY_RATE
-        )
-        memories_raw_data[str(idx)][
-            "most_recent_access_timestamp"
-        ] = current_timestamp.isoformat()
-
-    # save the memories into the json database
-    create_json_file_function(json_filename, memories_raw_data)
+    if agent.has_memory_stream():
+        agent.get_memory_stream().mark_accesses_as_unsaved()
 
     return memories_raw_data
@@ -0,0 +1,379 @@
+"""This module contains the MemoryIndex class, an append-friendly index of memory vectors.
+
+"""
+import os
+
+import numpy as np
+from annoy import AnnoyIndex
+
+from defines import (
+    BRUTE_FORCE_SEARCH_MAX_ITEMS,
+    DELTA_BUFFER_MERGE_THRESHOLD,
+    NUMBER_OF_TREES,
+    VECTOR_DIMENSIONS,
+)
+from errors import (
+    AlgorithmError,
+    DatabaseDoesntExistError,
+    UnableToSaveVectorDatabaseError,
+)
+
+
+def calculate_angular_distances(vectors, query_vector):
+    """Calculates the angular distances between a set of vectors and a query vector,
+    using the same formula as the 'annoy' library: sqrt(2 - 2 * cos(u, v))
+
+    Args:
+        vectors (ndarray): a two-dimensional array with one vector per row
+        query_vector (List[Tensor] | ndarray | Tensor): the vector to compare against
+
+    Returns:
+        ndarray: the angular distance between each vector and the query vector
+    """
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+
+    cosines = np.divide(
+        vectors @ query_vector,
+        norms,
+        out=np.zeros(len(vectors), dtype=np.float32),
+        where=norms > 0,
+    )
+
+    return convert_cosine_similarities_to_angular_distances(cosines)
+
+
+def convert_cosine_similarities_to_angular_distances(cosines):
+    """Converts cosine similarities into the angular distances reported by the 'annoy' library
+
+    Args:
+        cosines (ndarray): the cosine similarities
+
+    Returns:
+        ndarray: the angular distances, sqrt(2 - 2 * cos(u, v))
+    """
+    return np.sqrt(np.maximum(2.0 - 2.0 * cosines, 0.0))
+
+
+def normalize_vectors(vectors):
+    """Scales each row of the passed array to unit length. Rows full of zeroes are left as they are.
+
+    Args:
+        vectors (ndarray): a two-dimensional array with one vector per row
+
+    Returns:
+        ndarray: a contiguous float32 array with the normalized vectors
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return np.ascontiguousarray(
+        np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    )
+
+
+def select_top_k_smallest(values, number_of_results):
+    """Returns the positions of the 'number_of_results' smallest values, sorted in ascending order
+
+    Args:
+        values (ndarray): the values that will be ranked
+        number_of_results (int): how many positions should be returned at most
+
+    Returns:
+        ndarray: the positions of the smallest values
+    """
+    number_of_results = min(number_of_results, len(values))
+
+    if number_of_results <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # argpartition only places the k smallest values first; they still need sorting among themselves.
+    candidates = np.argpartition(values, number_of_results - 1)[:number_of_results]
+
+    return candidates[np.argsort(values[candidates], kind="stable")]
+
+
+class MemoryIndex:
+    """An index of memory vectors made of a frozen Annoy index, plus a small delta buffer
+    of the vectors added since the Annoy index was last built. The delta buffer is searched
+    exactly, and it only gets merged into a rebuilt Annoy index once it surpasses
+    DELTA_BUFFER_MERGE_THRESHOLD vectors.
+
+    While the index holds no more than 'brute_force_search_max_items' vectors, searches skip
+    Annoy altogether: a single matrix-vector product over all the normalized vectors is both
+    faster and exact at those sizes.
+    """
+
+    def __init__(
+        self,
+        metric,
+        frozen_index=None,
+        delta_vectors=None,
+        brute_force_search_max_items=BRUTE_FORCE_SEARCH_MAX_ITEMS,
+    ):
+        self._metric = metric
+        self._brute_force_search_max_items = brute_force_search_max_items
+
+        # Contiguous matrix of all the normalized vectors, built the first time it's needed.
+        self._normalized_vectors = None
+
+        self._frozen_index = (
+            frozen_index
+            if frozen_index is not None
+            else AnnoyIndex(VECTOR_DIMENSIONS, metric)
+        )
+
+        self._delta_vectors = (
+            [np.asarray(vector, dtype=np.float32) for vector in delta_vectors]
+            if delta_vectors is not None
+            else []
+        )
+
+    def get_n_items(self):
+        """Returns the number of vectors in the index, counting both the frozen index and the delta buffer
+
+        Returns:
+            int: the number of vectors in the index
+        """
+        return self._frozen_index.get_n_items() + len(self._delta_vectors)
+
+    def get_number_of_delta_items(self):
+        """Returns the number of vectors that haven't been merged into the frozen index yet
+
+        Returns:
+            int: the number of vectors in the delta buffer
+        """
+        return len(self._delta_vectors)
+
+    def add_item(self, vector_id, vector):
+        """Appends a vector to the delta buffer
+
+        Args:
+            vector_id (int): the id of the vector. Must be the next available id.
+            vector (List[Tensor] | ndarray | Tensor): the vector that will be appended
+
+        Raises:
+            AlgorithmError: if the vector id passed isn't the next available one
+        """
+        if vector_id != self.get_n_items():
+            raise AlgorithmError(
+                f"The function {self.add_item.__name__} expected the vector id {self.get_n_items()}, but it received {vector_id}."
+            )
+
+        self._delta_vectors.append(np.asarray(vector, dtype=np.float32))
+
+        if self._normalized_vectors is not None:
+            self._normalized_vectors = np.concatenate(
+                (self._normalized_vectors, normalize_vectors([vector]))
+            )
+
+    def get_normalized_vectors(self):
+        """Returns all the vectors of the index, normalized, as a single contiguous float32 matrix
+
+        Returns:
+            ndarray: a matrix with one normalized vector per row, ordered by vector id
+        """
+        if self._normalized_vectors is None:
+            self._normalized_vectors = (
+                normalize_vectors(
+                    [self.get_item_vector(i) for i in range(self.get_n_items())]
+                )
+                if self.get_n_items() > 0
+                else np.zeros((0, VECTOR_DIMENSIONS), dtype=np.float32)
+            )
+
+        return self._normalized_vectors
+
+    def calculate_cosine_similarities(self, query_vector):
+        """Calculates the cosine similarity between the query vector and every vector of the index at once
+
+        Args:
+            query_vector (List[Tensor] | ndarray | Tensor): the query vector
+
+        Returns:
+            ndarray: the cosine similarity of each vector, ordered by vector id
+        """
+        return self.get_normalized_vectors() @ normalize_vectors([query_vector])[0]
+
+    def is_brute_force_search_preferable(self):
+        """Returns whether or not the index is small enough for exact searches to beat Annoy
+
+        Returns:
+            bool: whether searches should be done through brute force
+        """
+        return self.get_n_items() <= self._brute_force_search_max_items
+
+    def get_item_vector(self, vector_id):
+        """Returns the vector stored under the passed id
+
+        Args:
+            vector_id (int): the id of the vector
+
+        Returns:
+            list: the stored vector
+        """
+        number_of_frozen_items = self._frozen_index.get_n_items()
+
+        if vector_id < number_of_frozen_items:
+            return self._frozen_index.get_item_vector(vector_id)
+
+        return self._delta_vectors[vector_id - number_of_frozen_items].tolist()
+
+    def get_nns_by_vector(
+        self, query_vector, number_of_results, include_distances=False
+    ):
+        """Returns the nearest neighbors of the query vector, searching both the frozen index and the delta buffer
+
+        Args:
+            query_vector (List[Tensor] | ndarray | Tensor): the query vector
+            number_of_results (int): how many neighbors should be returned at most
+            include_distances (bool, optional): whether or not to return the distances as well. Defaults to False.
+
+        Returns:
+            list | tuple: the ids of the nearest neighbors, or a tuple (ids, distances) if 'include_distances' is True
+        """
+        if self.is_brute_force_search_preferable():
+            ids, distances = self._get_nns_by_vector_through_brute_force(
+                query_vector, number_of_results
+            )
+        else:
+            ids, distances = self._get_nns_by_vector_through_annoy(
+                query_vector, number_of_results
+            )
+
+        if include_distances:
+            return ids, distances
+
+        return ids
+
+    def _get_nns_by_vector_through_brute_force(self, query_vector, number_of_results):
+        distances = convert_cosine_similarities_to_angular_distances(
+            self.calculate_cosine_similarities(query_vector)
+        )
+
+        ids = select_top_k_smallest(distances, number_of_results)
+
+        return ids.tolist(), distances[ids].tolist()
+
+    def _get_nns_by_vector_through_annoy(self, query_vector, number_of_results):
+        ids, distances = self._frozen_index.get_nns_by_vector(
+            query_vector, number_of_results, include_distances=True
+        )
+
+        if self._delta_vectors:
+            number_of_frozen_items = self._frozen_index.get_n_items()
+
+            delta_distances = calculate_angular_distances(
+                np.stack(self._delta_vectors), query_vector
+            )
+
+            candidates = list(zip(ids, distances)) + [
+                (number_of_frozen_items + position, float(distance))
+                for position, distance in enumerate(delta_distances)
+            ]
+
+            # The sort is stable, so ties keep the frozen index results first.
+            candidates = sorted(candidates, key=lambda candidate: candidate[1])[
+                :number_of_results
+            ]
+
+            ids = [vector_id for vector_id, _ in candidates]
+            distances = [distance for _, distance in candidates]
+
+        return ids, distances
+
+    def should_merge(self):
+        """Returns whether or not the delta buffer should be merged into the frozen index
+
+        Returns:
+            bool: whether the delta buffer should be merged
+        """
+        if not self._delta_vectors:
+            return False
+
+        # A fresh database always gets a proper Annoy index built.
+        return (
+            self._frozen_index.get_n_items() == 0
+            or len(self._delta_vectors) > DELTA_BUFFER_MERGE_THRESHOLD
+        )
+
+    def merge(self):
+        """Rebuilds the frozen Annoy index so that it includes the vectors of the delta buffer."""
+        new_index = AnnoyIndex(VECTOR_DIMENSIONS, self._metric)
+
+        for i in range(self.get_n_items()):
+            new_index.add_item(i, self.get_item_vector(i))
+
+        # Vital to unload the original index, which should free up the database file.
+        self._frozen_index.unload()
+
+        new_index.build(NUMBER_OF_TREES)
+
+        self._frozen_index = new_index
+        self._delta_vectors = []
+
+    def save(self, database_filename, delta_filename):
+        """Saves the index to disk. The frozen index only gets rebuilt and rewritten
+        if the delta buffer needs to be merged.
+
+        Args:
+            database_filename (str): the full path of the Annoy database
+            delta_filename (str): the full path of the file that stores the delta buffer
+
+        Raises:
+            UnableToSaveVectorDatabaseError: if either file couldn't be saved
+        """
+        try:
+            if self.should_merge():
+                self.merge()
+
+                self._frozen_index.save(database_filename)
+
+            np.save(
+                delta_filename,
+                np.stack(self._delta_vectors)
+                if self._delta_vectors
+                else np.zeros((0, VECTOR_DIMENSIONS), dtype=np.float32),
+            )
+        except OSError as exception:
+            message_error = f"The function {self.save.__name__} was unable to save the database at {database_filename}."
+            message_error += f" Error: {exception}"
+
+            raise UnableToSaveVectorDatabaseError(message_error) from exception
+
+    def unload(self):
+        """Unloads the frozen index, which frees up the database file."""
+        self._frozen_index.unload()
+
+
+def load_memory_index(database_filename, delta_filename, metric):
+    """Loads a memory index from its frozen Annoy database and its delta buffer file
+
+    Args:
+        database_filename (str): the full path of the Annoy database
+        delta_filename (str): the full path of the file that stores the delta buffer
+        metric (str): the metric of the index
+
+    Raises:
+        DatabaseDoesntExistError: if the Annoy database doesn't exist
+
+    Returns:
+        MemoryIndex: the loaded memory index
+    """
+    frozen_index = AnnoyIndex(VECTOR_DIMENSIONS, metric)
+
+    try:
+        frozen_index.load(database_filename)
+    except OSError as exception:
+        raise DatabaseDoesntExistError(
+            f"I failed to load the index of a vector database because the file doesn't seem to exist. The filename is '{database_filename}'. Error: {exception}"
+        ) from exception
+
+    delta_vectors = None
+
+    if os.path.isfile(delta_filename):
+        delta_vectors = list(np.load(delta_filename))
+
+    return MemoryIndex(metric, frozen_index, delta_vectors)
@@ -0,0 +1,98 @@
+"""This module contains the MemoryStream class, which keeps an agent's memories resident in memory.
+
+"""
+from errors import DisparityBetweenDatabasesError
+
+
+class MemoryStream:
+    """The memories of an agent: the index of their vectors plus the columns of their metadata.
+
+    A memory stream is loaded once and owned by its agent for the whole simulation run.
+    New memories and memory accesses only change it in memory; they get written to disk
+    through explicit checkpoints.
+    """
+
+    def __init__(self, index, memories):
+        self._index = index
+        self._memories = memories
+
+        self._has_unsaved_memories = False
+        self._has_unsaved_accesses = False
+
+    def get_index(self):
+        """Returns the index of the memory vectors
+
+        Returns:
+            MemoryIndex: the index of the memory vectors
+        """
+        return self._index
+
+    def get_memories(self):
+        """Returns the metadata of the memories
+
+        Returns:
+            MemoryStreamColumns: the columns of the memories' metadata
+        """
+        return self._memories
+
+    def add_memories(self, vectors, memories):
+        """Adds new memories to the stream
+
+        Args:
+            vectors (list): the encoded vectors of the new memories
+            memories (list[dict]): the metadata of the new memories, in the same order as the vectors
+
+        Raises:
+            DisparityBetweenDatabasesError: if the index and the metadata end up with different lengths
+        """
+        for vector in vectors:
+            self._index.add_item(self._index.get_n_items(), vector)
+
+        self._memories.append_memories(memories)
+
+        if self._index.get_n_items() != len(self._memories):
+            raise DisparityBetweenDatabasesError(
+                f"The length of the index contents ({self._index.get_n_items()}) doesn't match the length of the raw memory data ({len(self._memories)})"
+            )
+
+        self._has_unsaved_memories = True
+
+    def has_unsaved_memories(self):
+        """Returns whether or not memories have been added since the last checkpoint
+
+        Returns:
+            bool: whether there are memories that haven't been written to disk
+        """
+        return self._has_unsaved_memories
+
+    def mark_accesses_as_unsaved(self):
+        """Records that the access timestamps of some memories changed since the last checkpoint."""
+        self._has_unsaved_accesses = True
+
+    def has_unsaved_changes(self):
+        """Returns whether or not the memory stream changed since the last checkpoint
+
+        Returns:
+            bool: whether there are memories or memory accesses that haven't been written to disk
+        """
+        return self._has_unsaved_memories or self._has_unsaved_accesses
+
+    def checkpoint(self, database_filename, delta_filename, memory_stream_directory):
+        """Writes the memory stream to disk, as long as it changed since the last checkpoint
+
+        Args:
+            database_filename (str): the full path of the Annoy database
+            delta_filename (str): the full path of the file that stores the delta buffer of the index
+            memory_stream_directory (str): the directory that contains the columns of the memories
+        """
+        if not self.has_unsaved_changes():
+            return
+
+        if self._has_unsaved_memories:
+            # The index only gets rebuilt if its delta buffer has grown past its threshold.
+            self._index.save(database_filename, delta_filename)
+
+        self._memories.save(memory_stream_directory)
+
+        self._has_unsaved_memories = False
+        self._has_unsaved_accesses = False
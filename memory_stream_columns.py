@@ -0,0 +1,424 @@
+"""This module contains the columnar storage of an agent's memory stream.
+
+The metadata of the memories is stored as separate NumPy arrays (timestamps as epoch
+seconds and importance), plus an offsets array and a blob of utf-8 encoded
+descriptions. All the files get memory-mapped when loaded, so loading a memory stream
+takes the same time regardless of how many memories it contains.
+"""
+import datetime
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+from datetime_utils import (
+    convert_epoch_seconds_to_timestamp,
+    convert_timestamp_to_epoch_seconds,
+)
+from errors import DatabaseDoesntExistError, DisparityBetweenDatabasesError
+from math_utils import calculate_recencies
+
+CREATION_TIMESTAMPS_FILENAME = "creation_timestamps.npy"
+ACCESS_TIMESTAMPS_FILENAME = "access_timestamps.npy"
+IMPORTANCE_FILENAME = "importance.npy"
+DESCRIPTION_OFFSETS_FILENAME = "description_offsets.npy"
+DESCRIPTIONS_FILENAME = "descriptions.bin"
+
+
+class MemoryStreamColumns(Mapping):
+    """The metadata of an agent's memories, stored column by column.
+
+    It behaves like a read-only dict that maps the stringified vector id of each memory
+    to a dict with its 'description', 'creation_timestamp', 'most_recent_access_timestamp'
+    and 'importance'.
+
+    Recency isn't stored: it depends on the current timestamp, so it gets calculated
+    from the access timestamps whenever it's needed.
+    """
+
+    def __init__(
+        self,
+        creation_timestamps=None,
+        access_timestamps=None,
+        importance=None,
+        description_offsets=None,
+        descriptions=None,
+    ):
+        self.creation_timestamps = (
+            creation_timestamps
+            if creation_timestamps is not None
+            else np.zeros(0, dtype=np.float64)
+        )
+        self.access_timestamps = (
+            access_timestamps
+            if access_timestamps is not None
+            else np.zeros(0, dtype=np.float64)
+        )
+        self.importance = (
+            importance if importance is not None else np.zeros(0, dtype=np.float64)
+        )
+        self._description_offsets = (
+            description_offsets
+            if description_offsets is not None
+            else np.zeros(1, dtype=np.int64)
+        )
+        self._descriptions = descriptions if descriptions is not None else b""
+
+        # Whether the access timestamps are an array of the columns' own, which can be written
+        # in place, rather than a memory-mapped file or an array someone else passed in.
+        self._owns_access_timestamps = False
+
+        # The vector ids sorted by creation timestamp, along with the sorted timestamps.
+        # Built the first time a time-based query needs them.
+        self._creation_order = None
+        self._sorted_creation_timestamps = None
+
+        if not (
+            len(self.creation_timestamps)
+            == len(self.access_timestamps)
+            == len(self.importance)
+            == len(self._description_offsets) - 1
+        ):
+            raise DisparityBetweenDatabasesError(
+                "The columns of the memory stream don't have the same length."
+            )
+
+    def __len__(self):
+        return len(self.creation_timestamps)
+
+    def __iter__(self):
+        for vector_id in range(len(self)):
+            yield str(vector_id)
+
+    def __getitem__(self, key):
+        vector_id = self._convert_key_to_vector_id(key)
+
+        return {
+            "description": self.get_description(vector_id),
+            "creation_timestamp": convert_epoch_seconds_to_timestamp(
+                self.creation_timestamps[vector_id]
+            ),
+            "most_recent_access_timestamp": convert_epoch_seconds_to_timestamp(
+                self.access_timestamps[vector_id]
+            ),
+            "importance": float(self.importance[vector_id]),
+        }
+
+    def _convert_key_to_vector_id(self, key):
+        try:
+            vector_id = int(key)
+        except (TypeError, ValueError) as exception:
+            raise KeyError(key) from exception
+
+        if not 0 <= vector_id < len(self):
+            raise KeyError(key)
+
+        return vector_id
+
+    def get_description(self, vector_id):
+        """Returns the description of a memory
+
+        Args:
+            vector_id (int): the vector id of the memory
+
+        Returns:
+            str: the description of the memory
+        """
+        start = int(self._description_offsets[vector_id])
+        end = int(self._description_offsets[vector_id + 1])
+
+        return bytes(self._descriptions[start:end]).decode("utf8")
+
+    def append_memories(self, memories):
+        """Appends new memories at the end of the columns
+
+        Args:
+            memories (list[dict]): the new memories, in the same format returned by indexing this mapping
+        """
+        if not memories:
+            return
+
+        encoded_descriptions = [
+            memory["description"].encode("utf8") for memory in memories
+        ]
+
+        new_creation_timestamps = np.array(
+            [
+                convert_timestamp_to_epoch_seconds(memory["creation_timestamp"])
+                for memory in memories
+            ],
+            dtype=np.float64,
+        )
+
+        self._extend_creation_order(len(self), new_creation_timestamps)
+
+        self.creation_timestamps = np.concatenate(
+            (self.creation_timestamps, new_creation_timestamps)
+        )
+        self.access_timestamps = np.concatenate(
+            (
+                self.access_timestamps,
+                [
+                    convert_timestamp_to_epoch_seconds(
+                        memory["most_recent_access_timestamp"]
+                    )
+                    for memory in memories
+                ],
+            )
+        )
+        self._owns_access_timestamps = True
+        self.importance = np.concatenate(
+            (self.importance, [memory["importance"] for memory in memories])
+        )
+        self._description_offsets = np.concatenate(
+            (
+                self._description_offsets,
+                self._description_offsets[-1]
+                + np.cumsum([len(encoded) for encoded in encoded_descriptions]),
+            )
+        )
+        self._descriptions = bytes(self._descriptions) + b"".join(encoded_descriptions)
+
+    def _extend_creation_order(self, first_new_vector_id, new_creation_timestamps):
+        if self._creation_order is None:
+            return
+
+        # New memories are normally created at the current timestamp, so they can
+        # just be appended to the creation order. Otherwise it gets rebuilt when needed.
+        if np.all(np.diff(new_creation_timestamps) >= 0) and (
+            len(self._sorted_creation_timestamps) == 0
+            or new_creation_timestamps[0] >= self._sorted_creation_timestamps[-1]
+        ):
+            self._creation_order = np.concatenate(
+                (
+                    self._creation_order,
+                    np.arange(
+                        first_new_vector_id,
+                        first_new_vector_id + len(new_creation_timestamps),
+                    ),
+                )
+            )
+            self._sorted_creation_timestamps = np.concatenate(
+                (self._sorted_creation_timestamps, new_creation_timestamps)
+            )
+        else:
+            self._creation_order = None
+            self._sorted_creation_timestamps = None
+
+    def _get_creation_order(self):
+        if self._creation_order is None:
+            self._creation_order = np.argsort(self.creation_timestamps, kind="stable")
+            self._sorted_creation_timestamps = np.asarray(
+                self.creation_timestamps, dtype=np.float64
+            )[self._creation_order]
+
+        return self._creation_order, self._sorted_creation_timestamps
+
+    def get_vector_ids_closest_to_timestamp(self, timestamp, number_of_memories):
+        """Returns the vector ids of the memories created closest to the passed timestamp,
+        through a binary search over the creation order: O(log n + number_of_memories)
+
+        Args:
+            timestamp (datetime): the target timestamp
+            number_of_memories (int): how many vector ids should be returned at most
+
+        Returns:
+            list[int]: the vector ids, sorted from the closest memory to the farthest one
+        """
+        creation_order, sorted_creation_timestamps = self._get_creation_order()
+
+        target = convert_timestamp_to_epoch_seconds(timestamp)
+
+        # Walk outwards from the target, taking the closest neighbor on either side each time.
+        right = int(np.searchsorted(sorted_creation_timestamps, target, side="right"))
+        left = right - 1
+
+        vector_ids = []
+
+        while len(vector_ids) < number_of_memories and (
+            left >= 0 or right < len(sorted_creation_timestamps)
+        ):
+            if right >= len(sorted_creation_timestamps) or (
+                left >= 0
+                and target - sorted_creation_timestamps[left]
+                <= sorted_creation_timestamps[right] - target
+            ):
+                vector_ids.append(int(creation_order[left]))
+                left -= 1
+            else:
+                vector_ids.append(int(creation_order[right]))
+                right += 1
+
+        return vector_ids
+
+    def get_vector_ids_in_time_window(self, start_timestamp, end_timestamp):
+        """Returns the vector ids of the memories created within a time window, both ends included
+
+        Args:
+            start_timestamp (datetime): the beginning of the time window
+            end_timestamp (datetime): the end of the time window
+
+        Returns:
+            list[int]: the vector ids, sorted by creation timestamp
+        """
+        creation_order, sorted_creation_timestamps = self._get_creation_order()
+
+        start = np.searchsorted(
+            sorted_creation_timestamps,
+            convert_timestamp_to_epoch_seconds(start_timestamp),
+            side="left",
+        )
+        end = np.searchsorted(
+            sorted_creation_timestamps,
+            convert_timestamp_to_epoch_seconds(end_timestamp),
+            side="right",
+        )
+
+        return creation_order[start:end].tolist()
+
+    def calculate_recencies(self, current_timestamp, decay_rate):
+        """Calculates the recency of every memory at once, from their most recent access timestamps
+
+        Args:
+            current_timestamp (datetime): the current timestamp
+            decay_rate (float): the decay rate of the recency
+
+        Returns:
+            ndarray: the recency of each memory, ordered by vector id
+        """
+        return calculate_recencies(
+            convert_timestamp_to_epoch_seconds(current_timestamp),
+            self.access_timestamps,
+            decay_rate,
+        )
+
+    def update_access_timestamps(self, vector_ids, access_timestamp):
+        """Updates the most recent access timestamp of several memories
+
+        Args:
+            vector_ids (list[int]): the vector ids of the memories that were accessed
+            access_timestamp (datetime): when the memories were accessed
+        """
+        # Memory-mapped columns are read-only, so they get copied the first time they change.
+        if not self._owns_access_timestamps:
+            self.access_timestamps = np.array(self.access_timestamps, dtype=np.float64)
+            self._owns_access_timestamps = True
+
+        vector_ids = np.asarray(vector_ids, dtype=np.int64)
+
+        self.access_timestamps[vector_ids] = convert_timestamp_to_epoch_seconds(
+            access_timestamp
+        )
+
+    def save(self, directory):
+        """Saves the columns into the passed directory
+
+        Args:
+            directory (str): the directory that will contain the files of the columns
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        # The loaded files are memory-mapped. Their contents must be read into memory
+        # before overwriting them, or some platforms won't release the files.
+        columns = {
+            CREATION_TIMESTAMPS_FILENAME: np.array(
+                self.creation_timestamps, dtype=np.float64
+            ),
+            ACCESS_TIMESTAMPS_FILENAME: np.array(
+                self.access_timestamps, dtype=np.float64
+            ),
+            IMPORTANCE_FILENAME: np.array(self.importance, dtype=np.float64),
+            DESCRIPTION_OFFSETS_FILENAME: np.array(
+                self._description_offsets, dtype=np.int64
+            ),
+        }
+        descriptions = bytes(self._descriptions)
+
+        self.creation_timestamps = columns[CREATION_TIMESTAMPS_FILENAME]
+        self.access_timestamps = columns[ACCESS_TIMESTAMPS_FILENAME]
+        self._owns_access_timestamps = True
+        self.importance = columns[IMPORTANCE_FILENAME]
+        self._description_offsets = columns[DESCRIPTION_OFFSETS_FILENAME]
+        self._descriptions = descriptions
+
+        for filename, column in columns.items():
+            np.save(os.path.join(directory, filename), column)
+
+        with open(os.path.join(directory, DESCRIPTIONS_FILENAME), "wb") as file:
+            file.write(descriptions)
+
+
+def load_memory_stream_columns(directory):
+    """Loads the columns of a memory stream, memory-mapping their files
+
+    Args:
+        directory (str): the directory that contains the files of the columns
+
+    Raises:
+        DatabaseDoesntExistError: if the directory doesn't contain a memory stream
+
+    Returns:
+        MemoryStreamColumns: the loaded columns
+    """
+    if not os.path.isfile(os.path.join(directory, DESCRIPTION_OFFSETS_FILENAME)):
+        raise DatabaseDoesntExistError(
+            f"I failed to load the memory stream because the directory '{directory}' doesn't contain one."
+        )
+
+    def load_column(filename):
+        return np.load(os.path.join(directory, filename), mmap_mode="r")
+
+    descriptions_filename = os.path.join(directory, DESCRIPTIONS_FILENAME)
+
+    # An empty file can't be memory-mapped.
+    descriptions = (
+        np.memmap(descriptions_filename, dtype=np.uint8, mode="r")
+        if os.path.getsize(descriptions_filename) > 0
+        else b""
+    )
+
+    return MemoryStreamColumns(
+        load_column(CREATION_TIMESTAMPS_FILENAME),
+        load_column(ACCESS_TIMESTAMPS_FILENAME),
+        load_column(IMPORTANCE_FILENAME),
+        load_column(DESCRIPTION_OFFSETS_FILENAME),
+        descriptions,
+    )
+
+
+def migrate_json_memory_stream(json_filename, directory):
+    """Converts a legacy 'memory_stream.json' file into the columnar format
+
+    Args:
+        json_filename (str): the full path of the legacy json file
+        directory (str): the directory where the columns will be saved
+
+    Returns:
+        MemoryStreamColumns: the migrated columns
+    """
+    with open(json_filename, "r", encoding="utf8") as json_file:
+        memories_raw_data = json.load(json_file)
+
+    columns = MemoryStreamColumns()
+
+    # The json file is keyed by the stringified vector ids, which need to keep their order.
+    columns.append_memories(
+        [
+            {
+                "description": memories_raw_data[key]["description"],
+                "creation_timestamp": datetime.datetime.fromisoformat(
+                    memories_raw_data[key]["creation_timestamp"]
+                ),
+                "most_recent_access_timestamp": datetime.datetime.fromisoformat(
+                    memories_raw_data[key]["most_recent_access_timestamp"]
+                ),
+                "importance": memories_raw_data[key]["importance"],
+            }
+            for key in sorted(memories_raw_data, key=int)
+        ]
+    )
+
+    columns.save(directory)
+
+    return columns
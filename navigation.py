@@ -14,6 +14,8 @@ from scoring import (
     determine_highest_scoring_node,
     request_rating_from_agent_for_location_node,
     request_rating_from_agent_for_sandbox_object_node,
+    request_ratings_from_agent_for_location_nodes,
+    request_ratings_from_agent_for_sandbox_object_nodes,
 )
 from wrappers import (
     validate_agent_has_character_summary,
@@ -63,6 +65,7 @@ def determine_sandbox_object_destination_from_root(agent: Agent, root_node: Node
             agent,
             root_node.children,
             request_rating_from_agent_for_location_node,
+            request_ratings_from_agent_for_location_nodes,
         )
 
         return determine_sandbox_object_destination_from_root(
@@ -74,6 +77,7 @@ def determine_sandbox_object_destination_from_root(agent: Agent, root_node: Node
         agent,
         root_node.children,
         request_rating_from_agent_for_sandbox_object_node,
+        request_ratings_from_agent_for_sandbox_object_nodes,
     )
 
 
@@ -29,17 +29,13 @@ def delegate_determining_appropriate_reaction_to_observation(
     )
 
     # We store as a memory of the agent the AI's response about the appropriate reaction.
-    index, _ = load_agent_memories_function(agent)
-
     update_memories_database_function(
         agent,
         current_timestamp,
         [appropriate_reaction_for_observation],
-        index,
+        load_agent_memories_function(agent),
     )
 
-    index.unload()
-
 
 def process_observation(process_observation_parameters: dict):
     """Process an observation from the environment for an agent
@@ -75,17 +71,13 @@ def process_observation(process_observation_parameters: dict):
         agent.set_observation(observation)
 
     # Save the observation to the agent's memories
-    index, _ = load_agent_memories_function(agent)
-
     update_memories_database_function(
         agent,
         current_timestamp,
         [observation],
-        index,
+        load_agent_memories_function(agent),
     )
 
-    index.unload()
-
     # Request from the AI model if this observation should cause the agent
     # to stop his or her current action
     should_stop_action_response = request_if_should_stop_action_function(
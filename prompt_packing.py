@@ -0,0 +1,243 @@
+"""This module packs ranked lines, such as an agent's memories, into a prompt without exceeding a token budget.
+
+"""
+import re
+import threading
+
+from call_instrumentation import get_call_site
+from defines import (
+    GENERATION_PROFILES,
+    OOBABOOGA_CONTEXT_TOKENS,
+    OOBABOOGA_MAX_NEW_TOKENS,
+    PROMPT_PACKING_DUPLICATE_SIMILARITY,
+    PROMPT_TOKEN_BUDGET_MARGIN,
+)
+from token_accounting import estimate_number_of_tokens
+
+
+def calculate_prompt_token_budget(context_tokens, max_new_tokens, prompt_template):
+    """Calculates how many tokens a prompt can take before the backend truncates it
+
+    Args:
+        context_tokens (int): the tokens the backend's context window holds, counting the response
+        max_new_tokens (int): the tokens the response may take, or None for OOBABOOGA_MAX_NEW_TOKENS
+        prompt_template (str): the text the backend wraps every prompt in
+
+    Returns:
+        int: the tokens left for the prompt
+    """
+    if max_new_tokens is None:
+        max_new_tokens = OOBABOOGA_MAX_NEW_TOKENS
+
+    return max(
+        0,
+        context_tokens
+        - max_new_tokens
+        - estimate_number_of_tokens(prompt_template)
+        - PROMPT_TOKEN_BUDGET_MARGIN,
+    )
+
+
+def get_prompt_token_budget(request_response_function, generation_profile):
+    """Returns how many tokens a prompt sent through the passed function can take
+
+    Args:
+        request_response_function (function): the function that requests a response for a prompt
+        generation_profile (GenerationProfile): the kind of response that will be requested
+
+    Returns:
+        int: the tokens available for the prompt
+    """
+    if hasattr(request_response_function, "get_prompt_token_budget"):
+        return request_response_function.get_prompt_token_budget(generation_profile)
+
+    # Unknown functions get the budget of the smallest backend, which is oobabooga's.
+    return calculate_prompt_token_budget(
+        OOBABOOGA_CONTEXT_TOKENS,
+        GENERATION_PROFILES[generation_profile]["max_new_tokens"],
+        "",
+    )
+
+
+def _get_words(line):
+    return frozenset(re.findall(r"\w+", line.lower()))
+
+
+def _is_near_duplicate(words, packed_words):
+    for other_words in packed_words:
+        union = words | other_words
+
+        if not union:
+            return True
+
+        if len(words & other_words) / len(union) >= PROMPT_PACKING_DUPLICATE_SIMILARITY:
+            return True
+
+    return False
+
+
+def pack_prompt(header, lines, footer, token_budget, line_prefix="- "):
+    """Builds a prompt out of a header, as many of the lines as fit in the budget, and a footer.
+    The lines get taken in order, so the most relevant ones should come first; the packing stops
+    at the first line that doesn't fit. Lines that are nearly identical to one already packed
+    get skipped.
+
+    Args:
+        header (str): the text that goes before the lines
+        lines (list[str]): the lines, from the most to the least relevant
+        footer (str): the text that goes after the lines
+        token_budget (int): the most tokens the whole prompt may take
+        line_prefix (str, optional): the text each line starts with. Defaults to "- ".
+
+    Returns:
+        tuple: the prompt, and a report of the lines packed, the duplicates skipped, and the lines and tokens cut
+    """
+    remaining_tokens = (
+        token_budget
+        - estimate_number_of_tokens(header)
+        - estimate_number_of_tokens(footer)
+    )
+
+    packed_lines = []
+    packed_words = []
+    duplicate_lines = 0
+    cut_lines = 0
+    cut_tokens = 0
+
+    for line in lines:
+        formatted_line = f"{line_prefix}{line.strip()}\n"
+        line_tokens = estimate_number_of_tokens(formatted_line)
+
+        if cut_lines or line_tokens > remaining_tokens:
+            cut_lines += 1
+            cut_tokens += line_tokens
+            continue
+
+        words = _get_words(line)
+
+        if _is_near_duplicate(words, packed_words):
+            duplicate_lines += 1
+            continue
+
+        packed_lines.append(formatted_line)
+        packed_words.append(words)
+        remaining_tokens -= line_tokens
+
+    packing_report = {
+        "packed_lines": len(packed_lines),
+        "duplicate_lines": duplicate_lines,
+        "cut_lines": cut_lines,
+        "cut_tokens": cut_tokens,
+    }
+
+    return header + "".join(packed_lines) + footer, packing_report
+
+
+class PromptPackingStatistics:
+    """Accumulates, per call site, how many prompts got packed and how much context was cut from them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, packing_report, call_site=None):
+        """Records the report of a packed prompt
+
+        Args:
+            packing_report (dict): the report returned by pack_prompt
+            call_site (str, optional): where the prompt got packed. Defaults to the current call site.
+        """
+        if call_site is None:
+            call_site = get_call_site()
+
+        with self._lock:
+            entry = self._entries.setdefault(
+                call_site,
+                {
+                    "prompts": 0,
+                    "truncated_prompts": 0,
+                    "packed_lines": 0,
+                    "duplicate_lines": 0,
+                    "cut_lines": 0,
+                    "cut_tokens": 0,
+                },
+            )
+
+            entry["prompts"] += 1
+            entry["truncated_prompts"] += packing_report["cut_lines"] > 0
+
+            for key in ("packed_lines", "duplicate_lines", "cut_lines", "cut_tokens"):
+                entry[key] += packing_report[key]
+
+    def get_summary(self):
+        """Returns the accumulated numbers of each call site
+
+        Returns:
+            dict: for each call site, its prompts, and the lines packed, skipped and cut
+        """
+        with self._lock:
+            return {
+                call_site: dict(entry) for call_site, entry in self._entries.items()
+            }
+
+    def format_report(self):
+        """Formats the accumulated numbers in a human-readable form
+
+        Returns:
+            str: one line per call site
+        """
+        return "\n".join(
+            f"{call_site}: {entry['prompts']} prompts ({entry['truncated_prompts']} truncated), "
+            f"{entry['packed_lines']} lines packed, {entry['duplicate_lines']} duplicates skipped, "
+            f"{entry['cut_lines']} lines (~{entry['cut_tokens']} tokens) cut"
+            for call_site, entry in self.get_summary().items()
+        )
+
+
+_PROMPT_PACKING_STATISTICS = None
+
+
+def get_prompt_packing_statistics():
+    """Returns the prompt packing statistics shared by the whole library, creating them the first time
+
+    Returns:
+        PromptPackingStatistics: the shared statistics
+    """
+    global _PROMPT_PACKING_STATISTICS  # pylint: disable=global-statement
+
+    if _PROMPT_PACKING_STATISTICS is None:
+        _PROMPT_PACKING_STATISTICS = PromptPackingStatistics()
+
+    return _PROMPT_PACKING_STATISTICS
+
+
+def pack_memories_into_prompt(
+    request_response_function,
+    generation_profile,
+    header,
+    memory_descriptions,
+    footer="",
+):
+    """Packs the descriptions of ranked memories into a prompt that fits the backend that will answer it,
+    and records how much context was cut
+
+    Args:
+        request_response_function (function): the function that will request the response for the prompt
+        generation_profile (GenerationProfile): the kind of response that will be requested
+        header (str): the text that goes before the memories
+        memory_descriptions (list[str]): the descriptions, from the most to the least relevant memory
+        footer (str, optional): the text that goes after the memories. Defaults to "".
+
+    Returns:
+        str: the prompt
+    """
+    prompt, packing_report = pack_prompt(
+        header,
+        memory_descriptions,
+        footer,
+        get_prompt_token_budget(request_response_function, generation_profile),
+    )
+
+    get_prompt_packing_statistics().record(packing_report)
+
+    return prompt
@@ -0,0 +1,59 @@
+"""This module requests ratings from 1 to 10 from the AI model, through a single token where the backend allows it.
+
+"""
+from async_requests import get_max_concurrent_requests, run_concurrently
+from defines import RATING_MODE
+from enums import GenerationProfile, RatingMode
+from regular_expression_utils import extract_rating_from_text
+
+
+def request_rating(request_response_function, prompt, rating_mode=RATING_MODE):
+    """Requests a rating from 1 to 10. In the single-token rating mode, the backend gets asked
+    for the log probabilities of a single token; if it can't provide them, the rating gets
+    extracted from a short free-text response instead.
+
+    Args:
+        request_response_function (function): the function that requests a response for a prompt
+        prompt (str): the prompt that asks for the rating
+        rating_mode (RatingMode, optional): how the rating gets requested. Defaults to RATING_MODE.
+
+    Returns:
+        float: the rating, which may be an expected value between two whole ratings
+    """
+    if rating_mode == RatingMode.SINGLE_TOKEN and hasattr(
+        request_response_function, "request_rating"
+    ):
+        rating = request_response_function.request_rating(prompt)
+
+        if rating is not None:
+            return rating
+
+    rating_response = request_response_function(
+        prompt, generation_profile=GenerationProfile.RATING
+    )
+
+    return extract_rating_from_text(rating_response, prompt)
+
+
+def request_ratings_concurrently(
+    request_response_function, prompts, rating_mode=RATING_MODE
+):
+    """Requests the ratings asked by several independent prompts at the same time
+
+    Args:
+        request_response_function (function): the function that requests a response for a prompt
+        prompts (list[str]): the prompts that ask for the ratings
+        rating_mode (RatingMode, optional): how the ratings get requested. Defaults to RATING_MODE.
+
+    Returns:
+        list[float]: the ratings, in the same order as the prompts
+    """
+    return run_concurrently(
+        [
+            lambda prompt=prompt: request_rating(
+                request_response_function, prompt, rating_mode
+            )
+            for prompt in prompts
+        ],
+        get_max_concurrent_requests(request_response_function),
+    )
@@ -1,26 +1,27 @@
 import re
 
+from defines import DEFAULT_RATING
 from errors import log_error
 
 
 def extract_rating_from_text(text, prompt_that_originated_text, silent=False):
     """Extracts a rating from 1 to 10 from a text.
-    Note: if no rating is found in the text, a 5 is returned.
+    Note: if no rating is found in the text, DEFAULT_RATING is returned.
 
     Args:
-        text (str): the text from where a rating should be extracted
+        text (str): the text from where a rating should be extracted. It may be None if the request failed.
 
     Returns:
         int: the rating
     """
-    numbers = re.findall(r"\d+", text)
+    numbers = re.findall(r"\d+", text) if text is not None else []
     if numbers:
         num = int(numbers[0])
         if 1 <= num <= 10:
             return num
 
     # If at this point we haven't found a number, then the AI has responded
-    # some nonsense. Log it and return 5.
+    # some nonsense. Log it and return the default rating.
     error_message = f"ERROR: Function {extract_rating_from_text.__name__}, the text should have contained a number, but it was: {text} "
     error_message += (
         f"The prompt that generated this error: {prompt_that_originated_text}"
@@ -29,7 +30,76 @@ def extract_rating_from_text(text, prompt_that_originated_text, silent=False):
     if not silent:
         log_error(error_message)
 
-    return 5
+    return DEFAULT_RATING
+
+
+def extract_rating_from_line(line):
+    for number in re.findall(r"\d+", line):
+        if 1 <= int(number) <= 10:
+            return int(number)
+
+    return None
+
+
+def extract_ratings_from_text(
+    text, item_names, prompt_that_originated_text, silent=False
+):
+    """Extracts a rating from 1 to 10 for each of several items, from a text that rated them all.
+    Each line is mapped to an item either through its leading number ('2. 7', '2) Kitchen: 7')
+    or through the item's name ('Kitchen - 7'). The first rating found for an item wins.
+    Note: if no rating is found for an item, DEFAULT_RATING is returned for it.
+
+    Args:
+        text (str): the text from where the ratings should be extracted. It may be None if the request failed.
+        item_names (list[str]): the names of the rated items, in the order they were numbered (starting at 1)
+        prompt_that_originated_text (str): the prompt that produced the text
+
+    Returns:
+        list[int]: the rating of each item, in the same order as 'item_names'
+    """
+    ratings = [None] * len(item_names)
+
+    for line in (text or "").splitlines():
+        numbered_line = re.match(r"^\W*(\d+)\s*[.):\-]\s*(.*)$", line)
+
+        if numbered_line and 1 <= int(numbered_line.group(1)) <= len(item_names):
+            position = int(numbered_line.group(1)) - 1
+            rest_of_line = numbered_line.group(2)
+        else:
+            # If an item's name contains another's ('bed', 'bedroom'), the longest name is the one meant.
+            mentioned_positions = [
+                i
+                for i, item_name in enumerate(item_names)
+                if item_name.lower() in line.lower()
+            ]
+
+            if not mentioned_positions:
+                continue
+
+            position = max(mentioned_positions, key=lambda i: len(item_names[i]))
+            rest_of_line = line
+
+        if ratings[position] is not None:
+            continue
+
+        # The rating comes after the item's name, which could contain numbers of its own.
+        name_index = rest_of_line.lower().find(item_names[position].lower())
+
+        if name_index != -1:
+            name_end = name_index + len(item_names[position])
+            rest_of_line = rest_of_line[name_end:]
+
+        ratings[position] = extract_rating_from_line(rest_of_line)
+
+    for position, rating in enumerate(ratings):
+        if rating is None:
+            ratings[position] = extract_rating_from_text(
+                None,
+                f"{prompt_that_originated_text} (item: {item_names[position]})",
+                silent,
+            )
+
+    return ratings
 
 
 def remove_end_tag_from_ai_response(text):
@@ -39,3 +109,129 @@ def remove_end_tag_from_ai_response(text):
 
 def does_text_contain_yes(text):
     return bool(re.search(r"\byes\b", text, re.IGNORECASE))
+
+
+# A single part of a duration, such as '30 minutes', 'half an hour' or 'an hour and a half'.
+# Hyphenated units, as in 'an hour-long documentary', describe something else.
+_DURATION_PART = (
+    r"\b(?P<amount>\d+(?:\.\d+)?|half\s+an?|an?|one)"
+    r"(?:\s+(?P<half_before>and\s+a\s+half))?"
+    r"\s*(?P<unit>hours?|hrs?|minutes?|mins?)(?![\w-])"
+    r"(?:\s+(?P<half_after>and\s+a\s+half)\b)?"
+)
+
+_DURATION_PART_PATTERN = re.compile(_DURATION_PART, re.IGNORECASE)
+
+# The parts of a compound duration only add up while nothing else comes between them,
+# as in '1 hour and 30 minutes'. Named groups can't repeat, so the parts go unnamed here.
+_DURATION = (
+    rf"(?:{re.sub(r'[?]P<[a-z_]+>', '?:', _DURATION_PART)}"
+    r"(?:\s*,)?(?:\s*\band\b)?\s*)+"
+)
+
+_DURATION_PATTERN = re.compile(_DURATION, re.IGNORECASE)
+
+_INTRODUCED_DURATION_PATTERN = re.compile(
+    r"\b(?:for|during)\s+(?:(?:about|around|approximately|roughly|another|the\s+next)\s+)*"
+    rf"(?P<duration>{_DURATION})",
+    re.IGNORECASE,
+)
+
+_TRAILING_DURATION_PATTERN = re.compile(
+    rf"(?P<duration>{_DURATION})[\s).,;:!]*$", re.IGNORECASE
+)
+
+
+def _convert_duration_to_minutes(duration):
+    minutes = 0
+
+    for match in _DURATION_PART_PATTERN.finditer(duration):
+        amount = match.group("amount").lower()
+
+        if amount.startswith("half"):
+            quantity = 0.5
+        elif amount in ("a", "an", "one"):
+            quantity = 1
+        else:
+            quantity = float(amount)
+
+        if match.group("half_before") or match.group("half_after"):
+            quantity += 0.5
+
+        if match.group("unit").lower().startswith("h"):
+            quantity *= 60
+
+        minutes += quantity
+
+    return round(minutes)
+
+
+def extract_duration_in_minutes_from_text(text):
+    """Extracts a duration from a text, such as '45 minutes' or '1 hour and 30 minutes'.
+    Only the first duration counts. A bare number counts as minutes.
+
+    Args:
+        text (str): the text from where the duration should be extracted. It may be None if the request failed.
+
+    Returns:
+        int: the duration in minutes, or None if the text doesn't contain one
+    """
+    if text is None:
+        return None
+
+    match = _DURATION_PATTERN.search(text)
+
+    if match is not None:
+        return _convert_duration_to_minutes(match.group()) or None
+
+    numbers = re.findall(r"\d+", text)
+
+    if not numbers:
+        return None
+
+    return int(numbers[0]) or None
+
+
+def extract_action_and_duration_from_text(text):
+    """Extracts an action and its duration from a text in the format '<action> for <duration>',
+    such as 'Aileen is going to read a book for 1 hour and 30 minutes'. Only the first line counts.
+    The duration is the one introduced by the last 'for' or 'during', or else one that ends the line,
+    as in 'Aileen is going to take a nap (half an hour)'.
+
+    Args:
+        text (str): the text from where the action and its duration should be extracted. It may be None if the request failed.
+
+    Returns:
+        tuple: the action, and its duration in minutes; either is None if the text doesn't contain it
+    """
+    if text is None or not text.strip():
+        return None, None
+
+    line = text.strip().splitlines()[0].strip()
+
+    matches = list(_INTRODUCED_DURATION_PATTERN.finditer(line))
+
+    if matches:
+        match = matches[-1]
+        action = line[: match.start()]
+    else:
+        match = _TRAILING_DURATION_PATTERN.search(line)
+
+        if match is None:
+            return line.rstrip(" .") or None, None
+
+        action = line[: match.start("duration")]
+
+    # Drop the words that only introduce the duration, as in 'for about 30 minutes'.
+    previous_action = None
+
+    while action != previous_action:
+        previous_action = action
+        action = re.sub(
+            r"(?:\b(?:for|during|about|around|approximately|roughly))?[\s,;:(\-]*$",
+            "",
+            action,
+            flags=re.IGNORECASE,
+        )
+
+    return action or None, _convert_duration_to_minutes(match.group("duration")) or None
@@ -0,0 +1,231 @@
+"""This module contains the RequestScheduler class, which keeps the requests to a backend under its rate limits.
+
+"""
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+from enums import RequestPriority
+
+
+class TokenBucket:
+    """A bucket that refills continuously at 'rate_per_minute' units, up to 'capacity' units."""
+
+    def __init__(self, rate_per_minute, capacity=None, clock_function=time.monotonic):
+        self._rate_per_second = rate_per_minute / 60
+        self._capacity = capacity if capacity is not None else rate_per_minute
+        self._clock_function = clock_function
+
+        self._level = self._capacity
+        self._last_refill = self._clock_function()
+
+    def get_capacity(self):
+        """Returns the most units the bucket can hold
+
+        Returns:
+            float: the capacity of the bucket
+        """
+        return self._capacity
+
+    def _refill(self):
+        now = self._clock_function()
+
+        self._level = min(
+            self._capacity,
+            self._level + (now - self._last_refill) * self._rate_per_second,
+        )
+        self._last_refill = now
+
+    def get_wait_seconds(self, amount):
+        """Returns how long it will take until the bucket holds 'amount' units
+
+        Args:
+            amount (float): the units that will be taken
+
+        Returns:
+            float: the seconds to wait, 0.0 if the units are available already
+        """
+        self._refill()
+
+        if self._level >= amount:
+            return 0.0
+
+        return (amount - self._level) / self._rate_per_second
+
+    def consume(self, amount):
+        """Takes units from the bucket. It should only be called once get_wait_seconds returned 0.0.
+
+        Args:
+            amount (float): the units that will be taken
+        """
+        self._refill()
+
+        self._level -= amount
+
+
+class RequestScheduler:
+    """Holds back the requests to a backend so that they stay under its requests-per-minute and
+    tokens-per-minute budgets, without serializing the requests that fit in the budget.
+
+    The waiting requests are granted in order of priority. Among the same priority, every owner
+    (usually an agent) gets its turn, so one busy owner can't starve the rest: each request gets
+    a turn number one past its owner's previous one, but never behind the turn being served.
+
+    Every AI model client of a backend shares the same scheduler, through get_request_scheduler,
+    so the budgets hold for the whole process rather than for each client.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=None,
+        tokens_per_minute=None,
+        clock_function=time.monotonic,
+    ):
+        self._clock_function = clock_function
+
+        self._request_bucket = None
+        self._token_bucket = None
+
+        if requests_per_minute is not None:
+            self._request_bucket = TokenBucket(
+                requests_per_minute, clock_function=clock_function
+            )
+        if tokens_per_minute is not None:
+            self._token_bucket = TokenBucket(
+                tokens_per_minute, clock_function=clock_function
+            )
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._owner_turns = collections.defaultdict(int)
+        self._current_turn = 0
+
+        self._granted_requests = 0
+        self._max_queue_depth = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def is_limited(self):
+        """Determines whether the scheduler has any budget to enforce
+
+        Returns:
+            bool: True if there's a requests-per-minute or a tokens-per-minute budget
+        """
+        return self._request_bucket is not None or self._token_bucket is not None
+
+    def _get_wait_seconds(self, tokens):
+        wait_seconds = 0.0
+
+        if self._request_bucket is not None:
+            wait_seconds = max(wait_seconds, self._request_bucket.get_wait_seconds(1))
+        if self._token_bucket is not None:
+            wait_seconds = max(
+                wait_seconds, self._token_bucket.get_wait_seconds(tokens)
+            )
+
+        return wait_seconds
+
+    def _consume(self, tokens):
+        if self._request_bucket is not None:
+            self._request_bucket.consume(1)
+        if self._token_bucket is not None:
+            self._token_bucket.consume(tokens)
+
+    def acquire(self, tokens=0, owner=None, priority=RequestPriority.NORMAL):
+        """Blocks until a request can be sent to the backend, and takes its share of the budgets
+
+        Args:
+            tokens (int, optional): the tokens the request may take, counting prompt and response. Defaults to 0.
+            owner (str, optional): who sends the request, to share the budgets fairly. Defaults to None.
+            priority (RequestPriority, optional): how urgent the request is. Defaults to RequestPriority.NORMAL.
+
+        Returns:
+            float: the seconds the request had to wait
+        """
+        if not self.is_limited():
+            return 0.0
+
+        if self._token_bucket is not None:
+            # A request bigger than the whole bucket would never fit otherwise.
+            tokens = min(tokens, self._token_bucket.get_capacity())
+
+        enqueued_at = self._clock_function()
+
+        with self._condition:
+            turn = max(self._owner_turns[owner], self._current_turn)
+            self._owner_turns[owner] = turn + 1
+
+            ticket = (priority.value, turn, next(self._sequence))
+
+            heapq.heappush(self._queue, ticket)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+
+            while True:
+                timeout = None
+
+                if self._queue[0] == ticket:
+                    timeout = self._get_wait_seconds(tokens)
+
+                    if timeout == 0.0:
+                        break
+
+                self._condition.wait(timeout)
+
+            heapq.heappop(self._queue)
+
+            self._consume(tokens)
+            self._current_turn = turn
+
+            wait_seconds = self._clock_function() - enqueued_at
+
+            self._granted_requests += 1
+            self._total_wait_seconds += wait_seconds
+            self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+            self._condition.notify_all()
+
+        return wait_seconds
+
+    def get_metrics(self):
+        """Returns the queueing metrics of the scheduler
+
+        Returns:
+            dict: the current and maximum queue depths, the granted requests and their wait times
+        """
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "granted_requests": self._granted_requests,
+                "average_wait_seconds": self._total_wait_seconds
+                / max(1, self._granted_requests),
+                "max_wait_seconds": self._max_wait_seconds,
+            }
+
+
+_REQUEST_SCHEDULERS = {}
+_REQUEST_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_request_scheduler(backend, requests_per_minute, tokens_per_minute):
+    """Returns the scheduler shared by every client of the passed backend, creating it the first time,
+    so that every simulation running in the process draws from the same budgets.
+
+    Args:
+        backend (str): the name of the backend
+        requests_per_minute (int): the requests-per-minute budget, or None if unlimited
+        tokens_per_minute (int): the tokens-per-minute budget, or None if unlimited
+
+    Returns:
+        RequestScheduler: the shared scheduler of the backend
+    """
+    with _REQUEST_SCHEDULERS_LOCK:
+        if backend not in _REQUEST_SCHEDULERS:
+            _REQUEST_SCHEDULERS[backend] = RequestScheduler(
+                requests_per_minute, tokens_per_minute
+            )
+
+        return _REQUEST_SCHEDULERS[backend]
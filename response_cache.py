@@ -0,0 +1,94 @@
+"""This module contains the ResponseCache class, a persistent cache of the AI model's responses.
+
+"""
+import atexit
+import hashlib
+import json
+
+from defines import RESPONSE_CACHE_FILENAME, RESPONSE_CACHE_MAX_ENTRIES
+from sqlite_lru_store import SqliteLruStore
+
+
+def create_response_cache_key(backend, request):
+    """Creates the key under which the response to a request gets cached
+
+    Args:
+        backend (str): the name of the backend that answers the request
+        request (dict): the whole body of the request, which includes the prompt and the generation parameters
+
+    Returns:
+        str: the key of the response
+    """
+    return hashlib.sha256(
+        f"{backend}\0{json.dumps(request, sort_keys=True)}".encode("utf8")
+    ).hexdigest()
+
+
+class ResponseCache:
+    """An on-disk cache of the AI model's responses, keyed by a hash of the backend plus
+    the whole request. Once the cache holds more than 'max_entries' responses,
+    the least recently used ones get evicted.
+    """
+
+    def __init__(self, filename, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self._store = SqliteLruStore(
+            filename, "responses", "response", "TEXT", max_entries
+        )
+
+    def get(self, key):
+        """Returns the cached response stored under the passed key, if any
+
+        Args:
+            key (str): the key created by create_response_cache_key
+
+        Returns:
+            str: the cached response, or None if it wasn't cached
+        """
+        return self._store.get_many([key])[0]
+
+    def put(self, key, response):
+        """Stores a response, evicting the least recently used entries if necessary
+
+        Args:
+            key (str): the key created by create_response_cache_key
+            response (str): the response of the AI model
+        """
+        self._store.put_many([(key, response)])
+
+    def __len__(self):
+        return len(self._store)
+
+    def flush(self):
+        """Writes the accesses that the lookups have made since the last write, so the
+        eviction order survives the process."""
+        self._store.flush()
+
+    def close(self):
+        """Closes the connection to the cache file."""
+        self._store.close()
+
+
+_RESPONSE_CACHE = None
+
+
+def get_response_cache():
+    """Returns the response cache shared by the whole library, creating it the first time
+
+    Returns:
+        ResponseCache: the shared response cache
+    """
+    global _RESPONSE_CACHE  # pylint: disable=global-statement
+
+    if _RESPONSE_CACHE is None:
+        _RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_FILENAME)
+
+        # Nothing else owns the shared cache, so its pending accesses get written on exit.
+        atexit.register(_RESPONSE_CACHE.close)
+
+    return _RESPONSE_CACHE
+
+
+def flush_response_cache():
+    """Writes the accesses pending in the shared response cache, if the cache has been created."""
+    if _RESPONSE_CACHE is not None:
+        _RESPONSE_CACHE.flush()
@@ -1,8 +1,13 @@
 from anytree import Node
 from agent import Agent
+from async_requests import get_max_concurrent_requests, run_concurrently
+from call_instrumentation import tag_call_site
+from defines import RATING_MODE
+from enums import GenerationProfile, RatingMode
 from errors import InvalidParameterError
 from logging_messages import log_debug_message
-from regular_expression_utils import extract_rating_from_text
+from rating_requests import request_rating
+from regular_expression_utils import extract_ratings_from_text
 from string_utils import end_string_with_period
 from wrappers import (
     validate_agent_has_character_summary,
@@ -14,24 +19,59 @@ from wrappers import (
 @validate_agent_type
 @validate_agent_planned_action
 def determine_highest_scoring_node(
-    agent: Agent, set_of_nodes: tuple, request_rating_from_agent_for_node_function
+    agent: Agent,
+    set_of_nodes: tuple,
+    request_rating_from_agent_for_node_function,
+    request_ratings_from_agent_for_nodes_function=None,
+    rating_mode=RATING_MODE,
 ):
+    """Determines which of the passed nodes the agent rates the highest
+
+    Args:
+        agent (Agent): the agent who rates the nodes
+        set_of_nodes (tuple): the candidate nodes
+        request_rating_from_agent_for_node_function (function): the function that requests the rating of a single node
+        request_ratings_from_agent_for_nodes_function (function, optional): the function that requests the ratings of all the nodes
+         through a single prompt. Defaults to None.
+        rating_mode (RatingMode, optional): how the nodes get rated. Defaults to RATING_MODE.
+
+    Returns:
+        Node: the highest scoring node
+    """
     # if 'set_of_nodes' contains only one node, return it immediately
     if len(set_of_nodes) == 1:
         return set_of_nodes[0]
 
-    scored_nodes = {}
+    if (
+        rating_mode == RatingMode.BATCH
+        and request_ratings_from_agent_for_nodes_function is not None
+    ):
+        ratings = request_ratings_from_agent_for_nodes_function(agent, set_of_nodes)
+    else:
+        # The ratings don't depend on each other, so they get requested at the same time.
+        ratings = run_concurrently(
+            [
+                lambda node=node: request_rating_from_agent_for_node_function(
+                    agent, node
+                )
+                for node in set_of_nodes
+            ],
+            get_max_concurrent_requests(agent.get_request_response_function()),
+        )
 
-    for node in set_of_nodes:
-        scored_nodes[node] = request_rating_from_agent_for_node_function(agent, node)
+    # return the highest scoring node. Ties go to the node that comes first,
+    # regardless of which rating arrived first.
+    highest_rating_position = max(
+        range(len(set_of_nodes)), key=lambda position: ratings[position]
+    )
 
-    # return the highest scoring node
-    return max(scored_nodes, key=scored_nodes.get)
+    return set_of_nodes[highest_rating_position]
 
 
 @validate_agent_type
 @validate_agent_planned_action
 @validate_agent_has_character_summary
+@tag_call_site
 def request_rating_from_agent_for_sandbox_object_node(agent, sandbox_object_node):
     """Requests the rating from an agent for a sandbox object
 
@@ -43,7 +83,7 @@ def request_rating_from_agent_for_sandbox_object_node(agent, sandbox_object_node
         InvalidParameterError: if the sandbox_object passed isn't of type SandboxObject
 
     Returns:
-        int: the rating/score for the sandbox object given the action passed
+        float: the rating/score for the sandbox object given the action passed
     """
     if not isinstance(sandbox_object_node, Node):
         raise InvalidParameterError(
@@ -61,16 +101,17 @@ def request_rating_from_agent_for_sandbox_object_node(agent, sandbox_object_node
 
     log_debug_message(f"{prompt}")
 
-    rating_response = agent.get_request_response_function()(prompt)
+    rating = request_rating(agent.get_request_response_function(), prompt)
 
-    log_debug_message(f"{rating_response}")
+    log_debug_message(f"{rating}")
 
-    return extract_rating_from_text(rating_response, prompt)
+    return rating
 
 
 @validate_agent_type
 @validate_agent_planned_action
 @validate_agent_has_character_summary
+@tag_call_site
 def request_rating_from_agent_for_location_node(agent, location_node):
     """Request the rating from agent for the location node.
 
@@ -79,7 +120,7 @@ def request_rating_from_agent_for_location_node(agent, location_node):
         location_node (Node): the location node that will be rated
 
     Returns:
-        int: the processed rating the AI gave for the location passed
+        float: the processed rating the AI gave for the location passed
     """
     if not isinstance(location_node, Node):
         raise InvalidParameterError(
@@ -98,8 +139,91 @@ def request_rating_from_agent_for_location_node(agent, location_node):
 
     log_debug_message(f"{prompt}")
 
-    rating_response = agent.get_request_response_function()(prompt)
+    rating = request_rating(agent.get_request_response_function(), prompt)
+
+    log_debug_message(f"{rating}")
+
+    return rating
+
+
+def format_rating_list(nodes, describe_node_function):
+    return "".join(
+        f"{position}. {describe_node_function(node)}\n"
+        for position, node in enumerate(nodes, start=1)
+    )
+
+
+def request_ratings_through_single_prompt(agent, nodes, prompt):
+    log_debug_message(f"{prompt}")
+
+    # The response only holds a short line per candidate, which leaves the prompt most of the context.
+    ratings_response = agent.get_request_response_function()(
+        prompt, GenerationProfile.BATCH_RATING
+    )
+
+    log_debug_message(f"{ratings_response}")
+
+    return extract_ratings_from_text(
+        ratings_response, [node.name.name for node in nodes], prompt
+    )
+
+
+@validate_agent_type
+@validate_agent_planned_action
+@validate_agent_has_character_summary
+@tag_call_site
+def request_ratings_from_agent_for_sandbox_object_nodes(agent, sandbox_object_nodes):
+    """Requests from an agent the ratings of several sandbox objects, through a single prompt
+
+    Args:
+        agent (Agent): the agent from whom the ratings are made
+        sandbox_object_nodes (tuple): the sandbox objects whose usefulness will be rated
 
-    log_debug_message(f"{rating_response}")
+    Returns:
+        list[int]: the rating of each sandbox object, in the same order
+    """
+    # The character summary and the action only get sent once for all the candidates.
+    prompt = agent.get_character_summary() + "\n"
+    prompt += f"{agent.name} is planning the following action: {end_string_with_period(agent.get_planned_action())}\n"
+    prompt += "Given the following objects:\n"
+    prompt += format_rating_list(
+        sandbox_object_nodes,
+        lambda node: f"{node.name.name} ({node.name.description}), located in {node.parent.name.name}",
+    )
+    prompt += "On the scale of 1 to 10, where 1 is useless (isn't related to the action) and 10 is essential (best possible object to fulfill the action),"
+    prompt += f" determine how {agent.name} would rate how essential each object is for the action above. "
+    prompt += (
+        "Answer with one line per object, in the format '<object number>. <rating>':"
+    )
+
+    return request_ratings_through_single_prompt(agent, sandbox_object_nodes, prompt)
+
+
+@validate_agent_type
+@validate_agent_planned_action
+@validate_agent_has_character_summary
+@tag_call_site
+def request_ratings_from_agent_for_location_nodes(agent, location_nodes):
+    """Requests from an agent the ratings of several locations, through a single prompt
+
+    Args:
+        agent (Agent): the agent for whom the ratings will be made
+        location_nodes (tuple): the location nodes that will be rated
+
+    Returns:
+        list[int]: the rating of each location, in the same order
+    """
+    prompt = agent.get_character_summary() + "\n"
+    prompt += f"{agent.name} is currently in {agent.get_current_location_node().name.name} ({agent.get_current_location_node().name.description}).\n"
+    prompt += (
+        "* Prefer to stay in the current area if the activity can be done there.\n"
+    )
+    prompt += "Given the following locations:\n"
+    prompt += format_rating_list(
+        location_nodes, lambda node: f"{node.name.name} ({node.name.description})"
+    )
+    prompt += f"How absolutely necessary is each location for {agent.name}'s action: {agent.get_planned_action()}. "
+    prompt += "Rate each location with a number in the range [1, 10]. "
+    prompt += "Answer with one line per location, in the format '<location number>. <rating>':"
 
-    return extract_rating_from_text(rating_response, prompt)
+    return request_ratings_through_single_prompt(agent, location_nodes, prompt)
@@ -3,10 +3,10 @@
 """
 
 import os
-from defines import get_database_filename, get_json_filename, get_seed_memories_filename
+from defines import get_database_filename, get_seed_memories_filename
 from errors import FileDoesntExistError
 from string_utils import end_string_with_period
-from vector_storage import create_memories_database
+from vector_storage import create_memories_database, do_agent_memories_exist
 
 
 def create_database_of_memories_from_seed_memories(agent, current_timestamp):
@@ -20,9 +20,8 @@ def create_database_of_memories_from_seed_memories(agent, current_timestamp):
         FileDoesntExistError: if 'seed_memories.txt' doesn't exist for the given agent
     """
     database_filename = get_database_filename(agent)
-    json_filename = get_json_filename(agent)
 
-    if not os.path.isfile(database_filename) and not os.path.isfile(json_filename):
+    if not os.path.isfile(database_filename) and not do_agent_memories_exist(agent):
         # must create the memories from the seed_memories.txt
         seed_memories_filename = get_seed_memories_filename(agent)
         if not os.path.isfile(seed_memories_filename):
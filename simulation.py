@@ -12,18 +12,25 @@ from agent_utils import (
     load_agents,
     update_agent_current_location_node,
 )
+from api_requests import AiModelClient
+from call_instrumentation import format_step_summary
 from character_summaries import request_character_summary
 from enums import ObservationType, UpdateType
 from environment import (
     load_environment_tree_from_json,
 )
+from embedding_cache import flush_embedding_cache
 from environment_tree_integrity import calculate_number_of_nodes_in_tree
 from errors import AlgorithmError, DirectoryDoesntExistError, InvalidParameterError
 from initialization import set_initial_state_of_agent
+from logging_messages import log_debug_message
 from navigation import perform_agent_movement
 from observation_system import ObservationSystem
 from process_updates import process_updates
+from prompt_packing import get_prompt_packing_statistics
+from response_cache import flush_response_cache
 from simulation_variables import load_simulation_variables, save_current_timestamp
+from vector_storage import checkpoint_agent_memories
 
 
 class Simulation:
@@ -48,6 +55,10 @@ class Simulation:
 
         self._observation_system = None
 
+        # Created once per run, so that every agent shares its pooled connections.
+        self._ai_model_client = None
+        self._ai_model_call_summary = []
+
         self.current_timestamp = None
         self._minutes_advanced_each_step = None
 
@@ -65,6 +76,14 @@ class Simulation:
         """
         self._load_environment_function = load_environment_function
 
+    def set_ai_model_client(self, ai_model_client):
+        """Sets the client through which the agents will request responses from the AI model
+
+        Args:
+            ai_model_client (AiModelClient): the client
+        """
+        self._ai_model_client = ai_model_client
+
     def set_request_character_summary_function(
         self, request_character_summary_function
     ):
@@ -103,6 +122,23 @@ class Simulation:
 
         self._agents = load_agents(self.name, self)
 
+        if self._ai_model_client is None:
+            self._ai_model_client = AiModelClient()
+
+        self._ai_model_client.get_call_recorder().set_jsonl_filename(
+            f"simulations/{self.name.lower()}/ai_model_calls.jsonl"
+        )
+
+        # Players keep answering their own prompts, so they never queue behind the AI model.
+        for agent in self._agents:
+            if agent.get_is_player():
+                continue
+
+            # Each agent gets its fair share of the backends' rate limits.
+            agent.set_request_response_function(
+                self._ai_model_client.bind(f"{self.name}/{agent.name}")
+            )
+
         # We need to ensure that the memories of each agent exist. If they don't,
         # we need to try to generate them from the 'seed_memories.txt'
         for agent in self._agents:
@@ -114,6 +150,49 @@ class Simulation:
                     self._produce_action_statuses_for_agent_and_sandbox_object_function,
                 )
 
+        self.checkpoint_memories_of_agents()
+        self.log_ai_model_client_statistics()
+
+    def checkpoint_memories_of_agents(self):
+        """Writes the memory stream of every agent to disk. The agents keep their memory
+        streams resident, so new memories and memory accesses only change them in memory;
+        this way each memory stream gets written once per step instead of once per change.
+        The caches get their pending accesses written along with the memories.
+        """
+        for agent in self._agents:
+            checkpoint_agent_memories(agent)
+
+        flush_embedding_cache()
+        flush_response_cache()
+
+    def get_ai_model_call_summary(self):
+        """Returns the summary of the requests to the AI model sent during the last step
+
+        Returns:
+            list[dict]: one entry per call site, the ones that took the longest first
+        """
+        return self._ai_model_call_summary
+
+    def log_ai_model_client_statistics(self):
+        """Logs where the requests to the AI model of the last step came from and what they cost,
+        how many tokens the AI model client has generated so far for each generation profile,
+        how many it was spared by the profiles' caps, how long the requests have been queueing
+        for each backend, how every oobabooga server is performing, how much context the prompt
+        packing has cut, and how many requests shared an identical one's response.
+        """
+        self._ai_model_call_summary = (
+            self._ai_model_client.get_call_recorder().summarize_step()
+        )
+
+        log_debug_message(format_step_summary(self._ai_model_call_summary))
+        log_debug_message(self._ai_model_client.get_token_accounting().format_report())
+        log_debug_message(self._ai_model_client.get_scheduler_metrics())
+        log_debug_message(self._ai_model_client.get_oobabooga_pool_metrics())
+        log_debug_message(get_prompt_packing_statistics().format_report())
+        log_debug_message(
+            f"Deduplicated requests: {self._ai_model_client.get_deduplicated_requests()}"
+        )
+
     def get_environment_tree(self):
         """Returns the simulation's environment tree
 
@@ -213,3 +292,6 @@ class Simulation:
                 agent.notify(
                     {"type": UpdateType.AGENT_CONTINUES_USING_OBJECT, "agent": agent}
                 )
+
+        self.checkpoint_memories_of_agents()
+        self.log_ai_model_client_statistics()
@@ -0,0 +1,76 @@
+"""This module contains the SingleFlight class, which lets concurrent identical calls share a single execution.
+
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time. Whoever asks for a key while its call is still
+    running waits for that call and receives its result (or its exception) instead of running
+    the function again. Once the call finishes, the key is free again.
+
+    The AI model client keys its requests by the backend plus the whole request, so identical
+    requests sent at the same time only reach the backend once, and all of them get its response.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._deduplicated_calls = 0
+
+    def do(self, key, function):
+        """Calls 'function', unless a call for the same key is running already
+
+        Args:
+            key (str): identifies the calls that are interchangeable
+            function (function): receives no arguments, and returns the result
+
+        Returns:
+            object: the result of the function, whether it ran in this thread or in another one
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self._deduplicated_calls += 1
+
+        if not is_leader:
+            call.done.wait()
+
+            if call.exception is not None:
+                raise call.exception
+
+            return call.result
+
+        try:
+            call.result = function()
+        except Exception as exception:
+            call.exception = exception
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.result
+
+    def get_deduplicated_calls(self):
+        """Returns how many calls were served by another call with the same key
+
+        Returns:
+            int: the number of deduplicated calls
+        """
+        with self._lock:
+            return self._deduplicated_calls
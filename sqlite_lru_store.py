@@ -0,0 +1,164 @@
+"""This module contains the SqliteLruStore class, a persistent key-value store that evicts its least recently used entries.
+
+"""
+import os
+import sqlite3
+import threading
+
+# SQLite caps how many parameters a single statement can take.
+_MAX_PARAMETERS_PER_STATEMENT = 500
+
+
+def _keep_value(value):
+    return value
+
+
+class SqliteLruStore:
+    """A table of values keyed by strings, in an SQLite file. Once the table holds more than
+    'max_entries' values, the least recently used ones get evicted.
+
+    The values go through 'encode_function' on their way into the table, and through
+    'decode_function' on their way out. Reads only query the table: the accesses they make
+    get written along with the next write, which is when the eviction order matters, or
+    when the store gets flushed or closed.
+    """
+
+    def __init__(
+        self,
+        filename,
+        table_name,
+        value_column,
+        value_type,
+        max_entries,
+        encode_function=_keep_value,
+        decode_function=_keep_value,
+    ):
+        directory = os.path.dirname(filename)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._table_name = table_name
+        self._value_column = value_column
+        self._max_entries = max_entries
+        self._encode_function = encode_function
+        self._decode_function = decode_function
+
+        self._lock = threading.Lock()
+
+        # The logical time of the accesses that haven't been written yet, by key.
+        self._pending_accesses = {}
+
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name} (key TEXT PRIMARY KEY, {value_column} {value_type} NOT NULL, last_access INTEGER NOT NULL)"
+        )
+        self._connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_last_access ON {table_name} (last_access)"
+        )
+        self._connection.commit()
+
+        # A logical clock that orders the accesses, so ties can't happen on coarse system timers.
+        self._access_clock = self._connection.execute(
+            f"SELECT COALESCE(MAX(last_access), 0) FROM {table_name}"
+        ).fetchone()[0]
+
+    def _tick(self):
+        self._access_clock += 1
+
+        return self._access_clock
+
+    def _write_pending_accesses(self):
+        if self._pending_accesses:
+            self._connection.executemany(
+                f"UPDATE {self._table_name} SET last_access = ? WHERE key = ?",
+                [
+                    (last_access, key)
+                    for key, last_access in self._pending_accesses.items()
+                ],
+            )
+
+            self._pending_accesses = {}
+
+    def get_many(self, keys):
+        """Returns the values stored under several keys, through as few queries as possible
+
+        Args:
+            keys (list[str]): the keys whose values will be retrieved
+
+        Returns:
+            list: the decoded values, in the same order, with None for the keys that aren't stored
+        """
+        unique_keys = list(dict.fromkeys(keys))
+
+        values_by_key = {}
+
+        with self._lock:
+            for start in range(0, len(unique_keys), _MAX_PARAMETERS_PER_STATEMENT):
+                end = start + _MAX_PARAMETERS_PER_STATEMENT
+                chunk = unique_keys[start:end]
+
+                values_by_key.update(
+                    self._connection.execute(
+                        f"SELECT key, {self._value_column} FROM {self._table_name} WHERE key IN ({', '.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+
+            for key in values_by_key:
+                self._pending_accesses[key] = self._tick()
+
+        return [
+            self._decode_function(values_by_key[key]) if key in values_by_key else None
+            for key in keys
+        ]
+
+    def put_many(self, items):
+        """Stores several values, evicting the least recently used entries if necessary
+
+        Args:
+            items (list[tuple]): the keys and their values
+        """
+        with self._lock:
+            self._write_pending_accesses()
+
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO {self._table_name} (key, {self._value_column}, last_access) VALUES (?, ?, ?)",
+                [
+                    (key, self._encode_function(value), self._tick())
+                    for key, value in items
+                ],
+            )
+
+            number_of_entries = self._connection.execute(
+                f"SELECT COUNT(*) FROM {self._table_name}"
+            ).fetchone()[0]
+
+            if number_of_entries > self._max_entries:
+                self._connection.execute(
+                    f"DELETE FROM {self._table_name} WHERE key IN (SELECT key FROM {self._table_name} ORDER BY last_access ASC LIMIT ?)",
+                    (number_of_entries - self._max_entries,),
+                )
+
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT COUNT(*) FROM {self._table_name}"
+            ).fetchone()[0]
+
+    def flush(self):
+        """Writes the accesses that the reads have made since the last write."""
+        with self._lock:
+            self._write_pending_accesses()
+
+            self._connection.commit()
+
+    def close(self):
+        """Writes the pending accesses, and closes the connection to the file."""
+        with self._lock:
+            self._write_pending_accesses()
+
+            self._connection.commit()
+            self._connection.close()
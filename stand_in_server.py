@@ -0,0 +1,235 @@
+"""This module contains a stand-in for the AI model servers, meant for load testing the simulation without a GPU.
+
+It implements the oobabooga '/api/v1/generate' endpoint and the OpenAI chat completions endpoint,
+answering every prompt with a plausible canned response for its type.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OOBABOOGA_GENERATE_PATH = "/api/v1/generate"
+CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+
+
+def create_canned_response(prompt, rng):
+    """Creates a plausible response for the passed prompt, according to what it asks for
+
+    Args:
+        prompt (str): the prompt received by the server
+        rng (random.Random): the random number generator used to vary the responses
+
+    Returns:
+        str: the canned response
+    """
+    batch_rating_match = re.search(r"in the format '<\w+ number>\. <rating>'", prompt)
+
+    if batch_rating_match is not None:
+        numbers = re.findall(r"(?m)^(\d+)\. ", prompt)
+
+        return "\n".join(f"{number}. {rng.randint(1, 10)}" for number in numbers)
+
+    if re.search(r"number from 1 to 10|number in the range \[1, 10\]|Rating:", prompt):
+        return str(rng.randint(1, 10))
+
+    if re.search(r"\byes or no\b", prompt, re.IGNORECASE):
+        return rng.choice(["Yes", "No"])
+
+    action_match = re.search(r"Format: (.+?) is going to <action>", prompt)
+
+    if action_match is not None:
+        activity = rng.choice(["read a book", "take a short walk", "cook lunch"])
+
+        if "for <number> minutes" in prompt:
+            activity += f" for {rng.choice([15, 30, 45, 60])} minutes"
+
+        return f"{action_match.group(1)} is going to {activity}"
+
+    if "For how many minutes" in prompt:
+        return f"{rng.choice([15, 30, 45, 60])} minutes"
+
+    summary_match = re.search(r"saying either '(.+?) is'", prompt)
+
+    if summary_match is not None:
+        return f"{summary_match.group(1)} is friendly, curious and hard-working."
+
+    return "Everything is going according to plan."
+
+
+def create_canned_logprobs(response):
+    """Creates the log probabilities of the first token of a response, as GPT sends them.
+    The whole first word counts as the token, and it's the only one considered.
+
+    Args:
+        response (str): the canned response
+
+    Returns:
+        dict: the 'logprobs' of a chat completion choice
+    """
+    words = response.split()
+    token = words[0] if words else ""
+
+    return {
+        "content": [
+            {
+                "token": token,
+                "logprob": 0.0,
+                "top_logprobs": [{"token": token, "logprob": 0.0}],
+            }
+        ]
+    }
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """Answers the requests posted to a StandInServer."""
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        # The default implementation writes every request to stderr.
+        pass
+
+    def _send_json(self, status_code, body, headers=None):
+        encoded_body = json.dumps(body).encode("utf8")
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded_body)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(encoded_body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handles the generation requests."""
+        if self.path not in (OOBABOOGA_GENERATE_PATH, CHAT_COMPLETIONS_PATH):
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        if self.path == OOBABOOGA_GENERATE_PATH:
+            prompt = request["prompt"]
+        else:
+            prompt = request["messages"][-1]["content"]
+
+        status_code, response = self.server.generate(prompt)
+
+        if status_code != 200:
+            self._send_json(
+                status_code,
+                {"error": "The stand-in server is overloaded."},
+                {"Retry-After": "1"},
+            )
+            return
+
+        if self.path == OOBABOOGA_GENERATE_PATH:
+            self._send_json(200, {"results": [{"text": response}]})
+            return
+
+        choice = {"message": {"role": "assistant", "content": response}}
+
+        if request.get("logprobs"):
+            choice["logprobs"] = create_canned_logprobs(response)
+
+        self._send_json(200, {"choices": [choice]})
+
+
+class StandInServer(ThreadingHTTPServer):
+    """An HTTP server that imitates the AI model backends.
+
+    Every response takes 'latency_seconds', plus up to 'latency_jitter_seconds' more. At most
+    'max_concurrent_requests' responses get generated at the same time, like on a single GPU;
+    the rest wait for their turn. A share 'error_rate' of the requests fails with a 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address,
+        latency_seconds=0.0,
+        latency_jitter_seconds=0.0,
+        max_concurrent_requests=None,
+        error_rate=0.0,
+        seed=None,
+    ):
+        super().__init__(server_address, StandInRequestHandler)
+
+        self._latency_seconds = latency_seconds
+        self._latency_jitter_seconds = latency_jitter_seconds
+        self._error_rate = error_rate
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        self._generation_semaphore = None
+
+        if max_concurrent_requests is not None:
+            self._generation_semaphore = threading.BoundedSemaphore(
+                max_concurrent_requests
+            )
+
+        self._statistics_lock = threading.Lock()
+        self._served_requests = 0
+        self._failed_requests = 0
+
+    def get_url(self, path=OOBABOOGA_GENERATE_PATH):
+        """Returns the URL of one of the endpoints of the server
+
+        Args:
+            path (str, optional): the path of the endpoint. Defaults to OOBABOOGA_GENERATE_PATH.
+
+        Returns:
+            str: the URL of the endpoint
+        """
+        host, port = self.server_address[:2]
+
+        return f"http://{host}:{port}{path}"
+
+    def get_statistics(self):
+        """Returns how many requests the server has answered and failed
+
+        Returns:
+            dict: the served and the failed requests
+        """
+        with self._statistics_lock:
+            return {
+                "served_requests": self._served_requests,
+                "failed_requests": self._failed_requests,
+            }
+
+    def generate(self, prompt):
+        """Generates the canned response to a prompt, taking as long as the server is configured to
+
+        Args:
+            prompt (str): the prompt received
+
+        Returns:
+            tuple: the HTTP status code, and the response (None if it failed)
+        """
+        with self._rng_lock:
+            fails = self._rng.random() < self._error_rate
+            delay = self._latency_seconds + self._rng.uniform(
+                0.0, self._latency_jitter_seconds
+            )
+            response = create_canned_response(prompt, self._rng)
+
+        if fails:
+            with self._statistics_lock:
+                self._failed_requests += 1
+
+            return 503, None
+
+        if self._generation_semaphore is None:
+            time.sleep(delay)
+        else:
+            with self._generation_semaphore:
+                time.sleep(delay)
+
+        with self._statistics_lock:
+            self._served_requests += 1
+
+        return 200, response
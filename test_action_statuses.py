@@ -18,6 +18,7 @@ def fake_create_action_function(
     _update_memories_database_function,
     _request_what_action_to_take_now_function,
     _request_for_what_length_of_time_the_action_should_take_place_function,
+    _request_action_and_its_duration_function=None,
 ):
     return (
         f"{agent.name} is planning to cook a meal at {format_date(current_timestamp)}."
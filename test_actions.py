@@ -7,30 +7,32 @@ from actions import create_action
 
 from agent import Agent
 from location import Location
+from memory_stream import MemoryStream
+from memory_stream_columns import MemoryStreamColumns
 
 
 def fake_load_agent_memories_function(_agent):
-    index = None
-    memories_raw_data = {
-        "0": {
-            "description": "Memory 1",
-            "creation_timestamp": datetime.datetime(2023, 5, 11, 10, 30, 45),
-        },
-        "1": {
-            "description": "Memory 2",
-            "creation_timestamp": datetime.datetime(2023, 5, 11, 10, 30, 45),
-        },
-        "2": {
-            "description": "Memory 3",
-            "creation_timestamp": datetime.datetime(2023, 5, 11, 10, 30, 45),
-        },
-    }
-
-    return index, memories_raw_data
+    timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+    memories_raw_data = MemoryStreamColumns()
+
+    memories_raw_data.append_memories(
+        [
+            {
+                "description": f"Memory {i}",
+                "creation_timestamp": timestamp,
+                "most_recent_access_timestamp": timestamp,
+                "importance": 0.5,
+            }
+            for i in range(1, 4)
+        ]
+    )
+
+    return MemoryStream(None, memories_raw_data)
 
 
 def fake_update_memories_database_function(
-    _agent, _current_timestamp, _new_memories, _index
+    _agent, _current_timestamp, _new_memories, _memory_stream
 ):
     pass
 
@@ -0,0 +1,490 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+
+from api_requests import AiModelClient, parse_retry_after
+from circuit_breaker import CircuitBreaker
+from enums import (
+    CircuitState,
+    GenerationProfile,
+    RequestPriority,
+    ResponseCacheMode,
+)
+from errors import ResponseNotCachedError, UnableToConnectWithAiModelError
+from response_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.text = str(body)
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    def __init__(self):
+        self.headers = {}
+        self.posted_urls = []
+        self.posted_requests = []
+        self.gpt_status_code = 200
+        self.gpt_headers = {}
+        self.oobabooga_status_code = 200
+        self.oobabooga_status_codes_by_url = {}
+        self.oobabooga_headers = {}
+        self.delay = 0
+        self.delays_by_url = {}
+        self.exception = None
+
+    def post(self, url, **kwargs):
+        self.posted_urls.append(url)
+        self.posted_requests.append(kwargs.get("json"))
+
+        if self.exception is not None:
+            raise self.exception
+
+        time.sleep(self.delays_by_url.get(url, self.delay))
+
+        if "chat" in url:
+            return FakeResponse(
+                self.gpt_status_code,
+                {"choices": [{"message": {"content": "gpt response"}}]},
+                self.gpt_headers,
+            )
+
+        return FakeResponse(
+            self.oobabooga_status_codes_by_url.get(url, self.oobabooga_status_code),
+            {"results": [{"text": " oobabooga response "}]},
+            self.oobabooga_headers,
+        )
+
+    def close(self):
+        pass
+
+
+class FakeCreateSessionFunction:
+    def __init__(self):
+        self.sessions = []
+
+    def __call__(self):
+        self.sessions.append(FakeSession())
+
+        return self.sessions[-1]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.delays = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.delays.append(delay)
+        self.now += delay
+
+
+class TestAiModelClient(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.api_key_filename = os.path.join(self.directory.name, "api_key.txt")
+
+        with open(self.api_key_filename, "w", encoding="utf8") as file:
+            file.write("secret\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_every_request_reuses_the_same_session(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False, create_session_function=create_session_function
+        )
+
+        for _ in range(3):
+            self.assertEqual(client("prompt"), "oobabooga response")
+
+        self.assertEqual(len(create_session_function.sessions), 1)
+        self.assertEqual(len(create_session_function.sessions[0].posted_urls), 3)
+
+    def test_api_key_is_loaded_once_into_the_gpt_session(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint="https://gpt/v1/chat/completions",
+            api_key_filename=self.api_key_filename,
+            create_session_function=create_session_function,
+        )
+
+        # Changing the file afterwards shouldn't matter anymore.
+        os.remove(self.api_key_filename)
+
+        self.assertEqual(client("prompt"), "gpt response")
+
+        gpt_session = create_session_function.sessions[1]
+
+        self.assertEqual(gpt_session.headers["Authorization"], "Bearer secret")
+
+    def test_oobabooga_answers_when_gpt_keeps_failing(self):
+        create_session_function = FakeCreateSessionFunction()
+        delays = []
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint="https://gpt/v1/chat/completions",
+            api_key_filename=self.api_key_filename,
+            max_retries=2,
+            sleep_function=delays.append,
+            create_session_function=create_session_function,
+        )
+
+        create_session_function.sessions[1].gpt_status_code = 502
+
+        self.assertEqual(client("prompt"), "oobabooga response")
+
+        self.assertEqual(len(create_session_function.sessions[1].posted_urls), 3)
+        self.assertEqual(len(delays), 2)
+        self.assertEqual(client.get_failure_rates()["gpt"], 1.0)
+
+    def test_retry_after_is_honoured(self):
+        create_session_function = FakeCreateSessionFunction()
+        clock = FakeClock()
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint="https://gpt/v1/chat/completions",
+            api_key_filename=self.api_key_filename,
+            max_retries=1,
+            backoff_max_seconds=8,
+            sleep_function=clock.sleep,
+            create_circuit_breaker_function=lambda: CircuitBreaker(
+                clock_function=clock
+            ),
+            create_session_function=create_session_function,
+        )
+
+        gpt_session = create_session_function.sessions[1]
+        gpt_session.gpt_status_code = 429
+        gpt_session.gpt_headers = {"Retry-After": "3"}
+
+        client("prompt")
+
+        self.assertEqual(clock.delays, [3.0])
+        self.assertEqual(len(gpt_session.posted_urls), 2)
+
+        # Asking for longer than the backoff allows makes the client give up at once.
+        gpt_session.gpt_headers = {"Retry-After": "120"}
+        gpt_session.posted_urls.clear()
+        clock.now += 3
+
+        client("prompt")
+
+        self.assertEqual(clock.delays, [3.0])
+        self.assertEqual(len(gpt_session.posted_urls), 1)
+
+    def test_concurrent_requests_wait_out_a_retry_after(self):
+        create_session_function = FakeCreateSessionFunction()
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(clock_function=clock)
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint="https://gpt/v1/chat/completions",
+            api_key_filename=self.api_key_filename,
+            sleep_function=clock.sleep,
+            create_circuit_breaker_function=lambda: circuit_breaker,
+            create_session_function=create_session_function,
+        )
+
+        # Another request was just asked to wait three seconds.
+        circuit_breaker.record_failure(retry_after=3)
+
+        self.assertEqual(client("prompt"), "gpt response")
+        self.assertEqual(clock.delays, [3.0])
+        self.assertEqual(len(create_session_function.sessions[1].posted_urls), 1)
+
+    def test_an_unexpected_error_during_a_trial_request_releases_the_breaker(self):
+        create_session_function = FakeCreateSessionFunction()
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=1, recovery_seconds=10, clock_function=clock
+        )
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint="https://gpt/v1/chat/completions",
+            api_key_filename=self.api_key_filename,
+            sleep_function=clock.sleep,
+            create_circuit_breaker_function=lambda: circuit_breaker,
+            create_session_function=create_session_function,
+        )
+
+        gpt_session = create_session_function.sessions[1]
+
+        circuit_breaker.record_failure()
+        clock.now += 10
+
+        # The half-open breaker lets this request through as its trial.
+        gpt_session.exception = requests.exceptions.ChunkedEncodingError()
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            client("prompt")
+
+        self.assertEqual(circuit_breaker.get_state(), CircuitState.OPEN)
+
+        gpt_session.exception = None
+        clock.now += 10
+
+        self.assertEqual(client("another prompt"), "gpt response")
+        self.assertEqual(circuit_breaker.get_state(), CircuitState.CLOSED)
+
+    def test_only_requests_that_never_connected_get_retried(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False,
+            max_retries=2,
+            sleep_function=lambda delay: None,
+            create_session_function=create_session_function,
+        )
+
+        session = create_session_function.sessions[0]
+        session.exception = requests.exceptions.ConnectTimeout()
+
+        with self.assertRaises(UnableToConnectWithAiModelError):
+            client("prompt")
+
+        self.assertEqual(len(session.posted_urls), 3)
+
+        # The server may still be generating the response of a request that timed out while reading.
+        session.posted_urls.clear()
+        session.exception = requests.exceptions.ReadTimeout()
+
+        with self.assertRaises(UnableToConnectWithAiModelError):
+            client("another prompt")
+
+        self.assertEqual(len(session.posted_urls), 1)
+
+    def test_a_dead_oobabooga_server_trips_the_circuit_breaker(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False,
+            max_retries=0,
+            create_circuit_breaker_function=lambda: CircuitBreaker(failure_threshold=2),
+            create_session_function=create_session_function,
+        )
+
+        session = create_session_function.sessions[0]
+        session.oobabooga_status_code = 503
+
+        for _ in range(3):
+            with self.assertRaises(UnableToConnectWithAiModelError):
+                client("prompt")
+
+        self.assertEqual(len(session.posted_urls), 2)
+
+    def test_a_server_asking_to_wait_only_blocks_itself(self):
+        create_session_function = FakeCreateSessionFunction()
+        delays = []
+
+        client = AiModelClient(
+            use_gpt=False,
+            oobabooga_api_endpoints=["http://busy/generate", "http://idle/generate"],
+            max_retries=1,
+            sleep_function=delays.append,
+            create_session_function=create_session_function,
+        )
+
+        session = create_session_function.sessions[0]
+        session.oobabooga_status_codes_by_url["http://busy/generate"] = 503
+        session.oobabooga_headers = {"Retry-After": "60"}
+
+        self.assertEqual(client("prompt"), "oobabooga response")
+        self.assertEqual(
+            session.posted_urls, ["http://busy/generate", "http://idle/generate"]
+        )
+
+        # The retry went to the other server after the usual backoff, not after a minute.
+        self.assertEqual(len(delays), 1)
+        self.assertLess(delays[0], 60)
+
+        self.assertEqual(client("another prompt"), "oobabooga response")
+        self.assertEqual(session.posted_urls[-1], "http://idle/generate")
+
+        client.close()
+
+    def test_retry_after_accepts_seconds_and_dates(self):
+        self.assertEqual(parse_retry_after("5"), 5.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_generation_profiles_cap_the_generated_tokens(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False, create_session_function=create_session_function
+        )
+
+        client("Rate it", GenerationProfile.RATING)
+        client("Tell a story")
+
+        session = create_session_function.sessions[0]
+        rating_request, free_text_request = session.posted_requests
+
+        self.assertLess(
+            rating_request["max_new_tokens"], free_text_request["max_new_tokens"]
+        )
+        self.assertEqual(rating_request["stopping_strings"], ["\n"])
+        self.assertEqual(free_text_request["stopping_strings"], [])
+
+        summary = client.get_token_accounting().get_summary()
+
+        self.assertEqual(summary["RATING"]["requests"], 1)
+        self.assertGreater(summary["RATING"]["saved_tokens"], 0)
+        self.assertEqual(summary["FREE_TEXT"]["saved_tokens"], 0)
+        self.assertGreater(summary["FREE_TEXT"]["generated_tokens"], 0)
+
+    def test_bound_clients_schedule_their_requests_on_behalf_of_their_owner(self):
+        schedules = []
+
+        class FakeRequestScheduler:
+            def acquire(self, **kwargs):
+                schedules.append(kwargs)
+
+        client = AiModelClient(
+            use_gpt=False,
+            get_request_scheduler_function=lambda *_args: FakeRequestScheduler(),
+            create_session_function=FakeCreateSessionFunction(),
+        )
+
+        request_response_function = client.bind("Aileen", RequestPriority.HIGH)
+
+        self.assertEqual(request_response_function("prompt"), "oobabooga response")
+        self.assertEqual(schedules[0]["owner"], "Aileen")
+        self.assertEqual(schedules[0]["priority"], RequestPriority.HIGH)
+        self.assertGreater(schedules[0]["tokens"], 0)
+
+    def test_identical_concurrent_requests_reach_the_backend_once(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False, create_session_function=create_session_function
+        )
+
+        session = create_session_function.sessions[0]
+        session.delay = 0.2
+
+        responses = []
+
+        threads = [
+            threading.Thread(target=lambda: responses.append(client("prompt")))
+            for _ in range(3)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(responses, ["oobabooga response"] * 3)
+        self.assertEqual(len(session.posted_urls), 1)
+        self.assertEqual(client.get_deduplicated_requests(), 2)
+
+    def test_slow_requests_get_hedged_to_another_server(self):
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False,
+            oobabooga_api_endpoints=["http://slow/generate", "http://fast/generate"],
+            create_session_function=create_session_function,
+        )
+
+        session = create_session_function.sessions[0]
+
+        # The first server answers the warm-up requests on its own, until its latencies are known.
+        for i in range(30):
+            client(f"warm-up {i}")
+
+        session.delays_by_url["http://slow/generate"] = 1.0
+
+        start = time.monotonic()
+
+        self.assertEqual(client("prompt"), "oobabooga response")
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        self.assertEqual(session.posted_urls[-1], "http://fast/generate")
+        self.assertEqual(
+            client.get_oobabooga_pool_metrics()["http://slow/generate"][
+                "hedged_requests"
+            ],
+            1,
+        )
+
+        client.close()
+
+    def test_recorded_responses_are_served_from_the_cache(self):
+        create_session_function = FakeCreateSessionFunction()
+        response_cache = ResponseCache(
+            os.path.join(self.directory.name, "response_cache.db")
+        )
+
+        client = AiModelClient(
+            use_gpt=False,
+            create_session_function=create_session_function,
+            response_cache_mode=ResponseCacheMode.RECORD,
+            response_cache=response_cache,
+        )
+
+        self.assertEqual(client("prompt"), "oobabooga response")
+        self.assertEqual(client("prompt"), "oobabooga response")
+
+        self.assertEqual(len(create_session_function.sessions[0].posted_urls), 1)
+        self.assertEqual(len(response_cache), 1)
+
+        response_cache.close()
+
+    def test_replaying_never_contacts_the_ai_model(self):
+        response_cache = ResponseCache(
+            os.path.join(self.directory.name, "response_cache.db")
+        )
+
+        AiModelClient(
+            use_gpt=False,
+            create_session_function=FakeCreateSessionFunction(),
+            response_cache_mode=ResponseCacheMode.RECORD,
+            response_cache=response_cache,
+        )("recorded prompt")
+
+        create_session_function = FakeCreateSessionFunction()
+
+        client = AiModelClient(
+            use_gpt=False,
+            create_session_function=create_session_function,
+            response_cache_mode=ResponseCacheMode.REPLAY,
+            response_cache=response_cache,
+        )
+
+        self.assertEqual(client("recorded prompt"), "oobabooga response")
+
+        with self.assertRaises(ResponseNotCachedError):
+            client("another prompt")
+
+        self.assertEqual(create_session_function.sessions[0].posted_urls, [])
+
+        response_cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
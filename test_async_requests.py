@@ -0,0 +1,63 @@
+import threading
+import time
+import unittest
+
+from api_requests import request_response_from_human
+from async_requests import (
+    get_max_concurrent_requests,
+    request_responses_concurrently,
+)
+
+
+class FakeRequestResponseFunction:
+    def __init__(self, max_concurrent_requests):
+        self._max_concurrent_requests = max_concurrent_requests
+        self._lock = threading.Lock()
+        self._requests_in_flight = 0
+
+        self.max_requests_in_flight = 0
+
+    def get_max_concurrent_requests(self):
+        return self._max_concurrent_requests
+
+    def __call__(self, prompt, generation_profile=None):
+        with self._lock:
+            self._requests_in_flight += 1
+            self.max_requests_in_flight = max(
+                self.max_requests_in_flight, self._requests_in_flight
+            )
+
+        time.sleep(0.05)
+
+        with self._lock:
+            self._requests_in_flight -= 1
+
+        return f"response to {prompt}"
+
+
+class TestAsyncRequests(unittest.TestCase):
+    def test_responses_come_back_in_the_order_of_the_prompts(self):
+        prompts = [f"prompt {i}" for i in range(6)]
+
+        responses = request_responses_concurrently(
+            FakeRequestResponseFunction(3), prompts
+        )
+
+        self.assertEqual(responses, [f"response to {prompt}" for prompt in prompts])
+
+    def test_requests_are_sent_concurrently_up_to_the_limit(self):
+        request_response_function = FakeRequestResponseFunction(3)
+
+        request_responses_concurrently(
+            request_response_function, [f"prompt {i}" for i in range(9)]
+        )
+
+        self.assertGreater(request_response_function.max_requests_in_flight, 1)
+        self.assertLessEqual(request_response_function.max_requests_in_flight, 3)
+
+    def test_humans_answer_one_prompt_at_a_time(self):
+        self.assertEqual(get_max_concurrent_requests(request_response_from_human), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
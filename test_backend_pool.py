@@ -0,0 +1,102 @@
+import unittest
+
+from backend_pool import BackendPool, calculate_percentile
+from circuit_breaker import CircuitBreaker
+
+
+class TestBackendPool(unittest.TestCase):
+    def test_requests_go_to_the_server_with_the_fewest_outstanding_requests(self):
+        backend_pool = BackendPool(["first", "second"], 25)
+
+        first_endpoint = backend_pool.acquire_endpoint()
+        second_endpoint = backend_pool.acquire_endpoint()
+
+        self.assertEqual([first_endpoint.url, second_endpoint.url], ["first", "second"])
+
+        backend_pool.release_endpoint(second_endpoint, 0.1)
+
+        self.assertEqual(backend_pool.acquire_endpoint().url, "second")
+
+    def test_unhealthy_servers_are_skipped(self):
+        backend_pool = BackendPool(
+            ["first", "second"],
+            25,
+            lambda: CircuitBreaker(failure_threshold=1),
+        )
+
+        backend_pool.release_endpoint(backend_pool.acquire_endpoint())
+
+        second_endpoint = backend_pool.acquire_endpoint()
+
+        self.assertEqual(second_endpoint.url, "second")
+
+        backend_pool.release_endpoint(second_endpoint)
+
+        self.assertIsNone(backend_pool.acquire_endpoint())
+
+    def test_hedging_and_timeouts_adapt_to_the_latencies(self):
+        backend_pool = BackendPool(["first", "second"], 25, min_samples=10)
+
+        endpoint = backend_pool.acquire_endpoint()
+        backend_pool.release_endpoint(endpoint, 0.5)
+
+        self.assertIsNone(backend_pool.get_hedge_delay(endpoint))
+        self.assertEqual(backend_pool.get_read_timeout(endpoint), 25)
+
+        for latency in [0.1] * 18 + [0.5, 2.0]:
+            backend_pool.acquire_endpoint()
+            backend_pool.release_endpoint(endpoint, latency)
+
+        self.assertEqual(backend_pool.get_hedge_delay(endpoint), 0.5)
+        self.assertEqual(backend_pool.get_read_timeout(endpoint), 8.0)
+
+    def test_short_requests_dont_shorten_the_timeout_of_long_ones(self):
+        backend_pool = BackendPool(["first", "second"], 25, min_samples=10)
+
+        endpoint = backend_pool.acquire_endpoint()
+        backend_pool.release_endpoint(endpoint, 0.1, 1)
+
+        # Ratings take a tenth of a second, and they fill their latency window.
+        for _ in range(200):
+            backend_pool.acquire_endpoint()
+            backend_pool.release_endpoint(endpoint, 0.1, 1)
+
+        self.assertEqual(backend_pool.get_read_timeout(endpoint, 1), 5)
+        self.assertEqual(backend_pool.get_hedge_delay(endpoint, 1), 0.1)
+
+        # Summaries have no samples yet, so they get the whole timeout and never get hedged.
+        self.assertEqual(backend_pool.get_read_timeout(endpoint, 2000), 25)
+        self.assertIsNone(backend_pool.get_hedge_delay(endpoint, 2000))
+
+        for latency in [3.0] * 19 + [5.0]:
+            backend_pool.acquire_endpoint()
+            backend_pool.release_endpoint(endpoint, latency, 2000)
+
+        self.assertEqual(backend_pool.get_read_timeout(endpoint, 2000), 20.0)
+        self.assertEqual(backend_pool.get_hedge_delay(endpoint, 2000), 3.0)
+        self.assertEqual(backend_pool.get_read_timeout(endpoint, 1), 5)
+
+    def test_single_servers_keep_the_whole_read_timeout(self):
+        backend_pool = BackendPool(["only"], 25, min_samples=1)
+
+        endpoint = backend_pool.acquire_endpoint()
+        backend_pool.release_endpoint(endpoint, 0.1)
+
+        self.assertEqual(backend_pool.get_read_timeout(endpoint), 25)
+
+    def test_single_servers_never_get_hedged(self):
+        backend_pool = BackendPool(["only"], 25, min_samples=1)
+
+        endpoint = backend_pool.acquire_endpoint()
+        backend_pool.release_endpoint(endpoint, 0.1)
+
+        self.assertIsNone(backend_pool.get_hedge_delay(endpoint))
+
+    def test_percentiles_use_the_nearest_rank(self):
+        self.assertIsNone(calculate_percentile([], 50))
+        self.assertEqual(calculate_percentile([3, 1, 2], 50), 2)
+        self.assertEqual(calculate_percentile(list(range(101)), 95), 95)
+
+
+if __name__ == "__main__":
+    unittest.main()
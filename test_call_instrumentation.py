@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+import unittest
+
+from api_requests import AiModelClient
+from async_requests import request_responses_concurrently
+from call_instrumentation import (
+    UNKNOWN_CALL_SITE,
+    CallRecorder,
+    format_step_summary,
+    get_call_site,
+    tag_call_site,
+)
+from enums import ResponseCacheMode
+from errors import UnableToConnectWithAiModelError
+from response_cache import ResponseCache
+from test_ai_model_client import FakeClock, FakeCreateSessionFunction
+
+
+@tag_call_site
+def request_ratings(request_response_function, prompts):
+    return request_responses_concurrently(request_response_function, prompts)
+
+
+def create_call_record(call_site, wall_seconds, cache_hit=False, retries=0):
+    return {
+        "call_site": call_site,
+        "wall_seconds": wall_seconds,
+        "prompt_tokens": 10,
+        "completion_characters": 4,
+        "cache_hit": cache_hit,
+        "retries": retries,
+    }
+
+
+class TestCallInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_the_call_site_follows_the_requests_into_the_worker_threads(self):
+        call_sites = []
+
+        def request_response_function(prompt, generation_profile=None):
+            call_sites.append(get_call_site())
+
+            return prompt
+
+        self.assertEqual(
+            request_ratings(request_response_function, ["a", "b", "c"]),
+            ["a", "b", "c"],
+        )
+        self.assertEqual(call_sites, ["test_call_instrumentation.request_ratings"] * 3)
+        self.assertEqual(get_call_site(), UNKNOWN_CALL_SITE)
+
+    def test_the_step_summary_ranks_the_call_sites_by_wall_time(self):
+        recorder = CallRecorder()
+
+        recorder.record(create_call_record("fast", 0.5))
+        recorder.record(create_call_record("slow", 2.0, retries=2))
+        recorder.record(create_call_record("fast", 0.5, cache_hit=True))
+
+        step_summary = recorder.summarize_step()
+
+        self.assertEqual(
+            [summary["call_site"] for summary in step_summary], ["slow", "fast"]
+        )
+        self.assertEqual(step_summary[1]["calls"], 2)
+        self.assertEqual(step_summary[1]["wall_seconds"], 1.0)
+        self.assertEqual(step_summary[1]["prompt_tokens"], 20)
+        self.assertEqual(step_summary[1]["cache_hits"], 1)
+        self.assertEqual(step_summary[0]["retries"], 2)
+        self.assertIn("slow: 1 calls", format_step_summary(step_summary))
+
+        # The next step starts empty.
+        self.assertEqual(recorder.summarize_step(), [])
+
+    def test_every_record_is_appended_to_the_jsonl_file(self):
+        jsonl_filename = os.path.join(self.directory.name, "logs", "calls.jsonl")
+        recorder = CallRecorder(jsonl_filename)
+
+        recorder.record(create_call_record("first", 1.0))
+        recorder.summarize_step()
+        recorder.record(create_call_record("second", 1.0))
+
+        with open(jsonl_filename, encoding="utf8") as file:
+            call_records = [json.loads(line) for line in file]
+
+        self.assertEqual(
+            [(record["step"], record["call_site"]) for record in call_records],
+            [(0, "first"), (1, "second")],
+        )
+
+    def test_the_client_records_cache_hits_and_retries(self):
+        create_session_function = FakeCreateSessionFunction()
+        clock = FakeClock()
+        recorder = CallRecorder()
+
+        client = AiModelClient(
+            use_gpt=False,
+            max_retries=1,
+            sleep_function=clock.sleep,
+            response_cache_mode=ResponseCacheMode.RECORD,
+            response_cache=ResponseCache(
+                os.path.join(self.directory.name, "cache.sqlite")
+            ),
+            call_recorder=recorder,
+            create_session_function=create_session_function,
+        )
+
+        oobabooga_session = create_session_function.sessions[0]
+        oobabooga_session.oobabooga_status_code = 500
+
+        @tag_call_site
+        def request_rating(prompt):
+            return client(prompt)
+
+        with self.assertRaises(UnableToConnectWithAiModelError):
+            request_rating("prompt")
+
+        oobabooga_session.oobabooga_status_code = 200
+
+        request_rating("prompt")
+        request_rating("prompt")
+
+        step_summary = recorder.summarize_step()
+
+        self.assertEqual(len(step_summary), 1)
+        self.assertEqual(step_summary[0]["calls"], 3)
+        self.assertEqual(step_summary[0]["cache_hits"], 1)
+        self.assertEqual(step_summary[0]["retries"], 1)
+
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
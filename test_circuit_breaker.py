@@ -0,0 +1,97 @@
+import unittest
+
+from circuit_breaker import CircuitBreaker
+from enums import CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=3, recovery_seconds=10, clock_function=self.clock
+        )
+
+    def test_consecutive_failures_open_the_breaker(self):
+        for _ in range(2):
+            self.circuit_breaker.record_failure()
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+        self.circuit_breaker.record_failure()
+
+        self.assertEqual(self.circuit_breaker.get_state(), CircuitState.OPEN)
+        self.assertFalse(self.circuit_breaker.allow_request())
+
+    def test_a_single_trial_request_goes_through_after_recovering(self):
+        for _ in range(3):
+            self.circuit_breaker.record_failure()
+
+        self.clock.now = 10
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+        self.assertFalse(self.circuit_breaker.allow_request())
+
+        self.circuit_breaker.record_failure()
+
+        self.assertEqual(self.circuit_breaker.get_state(), CircuitState.OPEN)
+
+        self.clock.now = 20
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+        self.circuit_breaker.record_success()
+
+        self.assertEqual(self.circuit_breaker.get_state(), CircuitState.CLOSED)
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+    def test_retry_after_delays_the_requests_instead_of_rejecting_them(self):
+        self.circuit_breaker.record_failure(retry_after=2)
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+        self.assertEqual(self.circuit_breaker.get_retry_delay(), 2)
+
+        self.clock.now = 1.5
+
+        self.assertEqual(self.circuit_breaker.get_retry_delay(), 0.5)
+
+        self.clock.now = 2
+
+        self.assertEqual(self.circuit_breaker.get_retry_delay(), 0.0)
+
+    def test_an_opening_breaker_stays_open_as_long_as_the_backend_asked(self):
+        for _ in range(2):
+            self.circuit_breaker.record_failure()
+
+        self.circuit_breaker.record_failure(retry_after=60)
+
+        self.assertEqual(self.circuit_breaker.get_state(), CircuitState.OPEN)
+
+        self.clock.now = 30
+
+        self.assertFalse(self.circuit_breaker.allow_request())
+
+        self.clock.now = 60
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+    def test_failure_rate_covers_the_most_recent_outcomes(self):
+        self.assertEqual(self.circuit_breaker.get_failure_rate(), 0.0)
+
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_success()
+
+        self.assertEqual(self.circuit_breaker.get_failure_rate(), 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
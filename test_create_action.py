@@ -4,19 +4,19 @@ import unittest
 from anytree import Node
 from actions import create_action
 from agent import Agent
+from enums import ActionMode
 from location import Location
+from memory_stream import MemoryStream
+from memory_stream_columns import MemoryStreamColumns
 from sandbox_object import SandboxObject
 
 
 def fake_load_agent_memories_function(_agent):
-    index = None
-    memories_raw_data = {}
-
-    return index, memories_raw_data
+    return MemoryStream(None, MemoryStreamColumns())
 
 
 def fake_update_memories_database_function(
-    _agent, _current_timestamp, _actions, _index
+    _agent, _current_timestamp, _actions, _memory_stream
 ):
     pass
 
@@ -33,6 +33,38 @@ def fake_request_for_what_length_of_time_the_action_should_take_place_function(
     return "length of time"
 
 
+class FakeRequestActionAndItsDurationFunction:
+    def __init__(self, action, duration_in_minutes):
+        self.action = action
+        self.duration_in_minutes = duration_in_minutes
+        self.calls = 0
+
+    def __call__(self, _agent, _current_timestamp, _most_recent_memories):
+        self.calls += 1
+
+        return self.action, self.duration_in_minutes
+
+
+class FakeSeparateRequestFunction:
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+
+        return self.function(*args)
+
+
+def create_agent():
+    town = Node(Location("town", "town", "a quaint town"))
+
+    agent = Agent("Aileen", 22, town, town)
+    agent.set_character_summary("character summary")
+
+    return agent
+
+
 class TestCreateAction(unittest.TestCase):
     def test_after_creating_action_agent_gets_wiped_of_previous_action_attribute_values(
         self,
@@ -72,6 +104,87 @@ class TestCreateAction(unittest.TestCase):
         self.assertEqual(agent.get_destination_node(), None)
         self.assertEqual(agent.get_using_object(), None)
 
+    def test_combined_mode_requests_action_and_duration_at_once(self):
+        agent = create_agent()
+        current_timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+        request_action_and_its_duration_function = (
+            FakeRequestActionAndItsDurationFunction("Aileen is going to read", 45)
+        )
+        request_what_action_to_take_now_function = FakeSeparateRequestFunction(
+            fake_request_what_action_to_take_now_function
+        )
+        request_length_of_time_function = FakeSeparateRequestFunction(
+            fake_request_for_what_length_of_time_the_action_should_take_place_function
+        )
+
+        action = create_action(
+            agent,
+            current_timestamp,
+            fake_load_agent_memories_function,
+            fake_update_memories_database_function,
+            request_what_action_to_take_now_function,
+            request_length_of_time_function,
+            request_action_and_its_duration_function,
+            ActionMode.COMBINED,
+        )
+
+        self.assertTrue(action.endswith("Aileen is going to read for 45 minutes"))
+        self.assertEqual(agent.get_planned_action_duration(), 45)
+        self.assertEqual(request_action_and_its_duration_function.calls, 1)
+        self.assertEqual(request_what_action_to_take_now_function.calls, 0)
+        self.assertEqual(request_length_of_time_function.calls, 0)
+
+    def test_combined_mode_requests_separately_what_the_response_lacked(self):
+        agent = create_agent()
+        current_timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+        request_what_action_to_take_now_function = FakeSeparateRequestFunction(
+            fake_request_what_action_to_take_now_function
+        )
+        request_length_of_time_function = FakeSeparateRequestFunction(
+            lambda *_args: "20 minutes"
+        )
+
+        action = create_action(
+            agent,
+            current_timestamp,
+            fake_load_agent_memories_function,
+            fake_update_memories_database_function,
+            request_what_action_to_take_now_function,
+            request_length_of_time_function,
+            FakeRequestActionAndItsDurationFunction("Aileen is going to read", None),
+            ActionMode.COMBINED,
+        )
+
+        self.assertTrue(action.endswith("Aileen is going to read 20 minutes"))
+        self.assertEqual(agent.get_planned_action_duration(), 20)
+        self.assertEqual(request_what_action_to_take_now_function.calls, 0)
+        self.assertEqual(request_length_of_time_function.calls, 1)
+
+    def test_separate_mode_ignores_the_combined_request(self):
+        agent = create_agent()
+        current_timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+        request_action_and_its_duration_function = (
+            FakeRequestActionAndItsDurationFunction("Aileen is going to read", 45)
+        )
+
+        action = create_action(
+            agent,
+            current_timestamp,
+            fake_load_agent_memories_function,
+            fake_update_memories_database_function,
+            fake_request_what_action_to_take_now_function,
+            fake_request_for_what_length_of_time_the_action_should_take_place_function,
+            request_action_and_its_duration_function,
+            ActionMode.SEPARATE,
+        )
+
+        self.assertTrue(action.endswith("action to take length of time"))
+        self.assertIsNone(agent.get_planned_action_duration())
+        self.assertEqual(request_action_and_its_duration_function.calls, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+
+from anytree import Node
+from agent import Agent
+from enums import GenerationProfile, RatingMode
+from location import Location
+from scoring import (
+    determine_highest_scoring_node,
+    request_ratings_from_agent_for_location_nodes,
+)
+
+
+class FakeRequestResponseFunction:
+    def get_max_concurrent_requests(self):
+        return 4
+
+    def __call__(self, _prompt, generation_profile=None):
+        return "5"
+
+
+class FakeRequestRatingFunction:
+    def __init__(self, ratings):
+        self._ratings = ratings
+        self._lock = threading.Lock()
+        self._requests_in_flight = 0
+
+        self.max_requests_in_flight = 0
+
+    def __call__(self, _agent, node):
+        with self._lock:
+            self._requests_in_flight += 1
+            self.max_requests_in_flight = max(
+                self.max_requests_in_flight, self._requests_in_flight
+            )
+
+        time.sleep(0.05)
+
+        with self._lock:
+            self._requests_in_flight -= 1
+
+        return self._ratings[node.name.name]
+
+
+class TestDetermineHighestScoringNode(unittest.TestCase):
+    def setUp(self):
+        self.town = Node(Location("town", "town", "a quaint town"))
+
+        for name in ["bakery", "park", "library", "school"]:
+            Node(Location(name, name, name), parent=self.town)
+
+        self.agent = Agent("Aileen", 22, self.town, self.town)
+        self.agent.set_planned_action("read a book", silent=True)
+        self.agent.set_request_response_function(FakeRequestResponseFunction())
+
+    def test_candidates_get_rated_concurrently(self):
+        request_rating_function = FakeRequestRatingFunction(
+            {"bakery": 2, "park": 4, "library": 9, "school": 6}
+        )
+
+        node = determine_highest_scoring_node(
+            self.agent, self.town.children, request_rating_function
+        )
+
+        self.assertEqual(node.name.name, "library")
+        self.assertGreater(request_rating_function.max_requests_in_flight, 1)
+
+    def test_ties_go_to_the_first_candidate(self):
+        request_rating_function = FakeRequestRatingFunction(
+            {"bakery": 3, "park": 8, "library": 8, "school": 8}
+        )
+
+        node = determine_highest_scoring_node(
+            self.agent, self.town.children, request_rating_function
+        )
+
+        self.assertEqual(node.name.name, "park")
+
+    def test_batch_mode_rates_every_candidate_through_a_single_prompt(self):
+        prompts = []
+        generation_profiles = []
+
+        def fake_request_response_function(prompt, generation_profile):
+            prompts.append(prompt)
+            generation_profiles.append(generation_profile)
+
+            return "1. 2\n2. 9\n3. 4\n4. 6"
+
+        self.agent.set_character_summary("Aileen is a student.", silent=True)
+        self.agent.set_request_response_function(fake_request_response_function)
+
+        node = determine_highest_scoring_node(
+            self.agent,
+            self.town.children,
+            FakeRequestRatingFunction({}),
+            request_ratings_from_agent_for_location_nodes,
+            RatingMode.BATCH,
+        )
+
+        self.assertEqual(node.name.name, "park")
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(prompts[0].count("Aileen is a student."), 1)
+        self.assertEqual(generation_profiles, [GenerationProfile.BATCH_RATING])
+
+
+if __name__ == "__main__":
+    unittest.main()
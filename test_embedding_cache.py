@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.encoded_texts = []
+
+    def encode(self, texts):
+        self.encoded_texts.append(list(texts))
+
+        return [np.full(4, len(text), dtype=np.float64) for text in texts]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "embedding_cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_repeated_texts_are_only_encoded_once(self):
+        cache = EmbeddingCache(self.filename, "model")
+        encoder = FakeEncoder()
+
+        cache.get_or_encode(["one", "three"], encoder.encode)
+        vectors = cache.get_or_encode(["three", "five", "five"], encoder.encode)
+
+        self.assertEqual(encoder.encoded_texts, [["one", "three"], ["five"]])
+        self.assertEqual(len(vectors), 3)
+        self.assertEqual(vectors[0].dtype, np.float32)
+        self.assertTrue(np.array_equal(vectors[1], np.full(4, 4, dtype=np.float32)))
+
+        cache.close()
+
+    def test_cached_embeddings_persist_between_instances(self):
+        cache = EmbeddingCache(self.filename, "model")
+        cache.get_or_encode(["persisted"], FakeEncoder().encode)
+        cache.close()
+
+        cache = EmbeddingCache(self.filename, "model")
+
+        self.assertIsNotNone(cache.get("persisted"))
+
+        cache.close()
+
+    def test_embeddings_of_different_models_dont_collide(self):
+        cache = EmbeddingCache(self.filename, "model")
+        cache.get_or_encode(["text"], FakeEncoder().encode)
+        cache.close()
+
+        cache = EmbeddingCache(self.filename, "another model")
+
+        self.assertIsNone(cache.get("text"))
+
+        cache.close()
+
+    def test_many_embeddings_get_looked_up_at_once(self):
+        cache = EmbeddingCache(self.filename, "model", max_entries=3)
+        encoder = FakeEncoder()
+
+        cache.get_or_encode(["a", "bb", "ccc"], encoder.encode)
+
+        vectors = cache.get_many(["ccc", "missing", "a", "ccc"])
+
+        self.assertEqual(
+            [vector is None for vector in vectors], [False, True, False, False]
+        )
+        self.assertTrue(np.array_equal(vectors[0], np.full(4, 3, dtype=np.float32)))
+        self.assertTrue(np.array_equal(vectors[2], np.full(4, 1, dtype=np.float32)))
+
+        # The lookup touched 'ccc' and 'a', which leaves 'bb' as the least recently used entry.
+        cache.get_or_encode(["dddd"], encoder.encode)
+
+        self.assertIsNone(cache.get("bb"))
+        self.assertIsNotNone(cache.get("a"))
+
+        cache.close()
+
+    def test_least_recently_used_embeddings_get_evicted(self):
+        cache = EmbeddingCache(self.filename, "model", max_entries=2)
+        encoder = FakeEncoder()
+
+        cache.get_or_encode(["a"], encoder.encode)
+        cache.get_or_encode(["bb"], encoder.encode)
+
+        # Touching 'a' makes 'bb' the least recently used entry.
+        cache.get("a")
+
+        cache.get_or_encode(["ccc"], encoder.encode)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("bb"))
+        self.assertIsNotNone(cache.get("ccc"))
+
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
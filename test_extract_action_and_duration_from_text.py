@@ -0,0 +1,92 @@
+import unittest
+
+from regular_expression_utils import (
+    extract_action_and_duration_from_text,
+    extract_duration_in_minutes_from_text,
+)
+
+
+class TestCanExtractActionAndDurationFromText(unittest.TestCase):
+    def test_can_extract_action_and_duration_in_the_requested_format(self):
+        self.assertEqual(
+            extract_action_and_duration_from_text(
+                "Aileen is going to read a book for 45 minutes."
+            ),
+            ("Aileen is going to read a book", 45),
+        )
+
+    def test_can_extract_durations_written_in_other_ways(self):
+        self.assertEqual(
+            extract_action_and_duration_from_text(
+                "Aileen is going to cook lunch for about 1 hour and 30 minutes\nShe is hungry."
+            ),
+            ("Aileen is going to cook lunch", 90),
+        )
+        self.assertEqual(
+            extract_action_and_duration_from_text(
+                "Aileen is going to take a nap (half an hour)"
+            ),
+            ("Aileen is going to take a nap", 30),
+        )
+        self.assertEqual(
+            extract_action_and_duration_from_text(
+                "Aileen is going to have a snack - 15 mins"
+            ),
+            ("Aileen is going to have a snack", 15),
+        )
+
+    def test_only_the_duration_introduced_by_the_last_for_counts(self):
+        self.assertEqual(
+            extract_action_and_duration_from_text(
+                "read for 30 minutes (about half an hour)"
+            ),
+            ("read", 30),
+        )
+        self.assertEqual(
+            extract_action_and_duration_from_text(
+                "take a shower for 15 minutes, then eat breakfast for 20 minutes"
+            ),
+            ("take a shower for 15 minutes, then eat breakfast", 20),
+        )
+
+    def test_durations_that_describe_something_else_are_ignored(self):
+        self.assertEqual(
+            extract_action_and_duration_from_text("watch an hour-long documentary"),
+            ("watch an hour-long documentary", None),
+        )
+
+    def test_half_hours_get_added(self):
+        self.assertEqual(
+            extract_action_and_duration_from_text("nap for an hour and a half"),
+            ("nap", 90),
+        )
+        self.assertEqual(
+            extract_action_and_duration_from_text("rest for one and a half hours"),
+            ("rest", 90),
+        )
+
+    def test_numbers_in_the_action_arent_taken_for_a_duration(self):
+        self.assertEqual(
+            extract_action_and_duration_from_text("Aileen is going to go to room 2."),
+            ("Aileen is going to go to room 2", None),
+        )
+
+    def test_failed_request_has_neither_action_nor_duration(self):
+        self.assertEqual(extract_action_and_duration_from_text(None), (None, None))
+        self.assertEqual(
+            extract_action_and_duration_from_text("for 20 minutes"), (None, 20)
+        )
+
+    def test_can_extract_duration_from_an_answer_to_how_many_minutes(self):
+        self.assertEqual(extract_duration_in_minutes_from_text("30 minutes"), 30)
+        self.assertEqual(extract_duration_in_minutes_from_text("2 hours"), 120)
+        self.assertEqual(extract_duration_in_minutes_from_text("About 20."), 20)
+        self.assertEqual(
+            extract_duration_in_minutes_from_text("30 minutes (about half an hour)"), 30
+        )
+        self.assertIsNone(extract_duration_in_minutes_from_text("a while"))
+        self.assertIsNone(extract_duration_in_minutes_from_text(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
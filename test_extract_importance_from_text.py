@@ -16,6 +16,11 @@ class TestCanExtractImportanceFromText(unittest.TestCase):
 
         self.assertEqual(importance, 5)
 
+    def test_failed_request_gets_the_default_rating(self):
+        importance = extract_rating_from_text(None, "prompt", silent=True)
+
+        self.assertEqual(importance, 5)
+
 
 if __name__ == "__main__":
     unittest.main()
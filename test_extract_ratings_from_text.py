@@ -0,0 +1,37 @@
+import unittest
+
+from regular_expression_utils import extract_ratings_from_text
+
+
+class TestCanExtractRatingsFromText(unittest.TestCase):
+    def setUp(self):
+        self.item_names = ["bed", "bedroom", "room 2"]
+
+    def test_can_extract_ratings_from_numbered_lines(self):
+        text = "1. Bed: 7\n2) 3\n3. Room 2 - 9/10"
+
+        ratings = extract_ratings_from_text(
+            text, self.item_names, "prompt", silent=True
+        )
+
+        self.assertEqual(ratings, [7, 3, 9])
+
+    def test_can_extract_ratings_from_lines_that_name_the_items(self):
+        text = "Ratings:\n- Bedroom: 8\n- bed, 2"
+
+        ratings = extract_ratings_from_text(
+            text, self.item_names, "prompt", silent=True
+        )
+
+        self.assertEqual(ratings, [2, 8, 5])
+
+    def test_missing_items_get_the_default_rating(self):
+        ratings = extract_ratings_from_text(
+            "I don't know.", self.item_names, "prompt", silent=True
+        )
+
+        self.assertEqual(ratings, [5, 5, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import datetime
+import unittest
+
+from memories_querying import get_memories_in_time_window, get_most_recent_memories
+from memory_stream_columns import MemoryStreamColumns
+
+
+def create_memory_stream_columns(timestamps):
+    memory_stream_columns = MemoryStreamColumns()
+
+    memory_stream_columns.append_memories(
+        [
+            {
+                "description": f"Memory {i}",
+                "creation_timestamp": timestamp,
+                "most_recent_access_timestamp": timestamp,
+                "importance": 0.5,
+            }
+            for i, timestamp in enumerate(timestamps)
+        ]
+    )
+
+    return memory_stream_columns
+
+
+class TestGetMostRecentMemories(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime.datetime(2023, 5, 11, 8, 0, 0)
+
+        # One memory every half an hour, from 8:00 to 12:30.
+        self.memories_raw_data = create_memory_stream_columns(
+            [self.start + datetime.timedelta(minutes=30 * i) for i in range(10)]
+        )
+
+    def get_descriptions(self, memories):
+        return [memory["description"] for memory in memories]
+
+    def test_returns_the_memories_closest_to_the_target_timestamp(self):
+        memories = get_most_recent_memories(
+            self.start + datetime.timedelta(hours=5), 3, self.memories_raw_data
+        )
+
+        self.assertEqual(
+            self.get_descriptions(memories), ["Memory 9", "Memory 8", "Memory 7"]
+        )
+
+    def test_considers_memories_on_both_sides_of_the_target_timestamp(self):
+        memories = get_most_recent_memories(
+            self.start + datetime.timedelta(hours=2, minutes=10),
+            3,
+            self.memories_raw_data,
+        )
+
+        self.assertEqual(
+            self.get_descriptions(memories), ["Memory 4", "Memory 5", "Memory 3"]
+        )
+
+    def test_out_of_order_memories_get_sorted_by_creation_timestamp(self):
+        self.memories_raw_data.get_vector_ids_closest_to_timestamp(self.start, 1)
+
+        self.memories_raw_data.append_memories(
+            [
+                {
+                    "description": "Memory 10",
+                    "creation_timestamp": self.start - datetime.timedelta(minutes=15),
+                    "most_recent_access_timestamp": self.start,
+                    "importance": 0.5,
+                }
+            ]
+        )
+
+        memories = get_most_recent_memories(
+            self.start - datetime.timedelta(hours=1), 2, self.memories_raw_data
+        )
+
+        self.assertEqual(self.get_descriptions(memories), ["Memory 10", "Memory 0"])
+
+    def test_can_retrieve_the_memories_of_a_time_window(self):
+        end = self.start + datetime.timedelta(hours=4, minutes=30)
+
+        memories = get_memories_in_time_window(
+            end - datetime.timedelta(hours=2), end, self.memories_raw_data
+        )
+
+        self.assertEqual(
+            self.get_descriptions(memories),
+            ["Memory 5", "Memory 6", "Memory 7", "Memory 8", "Memory 9"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
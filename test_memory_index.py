@@ -0,0 +1,100 @@
+import random
+import unittest
+
+from defines import METRIC_ANGULAR, VECTOR_DIMENSIONS
+from memory_index import MemoryIndex
+
+
+def create_random_vector(rng):
+    return [rng.uniform(-1.0, 1.0) for _ in range(VECTOR_DIMENSIONS)]
+
+
+class TestMemoryIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+
+        self.vectors = [create_random_vector(rng) for _ in range(30)]
+        self.query_vector = create_random_vector(rng)
+
+    def test_new_items_get_appended_to_the_delta_buffer(self):
+        index = MemoryIndex(METRIC_ANGULAR)
+
+        for vector_id, vector in enumerate(self.vectors[:20]):
+            index.add_item(vector_id, vector)
+
+        index.merge()
+
+        index.add_item(20, self.vectors[20])
+
+        self.assertEqual(index.get_n_items(), 21)
+        self.assertEqual(index.get_number_of_delta_items(), 1)
+
+    def test_searching_with_delta_buffer_returns_the_same_results_as_a_merged_index(
+        self,
+    ):
+        index = MemoryIndex(METRIC_ANGULAR, brute_force_search_max_items=0)
+
+        for vector_id, vector in enumerate(self.vectors[:20]):
+            index.add_item(vector_id, vector)
+
+        index.merge()
+
+        for vector_id, vector in enumerate(self.vectors[20:], start=20):
+            index.add_item(vector_id, vector)
+
+        ids_with_delta, distances_with_delta = index.get_nns_by_vector(
+            self.query_vector, 10, include_distances=True
+        )
+
+        index.merge()
+
+        ids_merged, distances_merged = index.get_nns_by_vector(
+            self.query_vector, 10, include_distances=True
+        )
+
+        self.assertEqual(index.get_number_of_delta_items(), 0)
+        self.assertEqual(ids_with_delta, ids_merged)
+
+        for distance_with_delta, distance_merged in zip(
+            distances_with_delta, distances_merged
+        ):
+            self.assertAlmostEqual(distance_with_delta, distance_merged, places=5)
+
+    def test_brute_force_search_returns_the_same_results_as_annoy(self):
+        annoy_index = MemoryIndex(METRIC_ANGULAR, brute_force_search_max_items=0)
+        brute_force_index = MemoryIndex(METRIC_ANGULAR)
+
+        for vector_id, vector in enumerate(self.vectors):
+            annoy_index.add_item(vector_id, vector)
+            brute_force_index.add_item(vector_id, vector)
+
+        annoy_index.merge()
+
+        self.assertTrue(brute_force_index.is_brute_force_search_preferable())
+        self.assertFalse(annoy_index.is_brute_force_search_preferable())
+
+        ids_annoy, distances_annoy = annoy_index.get_nns_by_vector(
+            self.query_vector, 10, include_distances=True
+        )
+        ids_brute_force, distances_brute_force = brute_force_index.get_nns_by_vector(
+            self.query_vector, 10, include_distances=True
+        )
+
+        self.assertEqual(ids_annoy, ids_brute_force)
+
+        for distance_annoy, distance_brute_force in zip(
+            distances_annoy, distances_brute_force
+        ):
+            self.assertAlmostEqual(distance_annoy, distance_brute_force, places=5)
+
+    def test_brute_force_search_returns_at_most_the_number_of_items(self):
+        index = MemoryIndex(METRIC_ANGULAR)
+
+        for vector_id, vector in enumerate(self.vectors[:3]):
+            index.add_item(vector_id, vector)
+
+        self.assertEqual(len(index.get_nns_by_vector(self.query_vector, 50)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import datetime
+import os
+import random
+import tempfile
+import unittest
+
+from defines import METRIC_ANGULAR, VECTOR_DIMENSIONS
+from errors import DisparityBetweenDatabasesError
+from memory_index import MemoryIndex, load_memory_index
+from memory_stream import MemoryStream
+from memory_stream_columns import MemoryStreamColumns, load_memory_stream_columns
+
+
+def create_memory(description, timestamp):
+    return {
+        "description": description,
+        "creation_timestamp": timestamp,
+        "most_recent_access_timestamp": timestamp,
+        "importance": 0.5,
+    }
+
+
+class TestMemoryStream(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+
+        self.vectors = [
+            [rng.uniform(-1.0, 1.0) for _ in range(VECTOR_DIMENSIONS)] for _ in range(3)
+        ]
+
+        self.timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+    def test_added_memories_stay_in_memory_until_checkpointed(self):
+        memory_stream = MemoryStream(MemoryIndex(METRIC_ANGULAR), MemoryStreamColumns())
+
+        memory_stream.add_memories(
+            self.vectors,
+            [
+                create_memory(f"Memory {i}", self.timestamp)
+                for i in range(len(self.vectors))
+            ],
+        )
+
+        self.assertTrue(memory_stream.has_unsaved_memories())
+        self.assertEqual(memory_stream.get_index().get_n_items(), 3)
+        self.assertEqual(memory_stream.get_memories()["2"]["description"], "Memory 2")
+
+        with tempfile.TemporaryDirectory() as directory:
+            database_filename = os.path.join(directory, "memories.ann")
+            delta_filename = os.path.join(directory, "memory_stream_delta.npy")
+            memory_stream_directory = os.path.join(directory, "memory_stream")
+
+            memory_stream.checkpoint(
+                database_filename, delta_filename, memory_stream_directory
+            )
+
+            self.assertFalse(memory_stream.has_unsaved_memories())
+
+            index = load_memory_index(database_filename, delta_filename, METRIC_ANGULAR)
+            memories = load_memory_stream_columns(memory_stream_directory)
+
+            self.assertEqual(index.get_n_items(), 3)
+            self.assertEqual(len(memories), 3)
+            self.assertEqual(memories["0"]["description"], "Memory 0")
+
+            index.unload()
+
+    def test_adding_a_different_number_of_vectors_and_memories_fails(self):
+        memory_stream = MemoryStream(MemoryIndex(METRIC_ANGULAR), MemoryStreamColumns())
+
+        with self.assertRaises(DisparityBetweenDatabasesError):
+            memory_stream.add_memories(
+                self.vectors, [create_memory("Memory 0", self.timestamp)]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
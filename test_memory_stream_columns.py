@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+
+from memory_stream_columns import (
+    MemoryStreamColumns,
+    load_memory_stream_columns,
+    migrate_json_memory_stream,
+)
+
+
+def create_memory(description, timestamp, importance):
+    return {
+        "description": description,
+        "creation_timestamp": timestamp,
+        "most_recent_access_timestamp": timestamp,
+        "importance": importance,
+    }
+
+
+class TestMemoryStreamColumns(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.memory_stream_directory = os.path.join(
+            self.directory.name, "memory_stream"
+        )
+        self.timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_saved_memories_can_be_loaded_back(self):
+        memory_stream_columns = MemoryStreamColumns()
+        memory_stream_columns.append_memories(
+            [
+                create_memory("Memory 1.", self.timestamp, 0.5),
+                create_memory("Mémoire 2.", self.timestamp, 0.25),
+            ]
+        )
+        memory_stream_columns.save(self.memory_stream_directory)
+
+        loaded_columns = load_memory_stream_columns(self.memory_stream_directory)
+
+        self.assertEqual(len(loaded_columns), 2)
+        self.assertEqual(list(loaded_columns), ["0", "1"])
+        self.assertEqual(loaded_columns["1"]["description"], "Mémoire 2.")
+        self.assertEqual(loaded_columns["1"]["creation_timestamp"], self.timestamp)
+        self.assertEqual(loaded_columns["0"]["importance"], 0.5)
+
+    def test_memories_can_be_appended_to_loaded_columns(self):
+        memory_stream_columns = MemoryStreamColumns()
+        memory_stream_columns.append_memories(
+            [create_memory("Memory 1.", self.timestamp, 0.5)]
+        )
+        memory_stream_columns.save(self.memory_stream_directory)
+
+        loaded_columns = load_memory_stream_columns(self.memory_stream_directory)
+        loaded_columns.append_memories(
+            [create_memory("Memory 2.", self.timestamp, 0.1)]
+        )
+        loaded_columns.update_access_timestamps(
+            [0], self.timestamp + datetime.timedelta(hours=1)
+        )
+        loaded_columns.save(self.memory_stream_directory)
+
+        reloaded_columns = load_memory_stream_columns(self.memory_stream_directory)
+
+        self.assertEqual(len(reloaded_columns), 2)
+        self.assertEqual(reloaded_columns["1"]["description"], "Memory 2.")
+        self.assertEqual(
+            reloaded_columns["0"]["most_recent_access_timestamp"],
+            self.timestamp + datetime.timedelta(hours=1),
+        )
+
+    def test_loaded_access_timestamps_only_get_copied_on_the_first_update(self):
+        memory_stream_columns = MemoryStreamColumns()
+        memory_stream_columns.append_memories(
+            [create_memory(f"Memory {i}.", self.timestamp, 0.5) for i in range(3)]
+        )
+        memory_stream_columns.save(self.memory_stream_directory)
+
+        loaded_columns = load_memory_stream_columns(self.memory_stream_directory)
+
+        loaded_columns.update_access_timestamps(
+            [0], self.timestamp + datetime.timedelta(hours=1)
+        )
+
+        access_timestamps = loaded_columns.access_timestamps
+
+        loaded_columns.update_access_timestamps(
+            [2], self.timestamp + datetime.timedelta(hours=2)
+        )
+
+        self.assertIs(loaded_columns.access_timestamps, access_timestamps)
+        self.assertEqual(
+            loaded_columns["0"]["most_recent_access_timestamp"],
+            self.timestamp + datetime.timedelta(hours=1),
+        )
+        self.assertEqual(
+            loaded_columns["2"]["most_recent_access_timestamp"],
+            self.timestamp + datetime.timedelta(hours=2),
+        )
+
+        # The file stays untouched until the columns get saved.
+        self.assertEqual(
+            load_memory_stream_columns(self.memory_stream_directory)["0"][
+                "most_recent_access_timestamp"
+            ],
+            self.timestamp,
+        )
+
+    def test_legacy_json_memory_stream_gets_migrated(self):
+        json_filename = os.path.join(self.directory.name, "memory_stream.json")
+
+        with open(json_filename, "w", encoding="utf8") as json_file:
+            json.dump(
+                {
+                    "0": {
+                        "description": "Memory 1.",
+                        "creation_timestamp": "2023-05-12T10:55:45",
+                        "most_recent_access_timestamp": "2023-05-11T10:30:45",
+                        "importance": 0.0,
+                    },
+                    "1": {
+                        "description": "Memory 2.",
+                        "creation_timestamp": "2023-05-12T10:55:45",
+                        "most_recent_access_timestamp": "2023-05-11T10:30:45",
+                        "importance": 0.1111111111111111,
+                    },
+                },
+                json_file,
+            )
+
+        migrate_json_memory_stream(json_filename, self.memory_stream_directory)
+
+        loaded_columns = load_memory_stream_columns(self.memory_stream_directory)
+
+        self.assertEqual(len(loaded_columns), 2)
+        self.assertEqual(loaded_columns["1"]["description"], "Memory 2.")
+        self.assertEqual(
+            loaded_columns["0"]["creation_timestamp"],
+            datetime.datetime(2023, 5, 12, 10, 55, 45),
+        )
+        self.assertEqual(loaded_columns["1"]["importance"], 0.1111111111111111)
+
+
+if __name__ == "__main__":
+    unittest.main()
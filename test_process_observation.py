@@ -4,21 +4,17 @@ from anytree import Node
 from agent import Agent
 
 from location import Location
+from memory_stream import MemoryStream
 from process_observation import ProcessObservationParametersKey, process_observation
 from sandbox_object import SandboxObject
 
 
-class FakeIndex:
-    def unload(self):
-        pass
-
-
 def fake_load_agent_memories_function(_agent):
-    return FakeIndex(), None
+    return MemoryStream(None, None)
 
 
 def fake_update_memories_database_function(
-    _agent, _current_timestamp, _new_memories, _index
+    _agent, _current_timestamp, _new_memories, _memory_stream
 ):
     pass
 
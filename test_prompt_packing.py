@@ -0,0 +1,163 @@
+import unittest
+
+from api_requests import AiModelClient, request_response_from_human
+from call_instrumentation import tag_call_site
+from defines import OOBABOOGA_CONTEXT_TOKENS, PROMPT_TOKEN_BUDGET_MARGIN
+from enums import GenerationProfile
+from prompt_packing import (
+    PromptPackingStatistics,
+    get_prompt_packing_statistics,
+    get_prompt_token_budget,
+    pack_memories_into_prompt,
+    pack_prompt,
+)
+from test_ai_model_client import FakeCreateSessionFunction
+
+
+class TestPromptPacking(unittest.TestCase):
+    def test_lines_get_packed_in_order_until_the_budget_runs_out(self):
+        lines = [f"Memory number {index} is about something" for index in range(10)]
+
+        # Every formatted line takes 10 tokens, so 3 of them fit between header and footer.
+        prompt, packing_report = pack_prompt("Header\n", lines, "Footer", 34)
+
+        self.assertEqual(
+            prompt,
+            "Header\n- Memory number 0 is about something\n"
+            "- Memory number 1 is about something\n"
+            "- Memory number 2 is about something\nFooter",
+        )
+        self.assertEqual(
+            packing_report,
+            {"packed_lines": 3, "duplicate_lines": 0, "cut_lines": 7, "cut_tokens": 70},
+        )
+
+    def test_packing_stops_at_the_first_line_that_doesnt_fit(self):
+        lines = ["a short one", "a much longer line " * 10, "short again"]
+
+        prompt, packing_report = pack_prompt("", lines, "", 20)
+
+        self.assertEqual(prompt, "- a short one\n")
+        self.assertEqual(packing_report["cut_lines"], 2)
+
+    def test_near_identical_lines_get_skipped(self):
+        lines = [
+            "Monday June 12 of 2023, 3 PM. Bob is going to read a book in the garden for a while",
+            "Monday June 12 of 2023, 3 PM. Bob is going to read a book in the garden for a while.",
+            "Bob is not going to read a book",
+            "Bob is going to read a book",
+        ]
+
+        prompt, packing_report = pack_prompt("", lines, "", 1000)
+
+        self.assertEqual(packing_report["packed_lines"], 3)
+        self.assertEqual(packing_report["duplicate_lines"], 1)
+        self.assertIn("- Bob is not going to read a book\n", prompt)
+
+    def test_the_budget_depends_on_the_backends_and_the_generation_profile(self):
+        oobabooga_client = AiModelClient(
+            use_gpt=False, create_session_function=FakeCreateSessionFunction()
+        )
+
+        rating_budget = oobabooga_client.get_prompt_token_budget(
+            GenerationProfile.RATING
+        )
+        summary_budget = oobabooga_client.get_prompt_token_budget(
+            GenerationProfile.SUMMARY
+        )
+
+        self.assertLess(rating_budget, OOBABOOGA_CONTEXT_TOKENS - 8)
+        self.assertEqual(rating_budget - summary_budget, 300 - 8)
+
+        # Batch ratings leave most of the context to the character summary and the candidates.
+        self.assertGreater(
+            oobabooga_client.get_prompt_token_budget(GenerationProfile.BATCH_RATING),
+            OOBABOOGA_CONTEXT_TOKENS // 2,
+        )
+        self.assertEqual(
+            get_prompt_token_budget(
+                oobabooga_client.bind("agent"), GenerationProfile.RATING
+            ),
+            rating_budget,
+        )
+
+        # Plain functions get the budget of the smallest backend.
+        self.assertLess(
+            get_prompt_token_budget(lambda prompt: prompt, GenerationProfile.RATING),
+            OOBABOOGA_CONTEXT_TOKENS,
+        )
+
+        oobabooga_client.close()
+
+    def test_plain_functions_get_the_budget_of_the_generation_profile(self):
+        self.assertEqual(
+            get_prompt_token_budget(
+                request_response_from_human, GenerationProfile.SHORT_SENTENCE
+            ),
+            OOBABOOGA_CONTEXT_TOKENS - 64 - PROMPT_TOKEN_BUDGET_MARGIN,
+        )
+
+        memory_descriptions = [
+            f"Bob remembers event number {index}.\n" for index in range(100)
+        ]
+
+        prompt = pack_memories_into_prompt(
+            request_response_from_human,
+            GenerationProfile.SUMMARY,
+            "Memories:\n",
+            memory_descriptions,
+        )
+
+        self.assertEqual(prompt.count("- Bob remembers"), 100)
+
+    def test_the_cut_context_gets_recorded_per_call_site(self):
+        statistics = PromptPackingStatistics()
+
+        statistics.record(
+            {"packed_lines": 3, "duplicate_lines": 1, "cut_lines": 2, "cut_tokens": 40},
+            "actions.request_what_action_to_take_now",
+        )
+        statistics.record(
+            {"packed_lines": 5, "duplicate_lines": 0, "cut_lines": 0, "cut_tokens": 0},
+            "actions.request_what_action_to_take_now",
+        )
+
+        self.assertEqual(
+            statistics.get_summary(),
+            {
+                "actions.request_what_action_to_take_now": {
+                    "prompts": 2,
+                    "truncated_prompts": 1,
+                    "packed_lines": 8,
+                    "duplicate_lines": 1,
+                    "cut_lines": 2,
+                    "cut_tokens": 40,
+                }
+            },
+        )
+        self.assertIn("(~40 tokens) cut", statistics.format_report())
+
+    def test_packing_memories_records_the_report_under_the_current_call_site(self):
+        @tag_call_site
+        def create_prompt():
+            return pack_memories_into_prompt(
+                lambda prompt: prompt,
+                GenerationProfile.SHORT_SENTENCE,
+                "Memories:\n",
+                ["Bob woke up.\n", "Bob made coffee.\n"],
+                "What now?",
+            )
+
+        self.assertEqual(
+            create_prompt(), "Memories:\n- Bob woke up.\n- Bob made coffee.\nWhat now?"
+        )
+
+        call_site = f"{__name__}.create_prompt"
+
+        self.assertEqual(
+            get_prompt_packing_statistics().get_summary()[call_site]["packed_lines"], 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
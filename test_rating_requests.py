@@ -0,0 +1,182 @@
+import math
+import os
+import tempfile
+import threading
+import unittest
+
+from api_requests import AiModelClient, calculate_expected_rating
+from enums import GenerationProfile, RatingMode
+from rating_requests import request_rating, request_ratings_concurrently
+from stand_in_server import CHAT_COMPLETIONS_PATH, StandInServer
+from test_ai_model_client import (
+    FakeCreateSessionFunction,
+    FakeResponse,
+    FakeSession,
+)
+
+
+def create_logprobs(probabilities):
+    return {
+        "content": [
+            {
+                "token": max(probabilities, key=probabilities.get),
+                "logprob": 0.0,
+                "top_logprobs": [
+                    {"token": token, "logprob": math.log(probability)}
+                    for token, probability in probabilities.items()
+                ],
+            }
+        ]
+    }
+
+
+class FakeLogprobsSession(FakeSession):
+    def __init__(self):
+        super().__init__()
+        self.logprobs = create_logprobs({"7": 0.5, "8": 0.25, "x": 0.25})
+
+    def post(self, url, **kwargs):
+        if "chat" not in url:
+            return super().post(url, **kwargs)
+
+        self.posted_urls.append(url)
+        self.posted_requests.append(kwargs.get("data"))
+
+        return FakeResponse(
+            200,
+            {
+                "choices": [
+                    {"message": {"content": "7"}, "logprobs": self.logprobs},
+                ]
+            },
+        )
+
+
+class FakeRequestResponseFunction:
+    def __init__(self, rating=None):
+        self.rating = rating
+        self.profiles = []
+
+    def __call__(self, prompt, generation_profile=GenerationProfile.FREE_TEXT):
+        self.profiles.append(generation_profile)
+
+        return "Rating: 4"
+
+    def request_rating(self, prompt):
+        return self.rating
+
+
+class TestRatingRequests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.api_key_filename = os.path.join(self.directory.name, "api_key.txt")
+
+        with open(self.api_key_filename, "w", encoding="utf8") as file:
+            file.write("secret\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_the_expected_rating_only_weighs_valid_ratings(self):
+        self.assertAlmostEqual(
+            calculate_expected_rating(
+                create_logprobs({"7": 0.5, " 10": 0.25, "x": 0.2, "11": 0.05})
+            ),
+            (7 * 0.5 + 10 * 0.25) / 0.75,
+        )
+        self.assertIsNone(calculate_expected_rating(create_logprobs({"x": 1.0})))
+        self.assertIsNone(calculate_expected_rating(None))
+
+    def test_single_token_ratings_fall_back_to_free_text(self):
+        function = FakeRequestResponseFunction(rating=6.5)
+
+        self.assertEqual(
+            request_rating(function, "prompt", RatingMode.SINGLE_TOKEN), 6.5
+        )
+        self.assertEqual(function.profiles, [])
+
+        # The backend couldn't give a single-token rating.
+        function.rating = None
+
+        self.assertEqual(request_rating(function, "prompt", RatingMode.SINGLE_TOKEN), 4)
+        self.assertEqual(function.profiles, [GenerationProfile.RATING])
+
+        # Plain functions, like the human one, can only answer in free text.
+        self.assertEqual(
+            request_rating(
+                lambda prompt, generation_profile: "8",
+                "prompt",
+                RatingMode.SINGLE_TOKEN,
+            ),
+            8,
+        )
+
+    def test_other_rating_modes_request_free_text(self):
+        function = FakeRequestResponseFunction(rating=6.5)
+
+        self.assertEqual(
+            request_ratings_concurrently(
+                function, ["first", "second"], RatingMode.INDIVIDUAL
+            ),
+            [4, 4],
+        )
+
+    def test_the_client_requests_a_single_token_with_its_logprobs(self):
+        gpt_session = FakeLogprobsSession()
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint="https://gpt/v1/chat/completions",
+            api_key_filename=self.api_key_filename,
+            create_session_function=lambda: gpt_session,
+        )
+
+        self.assertAlmostEqual(
+            client.bind("agent").request_rating("Rate it:"), (7 * 0.5 + 8 * 0.25) / 0.75
+        )
+
+        self.assertIn('"max_tokens": 1', gpt_session.posted_requests[0])
+        self.assertIn('"logprobs": true', gpt_session.posted_requests[0])
+
+        # Without log probabilities, the caller has to fall back to free text.
+        gpt_session.logprobs = None
+
+        self.assertIsNone(client.request_rating("Rate it again:"))
+
+        client.close()
+
+        # The oobabooga generate API can't return log probabilities.
+        oobabooga_client = AiModelClient(
+            use_gpt=False, create_session_function=FakeCreateSessionFunction()
+        )
+
+        self.assertIsNone(oobabooga_client.request_rating("Rate it:"))
+
+        oobabooga_client.close()
+
+    def test_the_stand_in_server_answers_single_token_ratings(self):
+        server = StandInServer(("localhost", 0), seed=3)
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        client = AiModelClient(
+            use_gpt=True,
+            gpt_api_endpoint=server.get_url(CHAT_COMPLETIONS_PATH),
+            api_key_filename=self.api_key_filename,
+        )
+
+        rating = request_rating(
+            client, "Output a number from 1 to 10:", RatingMode.SINGLE_TOKEN
+        )
+
+        self.assertTrue(1 <= rating <= 10)
+        self.assertEqual(server.get_statistics()["served_requests"], 1)
+
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
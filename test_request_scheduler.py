@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+
+from enums import RequestPriority
+from request_scheduler import RequestScheduler
+
+
+class TestRequestScheduler(unittest.TestCase):
+    def test_unlimited_schedulers_never_hold_requests_back(self):
+        request_scheduler = RequestScheduler()
+
+        self.assertFalse(request_scheduler.is_limited())
+        self.assertEqual(request_scheduler.acquire(tokens=10**6), 0.0)
+
+    def test_requests_wait_until_the_tokens_refill(self):
+        request_scheduler = RequestScheduler(tokens_per_minute=60000)
+
+        request_scheduler.acquire(tokens=60000)
+
+        wait_seconds = request_scheduler.acquire(tokens=100)
+
+        self.assertGreater(wait_seconds, 0.05)
+
+        metrics = request_scheduler.get_metrics()
+
+        self.assertEqual(metrics["granted_requests"], 2)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertGreater(metrics["max_wait_seconds"], 0.05)
+
+    def test_waiting_requests_are_granted_by_priority_then_fairly_by_owner(self):
+        request_scheduler = RequestScheduler(tokens_per_minute=6000)
+        request_scheduler.acquire(tokens=6000)
+
+        granted_owners = []
+        lock = threading.Lock()
+
+        def acquire(owner, priority):
+            request_scheduler.acquire(tokens=20, owner=owner, priority=priority)
+
+            with lock:
+                granted_owners.append(owner)
+
+        threads = []
+
+        for owner, priority in [
+            ("first", RequestPriority.NORMAL),
+            ("busy", RequestPriority.NORMAL),
+            ("busy", RequestPriority.NORMAL),
+            ("quiet", RequestPriority.NORMAL),
+            ("urgent", RequestPriority.HIGH),
+        ]:
+            threads.append(threading.Thread(target=acquire, args=(owner, priority)))
+            threads[-1].start()
+
+            # Lets each request join the queue before the next one.
+            time.sleep(0.02)
+
+        self.assertEqual(request_scheduler.get_metrics()["queue_depth"], 5)
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(granted_owners, ["urgent", "first", "busy", "quiet", "busy"])
+        self.assertEqual(request_scheduler.get_metrics()["max_queue_depth"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from response_cache import ResponseCache, create_response_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "response_cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_responses_persist_between_instances(self):
+        key = create_response_cache_key("oobabooga", {"prompt": "Hi"})
+
+        cache = ResponseCache(self.filename)
+        cache.put(key, "Hello")
+        cache.close()
+
+        cache = ResponseCache(self.filename)
+
+        self.assertEqual(cache.get(key), "Hello")
+        self.assertIsNone(cache.get(create_response_cache_key("oobabooga", {})))
+
+        cache.close()
+
+    def test_least_recently_used_responses_get_evicted(self):
+        cache = ResponseCache(self.filename, max_entries=2)
+
+        cache.put("first", "1")
+        cache.put("second", "2")
+        cache.get("first")
+        cache.put("third", "3")
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("first"), "1")
+        self.assertIsNone(cache.get("second"))
+
+        cache.close()
+
+    def test_keys_depend_on_the_backend_and_the_generation_parameters(self):
+        request = {"prompt": "Hi", "temperature": 0.7}
+
+        self.assertEqual(
+            create_response_cache_key("gpt", request),
+            create_response_cache_key("gpt", {"temperature": 0.7, "prompt": "Hi"}),
+        )
+        self.assertNotEqual(
+            create_response_cache_key("gpt", request),
+            create_response_cache_key("oobabooga", request),
+        )
+        self.assertNotEqual(
+            create_response_cache_key("gpt", request),
+            create_response_cache_key("gpt", {"prompt": "Hi", "temperature": 0.1}),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
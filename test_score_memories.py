@@ -0,0 +1,101 @@
+import datetime
+import unittest
+
+from defines import METRIC_ANGULAR, VECTOR_DIMENSIONS
+from memories_querying import score_memories
+from memory_index import MemoryIndex
+from memory_stream_columns import MemoryStreamColumns
+
+
+def create_unit_vector(position):
+    vector = [0.0] * VECTOR_DIMENSIONS
+    vector[position] = 1.0
+
+    return vector
+
+
+TIMESTAMP = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+
+def create_memory(description, importance):
+    return {
+        "description": description,
+        "creation_timestamp": TIMESTAMP,
+        "most_recent_access_timestamp": TIMESTAMP,
+        "importance": importance,
+    }
+
+
+class TestScoreMemories(unittest.TestCase):
+    def setUp(self):
+        self.index = MemoryIndex(METRIC_ANGULAR)
+        self.memory_stream_columns = MemoryStreamColumns()
+
+        # A day later, none of the memories is recent anymore.
+        self.current_timestamp = TIMESTAMP + datetime.timedelta(days=1)
+
+        # Memories 0 to 2 are relevant to the query, but mundane. Memory 3 is unrelated, but poignant.
+        self.index.add_item(0, create_unit_vector(0))
+        self.index.add_item(1, [0.5, 0.5] + [0.0] * (VECTOR_DIMENSIONS - 2))
+        self.index.add_item(2, [0.3, 0.7] + [0.0] * (VECTOR_DIMENSIONS - 2))
+        self.index.add_item(3, create_unit_vector(5))
+
+        self.memory_stream_columns.append_memories(
+            [
+                create_memory("Memory 1.", 0.0),
+                create_memory("Memory 2.", 0.0),
+                create_memory("Memory 3.", 0.0),
+                create_memory("Memory 4.", 1.0),
+            ]
+        )
+
+    def test_results_are_sorted_by_combined_score(self):
+        results = score_memories(
+            self.current_timestamp,
+            create_unit_vector(0),
+            4,
+            self.memory_stream_columns,
+            self.index,
+        )
+
+        scores = [score for _, score in results]
+
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(results[0][0], 0)
+        self.assertAlmostEqual(results[0][1], 1.0, places=5)
+
+    def test_important_memory_is_retrieved_even_if_it_isnt_a_nearest_neighbor(self):
+        results = score_memories(
+            self.current_timestamp,
+            create_unit_vector(0),
+            2,
+            self.memory_stream_columns,
+            self.index,
+        )
+
+        self.assertEqual([idx for idx, _ in results], [0, 3])
+
+    def test_large_streams_still_get_every_memory_scored(self):
+        # An index this size would prefer Annoy for searches by relevance alone.
+        index = MemoryIndex(METRIC_ANGULAR, brute_force_search_max_items=0)
+
+        for vector_id in range(self.index.get_n_items()):
+            index.add_item(vector_id, self.index.get_item_vector(vector_id))
+
+        index.merge()
+
+        self.assertFalse(index.is_brute_force_search_preferable())
+
+        results = score_memories(
+            self.current_timestamp,
+            create_unit_vector(0),
+            2,
+            self.memory_stream_columns,
+            index,
+        )
+
+        self.assertEqual([idx for idx, _ in results], [0, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
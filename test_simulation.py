@@ -3,6 +3,7 @@ from types import NoneType
 import unittest
 
 from anytree import Node
+from api_requests import AiModelClient, BoundAiModelClient
 from location import Location
 from simulation import Simulation
 
@@ -21,6 +22,7 @@ def fake_produce_action_statuses_for_agent_and_sandbox_object_function(
     _produce_action_statuses_for_agent_based_on_destination_node_function,
     _request_what_action_to_take_now_function,
     _request_for_what_length_of_time_the_action_should_take_place_function,
+    _request_action_and_its_duration_function=None,
 ):
     pass
 
@@ -133,6 +135,37 @@ class TestSimulation(unittest.TestCase):
 
         self.assertTrue(agents[0].has_character_summary())
 
+    def test_the_agents_request_responses_through_the_simulations_ai_model_client(
+        self,
+    ):
+        town = Node(Location("town", "town", "a quaint town"))
+
+        simulation = Simulation("test_1")
+
+        def fake_load_environment_function(_simulation_name, _file_name, _self):
+            return town
+
+        simulation.set_load_environment_function(fake_load_environment_function)
+        simulation.set_request_character_summary_function(
+            fake_request_character_summary_function
+        )
+        simulation.set_produce_action_statuses_for_agent_and_sandbox_object_function(
+            fake_produce_action_statuses_for_agent_and_sandbox_object_function
+        )
+        simulation.set_ai_model_client(AiModelClient(use_gpt=False))
+
+        simulation.initialize()
+
+        for agent in simulation.get_agents():
+            if agent.get_is_player():
+                continue
+
+            self.assertIsInstance(
+                agent.get_request_response_function(), BoundAiModelClient
+            )
+
+        self.assertEqual(simulation.get_ai_model_call_summary(), [])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_with_the_same_key_share_one_execution(self):
+        single_flight = SingleFlight()
+        executions = []
+        results = []
+
+        def function():
+            executions.append(1)
+            time.sleep(0.1)
+
+            return "result"
+
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(single_flight.do("key", function))
+            )
+            for _ in range(4)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(results, ["result"] * 4)
+        self.assertEqual(single_flight.get_deduplicated_calls(), 3)
+
+    def test_calls_run_again_once_the_previous_one_finished(self):
+        single_flight = SingleFlight()
+
+        self.assertEqual(single_flight.do("key", lambda: 1), 1)
+        self.assertEqual(single_flight.do("key", lambda: 2), 2)
+        self.assertEqual(single_flight.get_deduplicated_calls(), 0)
+
+    def test_every_waiting_caller_receives_the_exception(self):
+        single_flight = SingleFlight()
+        exceptions = []
+
+        def function():
+            time.sleep(0.1)
+
+            raise ValueError("failed")
+
+        def call():
+            try:
+                single_flight.do("key", function)
+            except ValueError as exception:
+                exceptions.append(exception)
+
+        threads = [threading.Thread(target=call) for _ in range(2)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(exceptions), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
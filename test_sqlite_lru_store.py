@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlite_lru_store import SqliteLruStore
+
+
+class TestSqliteLruStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "store.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_store(self, max_entries=10):
+        return SqliteLruStore(
+            self.filename,
+            "entries",
+            "value",
+            "TEXT",
+            max_entries,
+            lambda value: value.upper(),
+            lambda value: value.lower(),
+        )
+
+    def read_last_accesses(self):
+        with sqlite3.connect(self.filename) as connection:
+            return dict(connection.execute("SELECT key, last_access FROM entries"))
+
+    def test_values_go_through_the_codec(self):
+        store = self.create_store()
+
+        store.put_many([("first", "One"), ("second", "Two")])
+
+        self.assertEqual(
+            store.get_many(["second", "missing", "first"]), ["two", None, "one"]
+        )
+
+        with sqlite3.connect(self.filename) as connection:
+            self.assertEqual(
+                connection.execute(
+                    "SELECT value FROM entries WHERE key = 'first'"
+                ).fetchone()[0],
+                "ONE",
+            )
+
+        store.close()
+
+    def test_reads_get_written_along_with_the_next_write(self):
+        store = self.create_store(max_entries=2)
+
+        store.put_many([("first", "1"), ("second", "2")])
+
+        last_accesses = self.read_last_accesses()
+
+        store.get_many(["first"])
+
+        self.assertEqual(self.read_last_accesses(), last_accesses)
+
+        # Reading 'first' made 'second' the least recently used entry.
+        store.put_many([("third", "3")])
+
+        self.assertEqual(store.get_many(["first", "second"]), ["1", None])
+        self.assertEqual(len(store), 2)
+
+        store.close()
+
+    def test_pending_reads_get_written_on_close(self):
+        store = self.create_store()
+
+        store.put_many([("first", "1"), ("second", "2")])
+        store.get_many(["first"])
+        store.close()
+
+        last_accesses = self.read_last_accesses()
+
+        self.assertGreater(last_accesses["first"], last_accesses["second"])
+
+    def test_pending_reads_get_written_on_flush(self):
+        store = self.create_store()
+
+        store.put_many([("first", "1"), ("second", "2")])
+        store.get_many(["first"])
+        store.flush()
+
+        last_accesses = self.read_last_accesses()
+
+        self.assertGreater(last_accesses["first"], last_accesses["second"])
+
+        # The store stays open after a flush.
+        self.assertEqual(store.get_many(["second"]), ["2"])
+
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
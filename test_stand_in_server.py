@@ -0,0 +1,84 @@
+import random
+import threading
+import unittest
+
+from api_requests import AiModelClient
+from enums import GenerationProfile
+from errors import UnableToConnectWithAiModelError
+from regular_expression_utils import (
+    extract_action_and_duration_from_text,
+    extract_rating_from_text,
+)
+from stand_in_server import StandInServer, create_canned_response
+
+
+class TestStandInServer(unittest.TestCase):
+    def start_server(self, **kwargs):
+        server = StandInServer(("localhost", 0), seed=3, **kwargs)
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        return server
+
+    def test_canned_responses_match_the_type_of_prompt(self):
+        rng = random.Random(3)
+
+        rating = create_canned_response("Output a number from 1 to 10:", rng)
+        action = create_canned_response("Format: Aileen is going to <action>", rng)
+        ratings = create_canned_response(
+            "1. park\n2. library\nAnswer with one line per location, in the format '<location number>. <rating>':",
+            rng,
+        )
+
+        self.assertTrue(1 <= int(rating) <= 10)
+        self.assertTrue(action.startswith("Aileen is going to "))
+        self.assertEqual(
+            [line.split(".")[0] for line in ratings.split("\n")], ["1", "2"]
+        )
+        self.assertIn("minutes", create_canned_response("For how many minutes?", rng))
+
+        combined = create_canned_response(
+            "Format: Aileen is going to <action> for <number> minutes", rng
+        )
+
+        self.assertIsNotNone(extract_action_and_duration_from_text(combined)[1])
+
+    def test_the_client_gets_its_responses_from_the_server(self):
+        server = self.start_server()
+
+        client = AiModelClient(
+            use_gpt=False, oobabooga_api_endpoints=[server.get_url()]
+        )
+
+        response = client(
+            "Rate the park for the action with a number in the range [1, 10]:",
+            GenerationProfile.RATING,
+        )
+
+        self.assertTrue(1 <= extract_rating_from_text(response, "prompt") <= 10)
+        self.assertEqual(server.get_statistics()["served_requests"], 1)
+
+        client.close()
+
+    def test_failing_servers_answer_with_a_503(self):
+        server = self.start_server(error_rate=1.0)
+
+        client = AiModelClient(
+            use_gpt=False,
+            oobabooga_api_endpoints=[server.get_url()],
+            max_retries=0,
+        )
+
+        with self.assertRaises(UnableToConnectWithAiModelError):
+            client("prompt")
+
+        self.assertEqual(server.get_statistics()["failed_requests"], 1)
+
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
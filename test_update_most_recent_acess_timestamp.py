@@ -1,40 +1,56 @@
 import datetime
+import tempfile
 import unittest
 
 from anytree import Node
 from agent import Agent
+from defines import DECAY_RATE
 from location import Location
 from memories_querying import update_most_recent_access_timestamps
+from memory_stream import MemoryStream
+from memory_stream_columns import MemoryStreamColumns, load_memory_stream_columns
+from vector_storage import checkpoint_agent_memories
 
 
-def fake_load_contents_of_json_file_function(_json_filename):
-    return {
-        "0": {
-            "description": "Description 1",
-            "creation_timestamp": "2023-05-11T10:30:45",
-            "most_recent_access_timestamp": "2023-05-11T10:30:45",
-            "recency": 1.0,
-            "importance": 0.6,
-        },
-        "1": {
-            "description": "Description 2",
-            "creation_timestamp": "2023-05-11T10:30:45",
-            "most_recent_access_timestamp": "2023-05-11T10:30:45",
-            "recency": 1.0,
-            "importance": 0.35,
-        },
-        "2": {
-            "description": "Description 3",
-            "creation_timestamp": "2023-05-11T10:30:45",
-            "most_recent_access_timestamp": "2023-05-11T10:30:45",
-            "recency": 0.8,
-            "importance": 0.2,
-        },
-    }
+def fake_load_memory_stream_columns_function(_agent):
+    timestamp = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+    memory_stream_columns = MemoryStreamColumns()
+
+    memory_stream_columns.append_memories(
+        [
+            {
+                "description": "Description 1",
+                "creation_timestamp": timestamp,
+                "most_recent_access_timestamp": timestamp,
+                "importance": 0.6,
+            },
+            {
+                "description": "Description 2",
+                "creation_timestamp": timestamp,
+                "most_recent_access_timestamp": timestamp,
+                "importance": 0.35,
+            },
+            {
+                "description": "Description 3",
+                "creation_timestamp": timestamp,
+                "most_recent_access_timestamp": timestamp,
+                "importance": 0.2,
+            },
+        ]
+    )
 
+    return memory_stream_columns
 
-def fake_create_json_file_function(_json_filename, _memories):
-    pass
+
+class FakeMemoryStream(MemoryStream):
+    def __init__(self, memories):
+        super().__init__(None, memories)
+
+        self.number_of_checkpoints = 0
+
+    def checkpoint(self, database_filename, delta_filename, memory_stream_directory):
+        self.number_of_checkpoints += 1
 
 
 class TestUpdateMostRecentAccessTimestamp(unittest.TestCase):
@@ -48,14 +64,12 @@ class TestUpdateMostRecentAccessTimestamp(unittest.TestCase):
             "description": "Description 1",
             "creation_timestamp": current_time.isoformat(),
             "most_recent_access_timestamp": current_time.isoformat(),
-            "recency": 0.9,
             "importance": 0.6,
         }
         memories_raw_data[1] = {
             "description": "Description 2",
             "creation_timestamp": current_time.isoformat(),
             "most_recent_access_timestamp": current_time.isoformat(),
-            "recency": 0.9,
             "importance": 0.35,
         }
 
@@ -74,31 +88,94 @@ class TestUpdateMostRecentAccessTimestamp(unittest.TestCase):
             agent,
             nearest_neighbors,
             new_time,
-            fake_load_contents_of_json_file_function,
-            fake_create_json_file_function,
+            fake_load_memory_stream_columns_function(agent),
         )
 
         self.assertEqual(
-            datetime.datetime.fromisoformat(
-                memories_raw_data[str(0)]["most_recent_access_timestamp"]
-            ),
+            memories_raw_data[str(0)]["most_recent_access_timestamp"],
             new_time,
         )
-        self.assertEqual(memories_raw_data[str(0)]["recency"], 1.0)
         self.assertEqual(
-            datetime.datetime.fromisoformat(
-                memories_raw_data[str(1)]["most_recent_access_timestamp"]
-            ),
+            memories_raw_data[str(1)]["most_recent_access_timestamp"],
             new_time,
         )
-        self.assertEqual(memories_raw_data[str(1)]["recency"], 1.0)
         self.assertEqual(
-            datetime.datetime.fromisoformat(
-                memories_raw_data[str(2)]["most_recent_access_timestamp"]
-            ),
+            memories_raw_data[str(2)]["most_recent_access_timestamp"],
             current_time,
         )
-        self.assertEqual(memories_raw_data[str(2)]["recency"], 0.8)
+
+        recencies = memories_raw_data.calculate_recencies(new_time, DECAY_RATE)
+
+        self.assertEqual(recencies[0], 1.0)
+        self.assertEqual(recencies[1], 1.0)
+        self.assertLess(recencies[2], 1.0)
+
+    def test_memory_accesses_get_written_with_the_next_checkpoint(self):
+        current_time = datetime.datetime(2023, 5, 11, 10, 30, 45)
+
+        town = Node(Location("town", "town", "town"))
+
+        agent = Agent("test", 22, town, town)
+
+        memory_stream = MemoryStream(
+            None, fake_load_memory_stream_columns_function(agent)
+        )
+
+        agent.set_memory_stream(memory_stream)
+
+        self.assertFalse(memory_stream.has_unsaved_changes())
+
+        for minutes in range(4):
+            update_most_recent_access_timestamps(
+                agent,
+                ([0, 1], [0.9, 1.2]),
+                current_time + datetime.timedelta(minutes=minutes),
+                memory_stream.get_memories(),
+            )
+
+        self.assertTrue(memory_stream.has_unsaved_changes())
+
+        with tempfile.TemporaryDirectory() as directory:
+            memory_stream.checkpoint(None, None, directory)
+
+            self.assertFalse(memory_stream.has_unsaved_changes())
+
+            memory_stream_columns = load_memory_stream_columns(directory)
+
+            self.assertEqual(
+                memory_stream_columns["0"]["most_recent_access_timestamp"],
+                current_time + datetime.timedelta(minutes=3),
+            )
+            self.assertEqual(
+                memory_stream_columns["2"]["most_recent_access_timestamp"],
+                current_time,
+            )
+
+    def test_unchanged_memory_streams_dont_get_checkpointed(self):
+        town = Node(Location("town", "town", "town"))
+
+        agent = Agent("test", 22, town, town)
+
+        memory_stream = FakeMemoryStream(
+            fake_load_memory_stream_columns_function(agent)
+        )
+
+        agent.set_memory_stream(memory_stream)
+
+        checkpoint_agent_memories(agent)
+
+        self.assertEqual(memory_stream.number_of_checkpoints, 0)
+
+        update_most_recent_access_timestamps(
+            agent,
+            ([0], [0.9]),
+            datetime.datetime(2023, 5, 11, 11, 0, 0),
+            memory_stream.get_memories(),
+        )
+
+        checkpoint_agent_memories(agent)
+
+        self.assertEqual(memory_stream.number_of_checkpoints, 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""This module keeps track of how many tokens the AI model generates for each generation profile.
+
+"""
+import math
+import threading
+
+from defines import CHARACTERS_PER_TOKEN, OOBABOOGA_MAX_NEW_TOKENS
+
+
+def estimate_number_of_tokens(text):
+    """Estimates how many tokens a text takes, without needing the model's tokenizer
+
+    Args:
+        text (str): the text whose tokens will be estimated
+
+    Returns:
+        int: the estimated number of tokens
+    """
+    if not text:
+        return 0
+
+    return math.ceil(len(text) / CHARACTERS_PER_TOKEN)
+
+
+class TokenAccounting:
+    """Accumulates, per generation profile, how many responses got generated, how many tokens
+    they were allowed to take, and roughly how many they actually took.
+
+    The saved tokens are the difference between the generation budget every request would
+    have had without a profile ('default_max_new_tokens') and the budget it actually had.
+    """
+
+    def __init__(self, default_max_new_tokens=OOBABOOGA_MAX_NEW_TOKENS):
+        self._default_max_new_tokens = default_max_new_tokens
+
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, generation_profile, max_new_tokens, response):
+        """Records a response generated by the AI model
+
+        Args:
+            generation_profile (GenerationProfile): the profile the request was sent with
+            max_new_tokens (int): how many tokens the response was allowed to take, or None for the default
+            response (str): the response, or None if the request failed
+        """
+        if max_new_tokens is None:
+            max_new_tokens = self._default_max_new_tokens
+
+        with self._lock:
+            entry = self._entries.setdefault(
+                generation_profile,
+                {"requests": 0, "budgeted_tokens": 0, "generated_tokens": 0},
+            )
+
+            entry["requests"] += 1
+            entry["budgeted_tokens"] += max_new_tokens
+            entry["generated_tokens"] += estimate_number_of_tokens(response)
+
+    def get_summary(self):
+        """Returns the accumulated numbers of each generation profile
+
+        Returns:
+            dict: for each profile name, its requests, budgeted, generated and saved tokens
+        """
+        with self._lock:
+            return {
+                generation_profile.name: {
+                    **entry,
+                    "saved_tokens": entry["requests"] * self._default_max_new_tokens
+                    - entry["budgeted_tokens"],
+                }
+                for generation_profile, entry in self._entries.items()
+            }
+
+    def format_report(self):
+        """Formats the accumulated numbers in a human-readable form
+
+        Returns:
+            str: one line per generation profile
+        """
+        return "\n".join(
+            f"{name}: {entry['requests']} requests, ~{entry['generated_tokens']} tokens generated, "
+            f"{entry['budgeted_tokens']} budgeted, {entry['saved_tokens']} saved"
+            for name, entry in self.get_summary().items()
+        )
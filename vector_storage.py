@@ -4,119 +4,122 @@ import datetime
 import json
 import os
 
-from annoy import AnnoyIndex
 from agent import Agent
+from call_instrumentation import tag_call_site
 from defines import (
-    DECAY_RATE,
+    ENCODING_BATCH_SIZE,
     MODEL,
     METRIC_ANGULAR,
-    NUMBER_OF_TREES,
-    VECTOR_DIMENSIONS,
+    USE_EMBEDDING_CACHE,
     get_database_filename,
+    get_delta_database_filename,
     get_json_filename,
+    get_memory_stream_directory,
 )
 
-from errors import (
-    DatabaseDoesntExistError,
-    DisparityBetweenDatabasesError,
-    UnableToSaveVectorDatabaseError,
+from embedding_cache import get_embedding_cache
+from errors import DisparityBetweenDatabasesError
+from math_utils import normalize_value
+from memory_index import MemoryIndex, load_memory_index
+from memory_stream import MemoryStream
+from memory_stream_columns import (
+    MemoryStreamColumns,
+    load_memory_stream_columns,
+    migrate_json_memory_stream,
 )
-from math_utils import calculate_recency, normalize_value
-from regular_expression_utils import extract_rating_from_text
+from rating_requests import request_ratings_concurrently
 from wrappers import validate_agent_type
 
 
 def process_raw_data(raw_text):
-    vector_representation = MODEL.encode(raw_text)
-    return vector_representation
+    return process_raw_data_in_batches([raw_text])[0]
 
 
-def insert_text_in_vector_index(text, index):
-    vector_index = index.get_n_items()
+def process_raw_data_in_batches(raw_texts, batch_size=ENCODING_BATCH_SIZE):
+    """Encodes several texts through a single call to the sentence transformer,
+    which lets the model run its forward passes in batches.
 
-    index.add_item(vector_index, process_raw_data(text))
+    Args:
+        raw_texts (list[str]): the texts that will be encoded
+        batch_size (int, optional): how many texts get encoded per forward pass. Defaults to ENCODING_BATCH_SIZE.
 
-    return vector_index
+    Returns:
+        list: the vector representations, in the same order as the texts
+    """
+    if not raw_texts:
+        return []
 
+    def encode(texts):
+        return list(MODEL.encode(texts, batch_size=batch_size))
 
-@validate_agent_type
-def create_memory_dictionary(
-    agent: Agent, memory_description: str, current_timestamp: datetime.datetime
-):
-    """Creates a memory dict for the memory description passed
+    if not USE_EMBEDDING_CACHE:
+        return encode(raw_texts)
+
+    # Repeated texts (summary queries, shared observations, seed memories) become a lookup.
+    return get_embedding_cache().get_or_encode(raw_texts, encode)
+
+
+def create_importance_prompt(memory_description: str):
+    """Creates the prompt that asks the AI model how important a memory is
 
     Args:
-        agent (Agent): the agent to whom the memory belongs
         memory_description (str): the description of the memory
-        current_timestamp (datetime): the current timestamp
 
     Returns:
-        dict: the data asociated with the memory, to store in a json file
+        str: the prompt
     """
-    most_recent_access_timestamp = current_timestamp
-
-    recency = calculate_recency(
-        current_timestamp, most_recent_access_timestamp, DECAY_RATE
-    )
-
     importance_prompt = "On the scale of 1 to 10, where 1 is purely mundane (e.g., brushing teeth, making bed) "
     importance_prompt += "and 10 is extremely poignant (e.g., a break up, college acceptance), rate the likely importance "
     importance_prompt += "of the following piece of memory."
     importance_prompt += f" Memory: {memory_description}"
     importance_prompt += "\nRating: <fill in>."
 
-    importance_response = agent.get_request_response_function()(importance_prompt)
-
-    extracted_importance = extract_rating_from_text(
-        importance_response, importance_prompt
-    )
-
-    normalized_importance = normalize_value(extracted_importance)
-
-    # We must create a whole memory dict.
-    return {
-        "description": memory_description,
-        "creation_timestamp": current_timestamp.isoformat(),
-        "most_recent_access_timestamp": most_recent_access_timestamp.isoformat(),
-        "recency": recency,
-        "importance": normalized_importance,
-    }
+    return importance_prompt
 
 
-def create_vectorized_memory(
-    agent: Agent,
-    memory_description: str,
-    current_timestamp: datetime.datetime,
-    index: AnnoyIndex,
+@validate_agent_type
+@tag_call_site
+def create_memory_dictionaries(
+    agent: Agent, memory_descriptions: list[str], current_timestamp: datetime.datetime
 ):
-    """Creates a vectorized memory of a memory description
+    """Creates the memory dicts for the memory descriptions passed. The importance
+    of every memory gets requested from the AI model at the same time.
 
     Args:
-        agent (Agent): the agent to whom the memory belongs
-        memory_description (str): the description of the memory, in natural English
+        agent (Agent): the agent to whom the memories belong
+        memory_descriptions (list[str]): the descriptions of the memories
         current_timestamp (datetime): the current timestamp
-        index (AnnoyIndex): the index of the 'annoy' library
 
     Returns:
-        AnnoyIndex, dict: the index of the vector database, as well as a dict with the json-ready data of the memory
+        list[dict]: the data asociated with each memory, to store in the memory stream
     """
-    vector_index = insert_text_in_vector_index(memory_description, index)
-
-    memory = create_memory_dictionary(agent, memory_description, current_timestamp)
-
-    return vector_index, memory
+    most_recent_access_timestamp = current_timestamp
 
+    importance_prompts = [
+        create_importance_prompt(memory_description)
+        for memory_description in memory_descriptions
+    ]
 
-def create_vector_database(database_filename, new_index):
-    new_index.build(NUMBER_OF_TREES)
+    importances = request_ratings_concurrently(
+        agent.get_request_response_function(), importance_prompts
+    )
 
-    try:
-        new_index.save(database_filename)
-    except OSError as exception:
-        message_error = f"The function {create_vector_database.__name__} was unable to save the database at {database_filename}."
-        message_error += f" Error: {exception}"
+    memories = []
+
+    for memory_description, extracted_importance in zip(
+        memory_descriptions, importances
+    ):
+        # We must create a whole memory dict.
+        memories.append(
+            {
+                "description": memory_description,
+                "creation_timestamp": current_timestamp,
+                "most_recent_access_timestamp": most_recent_access_timestamp,
+                "importance": normalize_value(extracted_importance),
+            }
+        )
 
-        raise UnableToSaveVectorDatabaseError(message_error) from exception
+    return memories
 
 
 def create_json_file(json_filename, raw_text_mapping):
@@ -136,29 +139,43 @@ def ensure_parity_between_databases(memories_raw_data, index):
         )
 
 
-def append_to_previous_json_memories_if_necessary(json_filename, memories):
-    """This function will prevent squashing the previous json memories file
-    if one exists, because it will load the contents of that file
-    and add the new memories to that raw mapping.
+def load_agent_memory_stream_columns(agent):
+    """Loads the columns of an agent's memory stream. If the agent's memory stream is
+    already resident, its columns get returned as they are. If the agent's memories are
+    still stored in the legacy 'memory_stream.json' file, they get migrated first.
 
     Args:
-        json_filename (str): the full path to the json file
-        memories (dict): new memories that need to be saved to disk
+        agent (Agent): the agent to whom the memories belong
 
     Returns:
-        dict: either the original memories or the previous memories + the new ones
+        MemoryStreamColumns: the columns of the agent's memory stream
     """
-    # Remember to load all the memories in the json file,
-    # or else you'll just overwrite the file with "create_json_file"
-    if os.path.isfile(json_filename):
-        raw_text_mapping = load_contents_of_json_file(json_filename)
+    if agent.has_memory_stream():
+        return agent.get_memory_stream().get_memories()
 
-        for index, entry in memories.items():
-            raw_text_mapping[index] = entry
+    directory = get_memory_stream_directory(agent)
+    json_filename = get_json_filename(agent)
 
-        return raw_text_mapping
+    if not os.path.isdir(directory) and os.path.isfile(json_filename):
+        memory_stream_columns = migrate_json_memory_stream(json_filename, directory)
+    else:
+        memory_stream_columns = load_memory_stream_columns(directory)
+
+    return memory_stream_columns
 
-    return memories
+
+def do_agent_memories_exist(agent):
+    """Returns whether or not the agent's memory stream has been created already
+
+    Args:
+        agent (Agent): the agent to whom the memories belong
+
+    Returns:
+        bool: whether or not the agent's memory stream exists
+    """
+    return os.path.isdir(get_memory_stream_directory(agent)) or os.path.isfile(
+        get_json_filename(agent)
+    )
 
 
 @validate_agent_type
@@ -166,109 +183,90 @@ def save_memories(
     agent: Agent,
     current_timestamp: datetime.datetime,
     new_memories: list[str],
-    new_index: AnnoyIndex,
+    memory_stream: MemoryStream,
 ):
-    """Saves a list of memories to the vector database (both annoy library and the json file)
+    """Adds a list of memories to the agent's memory stream. Nothing gets written to disk
+    until the memory stream gets checkpointed.
 
     Args:
         agent (Agent): the agent whose new memories will be saved
         current_timestamp (datetime.datetime): the current timestamp
-        new_memories (list[str]): the new memories that will be saved to the vector database
-        new_index (AnnoyIndex): the index of the vector database
+        new_memories (list[str]): the new memories that will be added to the memory stream
+        memory_stream (MemoryStream): the agent's memory stream
     """
-    memories = {}
+    # All the new descriptions get encoded at once, instead of one forward pass per memory.
+    vectors = process_raw_data_in_batches(new_memories)
 
-    for memory_description in new_memories:
-        vector_index, memory = create_vectorized_memory(
-            agent, memory_description, current_timestamp, new_index
-        )
+    memories = create_memory_dictionaries(agent, new_memories, current_timestamp)
 
-        memories.update({vector_index: memory})
+    memory_stream.add_memories(vectors, memories)
 
-    database_filename = get_database_filename(agent)
-    json_filename = get_json_filename(agent)
 
-    create_vector_database(database_filename, new_index)
+@validate_agent_type
+def checkpoint_agent_memories(agent: Agent):
+    """Writes the agent's resident memory stream to disk, as long as it has changed
+    since the previous checkpoint.
+
+    Args:
+        agent (Agent): the agent whose memory stream will be checkpointed
+    """
+    if not agent.has_memory_stream():
+        return
 
-    memories = append_to_previous_json_memories_if_necessary(json_filename, memories)
+    memory_stream = agent.get_memory_stream()
 
-    create_json_file(json_filename, memories)
+    if not memory_stream.has_unsaved_changes():
+        return
 
-    # ensure that there is parity between the length of both the json
-    ensure_parity_between_databases(
-        load_contents_of_json_file(json_filename), new_index
+    memory_stream.checkpoint(
+        get_database_filename(agent),
+        get_delta_database_filename(agent),
+        get_memory_stream_directory(agent),
     )
 
 
 def create_memories_database(agent, current_timestamp, seed_memories):
-    new_index = create_new_index(METRIC_ANGULAR)
-
-    save_memories(agent, current_timestamp, seed_memories, new_index)
-
-
-def load_index_items_into_new_index(index, metric):
-    new_index = create_new_index(metric)
-
-    for i in range(index.get_n_items()):
-        new_index.add_item(i, index.get_item_vector(i))
+    memory_stream = MemoryStream(
+        create_new_index(METRIC_ANGULAR), MemoryStreamColumns()
+    )
 
-    # Vital to unload the original index, which should free up the database file.
-    index.unload()
+    save_memories(agent, current_timestamp, seed_memories, memory_stream)
 
-    return new_index
+    agent.set_memory_stream(memory_stream)
 
+    # A fresh memory stream gets written right away, so the agent's memories exist on disk.
+    checkpoint_agent_memories(agent)
 
-def update_memories_database(agent, current_timestamp, new_memories, index):
-    new_index = load_index_items_into_new_index(index, METRIC_ANGULAR)
 
-    save_memories(agent, current_timestamp, new_memories, new_index)
+def update_memories_database(agent, current_timestamp, new_memories, memory_stream):
+    save_memories(agent, current_timestamp, new_memories, memory_stream)
 
 
 def create_new_index(metric):
-    return AnnoyIndex(VECTOR_DIMENSIONS, metric)
-
-
-def load_vector_database_index(database_name, metric):
-    index = create_new_index(metric)
-
-    try:
-        index.load(database_name)
-    except OSError as exception:
-        raise DatabaseDoesntExistError(
-            f"I failed to load the index of a vector database because the file doesn't seem to exist. The filename is '{database_name}'. Error: {exception}"
-        ) from exception
-
-    return index
-
+    return MemoryIndex(metric)
 
-def format_json_memory_data_for_python(memories_raw_data):
-    for memory_key in memories_raw_data:
-        memories_raw_data[memory_key] = {
-            "description": memories_raw_data[memory_key]["description"],
-            "creation_timestamp": datetime.datetime.fromisoformat(
-                memories_raw_data[memory_key]["creation_timestamp"]
-            ),
-            "most_recent_access_timestamp": datetime.datetime.fromisoformat(
-                memories_raw_data[memory_key]["most_recent_access_timestamp"]
-            ),
-            "recency": memories_raw_data[memory_key]["recency"],
-            "importance": memories_raw_data[memory_key]["importance"],
-        }
 
-    return memories_raw_data
+def load_agent_memories(agent):
+    """Returns the agent's memory stream. It only gets loaded from disk the first time;
+    from then on, the agent keeps it resident for the rest of the simulation run.
 
+    Args:
+        agent (Agent): the agent to whom the memories belong
 
-def load_agent_memories(agent):
-    database_filename = get_database_filename(agent)
-    json_filename = get_json_filename(agent)
+    Returns:
+        MemoryStream: the agent's memory stream
+    """
+    if agent.has_memory_stream():
+        return agent.get_memory_stream()
 
-    index = load_vector_database_index(database_filename, METRIC_ANGULAR)
+    index = load_memory_index(
+        get_database_filename(agent), get_delta_database_filename(agent), METRIC_ANGULAR
+    )
 
-    memories_raw_data = load_contents_of_json_file(json_filename)
+    memory_stream_columns = load_agent_memory_stream_columns(agent)
 
-    ensure_parity_between_databases(memories_raw_data, index)
+    ensure_parity_between_databases(memory_stream_columns, index)
 
-    # Note: the timestamps stored in the JSON are strings. We need to convert them to proper timestamps
-    memories_raw_data = format_json_memory_data_for_python(memories_raw_data)
+    agent.set_memory_stream(MemoryStream(index, memory_stream_columns))
 
-    return index, memories_raw_data
+    return agent.get_memory_stream()